@@ -1,19 +1,18 @@
 
 from functools import wraps
 from nt import environ
-from jwt_utils import make_access_token, make_refresh_token, decode_token
-from flask import Blueprint, Flask, jsonify, request, send_from_directory, g
+from jwt_utils import make_access_token, make_refresh_token, decode_token, is_session_token, verify_session_token, revoke_token, bump_user_epoch
+from flask import Blueprint, Flask, jsonify, request, send_from_directory, g, Response, stream_with_context
 from flask_cors import CORS
 import pandas as pd
-import os, time, requests, jwt
+import os, jwt
+import csv, io
 from uuid import uuid4
 import json 
-from typing import Any, Dict
-from datetime import datetime, date, timezone
+from typing import Any, Dict, Optional
+from datetime import datetime, timezone
 import inspect
 
-global env
-env = "dev"
 # --- Role hierarchy: higher number = higher privilege ---
 ROLE_HIERARCHY = {
     "simple": 1,
@@ -57,10 +56,11 @@ from servertest import (
     update_role_only,
     get_onboard_request_by_id,
     get_profile_by_id,
+    get_env_for_caller,
     find_task_by_id,
     get_profile_by_email,
     get_profile_by_username,
-    insert_profile,
+    insert_profile_returning,
     update_profile,
     list_all_tasks_simple,
     remove_task_by_id,
@@ -69,11 +69,43 @@ from servertest import (
     update_task_in_db_list,
     manage_onboarding_tasks,
     CF_SP_Emp_Detail_Search,
+    bulk_insert_onboard_requests,
+    iter_onboard_requests,
+    get_submission_counts,
+    get_task_summary,
+    bulk_update_tasks,
+    get_onboard_requests_by_ids,
+    find_tasks_by_ids,
+    resolve_fields,
+    TASK_LIST_COLUMNS,
+    PROFILE_RETURN_COLUMNS,
+    ONBOARD_EXPORT_COLUMNS,
+    manage_tasks_after_submission_update,
+    _get_category_map,
+    flag_requested,
+    unit_of_work,
+    TASK_SUMMARY_CACHE,
 )
-from users_rbac import register_user_routes
+from users_rbac import register_user_routes, issue_session_tokens, PERMISSIONS, ROLE_PERMISSIONS
+from change_events import register_change_event_routes
+from archival import start_archival_scheduler
+from task_queue import enqueue, get_job, register_handler, register_task_queue_routes, start_workers
+from env_context import env_scope, get_env, set_env, DEFAULT_ENV
+from notifications import notify_new_tasks, start_digest_flusher
+from concurrency import run_parallel
+from jwks_cache import JwksKeyStore
+from token_cache import API_TOKEN_CACHE, TOKEN_CACHE
+from statement_cache import STATEMENTS
+from shared_cache import CACHES, cache_stats
+from resilience import BREAKERS, CircuitOpenError, admit, resilience_stats, unavailable
+from db_routing import PIN_COOKIE, READ_YOUR_WRITES_S, is_pinned, note_write, pin_key, routing_stats, set_force_primary
+from json_provider import FastJSONProvider
+from compression import init_compression, register_frontend_routes
+from uuid import UUID
 from functools import wraps
 
-app = Flask(__name__,)
+app = Flask(__name__, static_folder=None)   # frontend build is served by register_frontend_routes
+app.json = FastJSONProvider(app)
 CORS(app, resources={
     r"/api/*": {
         "origins": [
@@ -88,38 +120,92 @@ CORS(app, resources={
 })
 
 register_user_routes(app)
+start_archival_scheduler()   # only when ARCHIVE_INTERVAL_S > 0; otherwise run archival.py from cron
+init_compression(app)
+
+FRONTEND_BUILD_DIR = os.getenv("FRONTEND_BUILD_DIR")   # output of precompress_assets.py
+if FRONTEND_BUILD_DIR and os.path.isfile(os.path.join(FRONTEND_BUILD_DIR, "index.html")):
+    register_frontend_routes(app, FRONTEND_BUILD_DIR)
+
+# --- Task generation runs on the background job queue, after the submission commit ---
+SUBMISSION_TASKS_JOB = "submission_tasks"
+
+def _submission_tasks_job_key(submission_id) -> str:
+    return f"submission-tasks:{submission_id}"
+
+def _run_submission_tasks(payload: dict) -> None:
+    payload = dict(payload)
+    submission_id = UUID(str(payload.pop("submission_id")))
+    job_env = payload.pop("_env", None) or DEFAULT_ENV
+    with env_scope(job_env):
+        categories = _get_category_map(job_env)
+        # every task insert/update for this submission commits together (or not at all; the job retries)
+        with unit_of_work():
+            created = manage_tasks_after_submission_update(submission_id, payload, env=job_env, categories=categories)
+        try:
+            notify_new_tasks(created, categories)
+        except Exception as e:
+            # never retry task generation because a notification could not be rendered
+            app.logger.exception(f"[notify_new_tasks] {e}")
+
+register_handler(SUBMISSION_TASKS_JOB, _run_submission_tasks)
+start_workers()   # resume jobs left queued or backing off by a previous process
+start_digest_flusher()   # and notification digests it buffered but never sent
+
+# fields copied onto tasks by manage_tasks_after_submission_update, besides the category flags
+SUBMISSION_TASK_FIELDS = ("LegalFirstName", "LegalLastName", "Manager")
+
+def _submission_tasks_changed(before: Optional[dict], data: dict, categories: Dict[str, Any]) -> bool:
+    """True when a PUT changes a requested flag or a field the submission's tasks carry."""
+    before = before or {}
+    for flag_field in categories:
+        if flag_field in data and flag_requested(data[flag_field]) != flag_requested(before.get(flag_field)):
+            return True
+    return any(
+        k in data and str(data[k] or "") != str(before.get(k) or "")
+        for k in SUBMISSION_TASK_FIELDS
+    )
+
+def enqueue_submission_tasks(submission_id, data: dict) -> None:
+    """Queue (or coalesce) task generation for one submission. PayRate never leaves the DB."""
+    payload = {k: v for k, v in (data or {}).items() if str(k).lower() not in ("payrate", "submission_id")}
+    payload["submission_id"] = str(submission_id)
+    payload["_env"] = get_env()
+    enqueue(SUBMISSION_TASKS_JOB, _submission_tasks_job_key(submission_id), payload)
 
 # --- A simplified token validation and decoding function ---
 # Flask route
 REDACT = {"password", "password_hash"}
 def filter_by_env(result):
     """
-    Applies an env filter to typical return types:
+    Safety check only: read helpers now scope by env in SQL (see select_with_env).
+    If a row from another env still shows up (helper without an env predicate),
+    log it and drop it rather than leak it. Handles:
     - pandas.DataFrame (if it has 'env' column)
-    - list[dict] (filters dicts that have 'env' == env_value; if no 'env' key, keep or drop per policy)
+    - list[dict] (dicts with a mismatching 'env' key)
     - dict (returns {} if it has 'env' and doesn't match)
     - primitives / bool: returned unchanged
     """
-    global env
+    env = get_env()
     try:
         if isinstance(result, pd.DataFrame):
             if "env" in result.columns:
-                return result[result["env"] == env]
-            return result  # cannot filter if column doesn't exist
+                mismatch = result["env"] != env
+                if mismatch.any():
+                    app.logger.error(f"[filter_by_env] dropped {int(mismatch.sum())} row(s) outside env '{env}'")
+                    return result[~mismatch]
+            return result
 
         if isinstance(result, list):
-            # Only keep dict items where env matches (if 'env' key exists)
-            filtered = []
-            for it in result:
-                if isinstance(it, dict):
-                    if "env" not in it or it.get("env") == env:
-                        filtered.append(it)
-                else:
-                    filtered.append(it)  # not a dict; keep as-is
-            return filtered
+            leaked = [it for it in result if isinstance(it, dict) and "env" in it and it.get("env") != env]
+            if leaked:
+                app.logger.error(f"[filter_by_env] dropped {len(leaked)} row(s) outside env '{env}'")
+                return [it for it in result if not (isinstance(it, dict) and "env" in it and it.get("env") != env)]
+            return result
 
         if isinstance(result, dict):
             if "env" in result and result.get("env") != env:
+                app.logger.error(f"[filter_by_env] dropped a record outside env '{env}'")
                 return {}  # does not match current env
             return result
     except Exception:
@@ -128,22 +214,26 @@ def filter_by_env(result):
 
     return result  # non-filterable type
 
+def _arg_flag(name: str) -> bool:
+    return str(request.args.get(name, "")).lower() in ("1", "true", "yes")
+
 def select_with_env(fn):
     """
     Wrapper that:
-      1) Tries to pass env as a kwarg if the function supports it.
-      2) Post-filters the result by env for common return types.
+      1) Passes the request's env as a kwarg if the function supports it
+         (signature inspected once, here, not per call) so SQL does the scoping.
+      2) Runs filter_by_env on the result as a safety net.
     """
+    try:
+        takes_env = "env" in inspect.signature(fn).parameters
+    except (ValueError, TypeError):
+        # Builtins/c-extension funcs might not be introspectable
+        takes_env = False
+
     @wraps(fn)
     def _inner(*args, **kwargs):
-        # Try to pass env if the function signature includes it
-        try:
-            sig = inspect.signature(fn)
-            if "env" in sig.parameters and "env" not in kwargs:
-                kwargs["env"] = env
-        except (ValueError, TypeError):
-            # Builtins/c-extension funcs might not be introspectable
-            pass
+        if takes_env and "env" not in kwargs:
+            kwargs["env"] = get_env()
 
         result = fn(*args, **kwargs)
         return filter_by_env(result)
@@ -159,6 +249,74 @@ get_roles_with_role      = select_with_env(get_roles_with_role)
 CF_SP_Emp_Detail_Search  = select_with_env(CF_SP_Emp_Detail_Search)
 list_all_tasks_simple    = select_with_env(list_all_tasks_simple)
 find_task_by_id          = select_with_env(find_task_by_id)
+def _caller_env(auth_header: str, user_email: str = "") -> Optional[str]:
+    """
+    Env of the caller, from their identity; None when it can't be resolved:
+    session token -> its "env" claim; Microsoft ID token -> prod once verified;
+    "demo:<role_id>", ":<role_id>", "email:<email>" or a bare role_id, or an
+    X-User-Email header -> the env on that caller's profile row.
+    """
+    token = auth_header.split(" ", 1)[1].strip() if auth_header.lower().startswith("bearer ") else ""
+    if not token:
+        return get_env_for_caller(user_email) if user_email.strip() else None
+    if is_session_token(token):
+        try:
+            return verify_session_token(token).get("env") or None
+        except jwt.InvalidTokenError:
+            return None
+    if token.count(".") == 2:
+        try:
+            return "prod" if TOKEN_CACHE.get_or_verify(token, verify_microsoft_id_token) else None
+        except (jwt.InvalidTokenError, KeyError, ValueError):
+            return None
+    ident = token.split(":", 1)[1] if ":" in token else token
+    return get_env_for_caller(ident)
+
+_WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+# writes that may come from a caller without a resolvable env (logging in)
+_ENV_FREE_WRITE_PREFIXES = ("/api/auth/",)
+
+@app.before_request
+def _bind_request_env():
+    # threads are reused across requests, so always (re)bind
+    env = _caller_env(request.headers.get("Authorization", ""), request.headers.get("X-User-Email", ""))
+    set_env(env or DEFAULT_ENV)
+    # a write must land in the caller's env, never silently in the default one
+    if (env is None and request.method in _WRITE_METHODS and request.path.startswith("/api/")
+            and not request.path.startswith(_ENV_FREE_WRITE_PREFIXES)):
+        return jsonify({"message": "Cannot resolve the caller's environment; sign in again"}), 401
+    # write requests read what they modify from the primary; read-your-writes:
+    # a caller that just wrote also reads from the primary for a few seconds
+    key = pin_key(request.headers.get("Authorization", ""), request.remote_addr or "")
+    set_force_primary(request.method in _WRITE_METHODS or is_pinned(key, request.cookies.get(PIN_COOKIE)))
+
+# routes that don't touch SQL Server keep answering while the "db" breaker is open
+_BREAKER_EXEMPT_PREFIXES = ("/api/db/", "/api/events/", "/api/auth/token-cache/", "/api/jobs/")
+
+@app.before_request
+def _fail_fast_when_dependency_down():
+    path = request.path
+    if request.method == "OPTIONS" or not path.startswith("/api/") or path.startswith(_BREAKER_EXEMPT_PREFIXES):
+        return None
+    down = [b for b in (BREAKERS["db"], BREAKERS["gp_reporting"] if path == "/api/employee-search" else None)
+            if b is not None and b.is_open()]
+    if down:
+        return unavailable(f"{down[0].name} is unavailable, retry shortly", down[0].retry_after())
+    return None
+
+@app.errorhandler(CircuitOpenError)
+def _circuit_open(e):
+    return unavailable(str(e), e.retry_after)
+
+@app.after_request
+def _pin_reads_after_write(response):
+    if request.method in _WRITE_METHODS and response.status_code < 400:
+        until = note_write(pin_key(request.headers.get("Authorization", ""), request.remote_addr or ""))
+        # the cookie carries the pin to whichever worker serves the next request
+        response.set_cookie(PIN_COOKIE, f"{until:.3f}", max_age=max(1, int(READ_YOUR_WRITES_S + 0.999)),
+                            httponly=True, samesite="Lax", secure=request.is_secure)
+    return response
+
 def protected_route(f):
     @wraps(f)
     def wrapper(*args, **kwargs):
@@ -183,7 +341,20 @@ def protected_route(f):
         if not token:
             return jsonify({"message": "Missing bearer token"}), 401
 
-        user_claims = validate_and_decode_token(token) or {}
+        # Our own session token: role/env/permissions come from the verified claims
+        if is_session_token(token):
+            try:
+                claims = verify_session_token(token)
+            except jwt.InvalidTokenError as e:
+                return jsonify({"message": f"Invalid or expired token: {e}"}), 401
+            g.user_claims = {**claims, "auth": "session"}
+            return f(*args, **kwargs)
+
+        # Microsoft ID token: RS256 against the tenant JWKS; an open "jwks" breaker answers 503
+        try:
+            user_claims = TOKEN_CACHE.get_or_verify(token, verify_microsoft_id_token) or {}
+        except (jwt.InvalidTokenError, KeyError, ValueError) as e:
+            return jsonify({"message": f"Invalid or expired token: {e}"}), 401
         if not user_claims:
             return jsonify({"message": "Invalid or expired token"}), 401
 
@@ -191,24 +362,23 @@ def protected_route(f):
         return f(*args, **kwargs)
     return wrapper
 
+register_task_queue_routes(app, protected_route)
+register_change_event_routes(app, protected_route)
+
 def _now():
     import datetime as dt
     return dt.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
 
 # -------- 1) VERIFY TOKEN (Microsoft SSO) ----------
-_JWKS_CACHE = {"ts": 0, "data": None}
-
-def _jwks():
-    if not _JWKS_CACHE["data"] or (time.time() - _JWKS_CACHE["ts"] > 3600):
-        _JWKS_CACHE["data"] = requests.get("https://login.microsoftonline.com/3f55f1df-18ff-4c55-baac-79c960fb03e6/discovery/v2.0/keys", timeout=5).json()
-        _JWKS_CACHE["ts"] = time.time()
-    return _JWKS_CACHE["data"]
+# Keys are parsed once per kid and refreshed in the background (see jwks_cache.py).
+# MS_JWKS_FILE points at a local JWKS json for offline tests.
+MS_JWKS_URL = "https://login.microsoftonline.com/3f55f1df-18ff-4c55-baac-79c960fb03e6/discovery/v2.0/keys"
+_MS_KEYS = JwksKeyStore(url=MS_JWKS_URL, local_path=os.getenv("MS_JWKS_FILE") or None, breaker=BREAKERS["jwks"])
 
 def verify_microsoft_id_token(id_token: str) -> dict:
     # pick the signing key
     hdr = jwt.get_unverified_header(id_token)
-    key = next(k for k in _jwks()["keys"] if k["kid"] == hdr["kid"])
-    pub = jwt.algorithms.RSAAlgorithm.from_jwk(key)
+    pub = _MS_KEYS.get_key(hdr["kid"])
 
     # verify signature + audience
     claims = jwt.decode(
@@ -241,7 +411,7 @@ def create_or_update_user_from_claims(claims: dict, env: str) -> dict:
     if not prof:
         now_iso = datetime.utcnow().isoformat()
         # seed a minimal row in the audit table
-        ok = insert_profile(
+        prof = insert_profile_returning(
             display_name=name,
             email=email,
             role="simple",
@@ -253,9 +423,8 @@ def create_or_update_user_from_claims(claims: dict, env: str) -> dict:
             # role_id=None,
             env=env,
         )
-        if not ok:
+        if not prof:
             raise RuntimeError("failed to insert initial profile")
-        prof = get_profile_by_email(email) or {}
 
     # normalize return
     return {
@@ -270,11 +439,71 @@ def create_or_update_user_from_claims(claims: dict, env: str) -> dict:
         "editTime":      prof.get("editTime") or prof.get("edit_time"),
     }
 
+@app.route("/api/auth/token-cache/stats", methods=["GET"])
+@protected_route
+def token_cache_stats():
+    return jsonify({"id_token": TOKEN_CACHE.stats(), "api_token": API_TOKEN_CACHE.stats()}), 200
+
+@app.route("/api/db/statement-stats", methods=["GET"])
+@protected_route
+def statement_cache_stats():
+    return jsonify(STATEMENTS.stats()), 200
+
+@app.route("/api/db/routing-stats", methods=["GET"])
+@protected_route
+def db_routing_stats():
+    return jsonify(routing_stats()), 200
+
+@app.route("/api/db/resilience-stats", methods=["GET"])
+@protected_route
+def db_resilience_stats():
+    return jsonify(resilience_stats()), 200
+
+@app.route("/api/cache/stats", methods=["GET"])
+@protected_route
+def shared_cache_stats():
+    return jsonify(cache_stats()), 200
+
+def _caller_role() -> str:
+    """Role of the protected_route caller: from a session token's claims, else their profile."""
+    claims = getattr(g, "user_claims", None) or {}
+    if claims.get("auth") == "session":
+        return (claims.get("role") or "").lower()
+    if claims.get("auth") == "dev-demo":
+        prof = get_profile_by_id(claims.get("oid")) if claims.get("oid") else None
+    else:
+        email = (claims.get("preferred_username") or claims.get("email") or "").lower()
+        prof = get_profile_by_email(email) if email else None
+    return ((prof or {}).get("role") or "").lower()
+
+def _caller_can(permission: str) -> bool:
+    return permission in ROLE_PERMISSIONS.get(_caller_role(), ())
+
+def _forbidden(permission: str):
+    return jsonify({"error": "forbidden", "need": permission}), 403
+
+@app.route("/api/cache/invalidate", methods=["POST"])
+@protected_route
+def shared_cache_invalidate():
+    """
+    Body: {"cache": "task_categories"} drops a whole cache on every worker,
+    e.g. after MR_OnBoardCategory is edited outside the app; "key" drops one entry.
+    Admin/HR only (roles:edit): a flood of invalidations would defeat every cache.
+    """
+    if not _caller_can(PERMISSIONS["ROLE_EDIT"]):
+        return _forbidden(PERMISSIONS["ROLE_EDIT"])
+    data = request.get_json(silent=True) or {}
+    name = data.get("cache")
+    if name not in CACHES:
+        return jsonify({"error": "unknown cache", "allowed": sorted(CACHES)}), 400
+    CACHES[name].invalidate(data.get("key") or None)
+    return jsonify({"ok": True, "cache": name}), 200
+
 # ---------- ROUTE THAT COMPOSES THE TWO -------------
 @app.route("/api/auth/msal-login", methods=["POST"])
 def msal_login():
-    global env
-    env = "prod"
+    set_env("prod")
+    env = get_env()
     data = request.get_json(force=True) or {}
     id_token = data.get("idToken")
     if not id_token:
@@ -283,10 +512,54 @@ def msal_login():
     try:
         claims = verify_microsoft_id_token(id_token)
         user = create_or_update_user_from_claims(claims, env)
-        return jsonify(user=user), 200
+        return jsonify(user=user, **issue_session_tokens(user)), 200
+    except CircuitOpenError as e:
+        return unavailable(str(e), e.retry_after)
     except Exception as e:
         return jsonify(error=str(e)), 401
 
+@app.route("/api/auth/refresh", methods=["POST"])
+def refresh_session():
+    """
+    Body: { "refresh_token": "..." }
+    Re-reads the profile (so role changes are picked up), rotates the refresh token
+    and returns a fresh access token.
+    """
+    data = request.get_json(silent=True) or {}
+    token = (data.get("refresh_token") or "").strip()
+    if not token:
+        return jsonify(error="missing refresh_token"), 400
+    try:
+        claims = verify_session_token(token, typ="refresh")
+    except jwt.InvalidTokenError as e:
+        return jsonify(error=f"invalid refresh token: {e}"), 401
+
+    email = claims["sub"]
+    prof = get_profile_by_email(email, env=claims.get("env"))
+    if not prof:
+        return jsonify(error="user not found"), 401
+
+    revoke_token(claims)  # one-time use
+    user = {
+        "role_id":      prof.get("role_id"),
+        "display_name": prof.get("display_name"),
+        "email":        email,
+        "role":         (prof.get("role") or "simple").lower(),
+        "env":          claims.get("env") or prof.get("env"),
+        "status":       prof.get("status"),
+    }
+    return jsonify(user=user, **issue_session_tokens(user)), 200
+
+@app.route("/api/auth/logout", methods=["POST"])
+def logout_session():
+    """Body: { "refresh_token": "..." } -> revoke it so it can no longer mint access tokens."""
+    data = request.get_json(silent=True) or {}
+    try:
+        revoke_token(verify_session_token((data.get("refresh_token") or "").strip(), typ="refresh"))
+    except jwt.InvalidTokenError:
+        pass  # already invalid
+    return jsonify(ok=True), 200
+
 @app.route("/api/auth/local-login", methods=["POST"])
 def local_login():
     """
@@ -295,8 +568,8 @@ def local_login():
     Returns: { user: {...} } with id/display_name/email/role/etc.
     """
     try:
-        global env
-        env = "dev"
+        set_env("dev")
+        env = get_env()
         body = request.get_json(silent=True) or {}
         userid   = (body.get("username")).strip().lower()
         password = body.get("password") or ""
@@ -336,7 +609,7 @@ def local_login():
             "status": u.get("status"), 
             "editTime": u.get("editTime"),
         }
-        return jsonify(user=user), 200
+        return jsonify(user=user, **issue_session_tokens(user)), 200
 
     except Exception as e:
         app.logger.exception("[/api/auth/local-login] error")
@@ -344,6 +617,7 @@ def local_login():
 
 @app.route("/api/submissions/count", methods=["GET"])
 @protected_route
+@admit("counts")
 def get_submissions_count():
     try:
         # Only managers send Createdby param; HR/Admin skip it
@@ -351,6 +625,12 @@ def get_submissions_count():
         if created_by:
             created_by = created_by.strip().lower()
 
+        try:
+            return jsonify(get_submission_counts(created_by=created_by, env=get_env())), 200
+        except Exception as e:
+            # rollup table not migrated/reachable -> recompute from the raw rows
+            app.logger.warning(f"[get_submissions_count] rollup unavailable, scanning rows: {e}")
+
         onboard_data = get_onboard_all()
         if getattr(onboard_data, "empty", True):
             return jsonify({"count": 0, "today": 0, "monthly": [0]*12}), 200
@@ -398,7 +678,11 @@ def _redact(u: dict) -> dict:
 @app.route("/api/users/<role>", methods=["PUT"])
 def users_list_route(role):
     try:
-        raw = get_roles_with_role(role)
+        try:
+            fields = resolve_fields(request.args.get("fields"), PROFILE_RETURN_COLUMNS, always=("email",))
+        except ValueError as e:
+            return jsonify({"error": str(e), "allowed": PROFILE_RETURN_COLUMNS}), 400
+        raw = get_roles_with_role(role, columns=fields, include_archived=_arg_flag("include_archived"))
         data = list(raw.values()) if isinstance(raw, dict) else raw
         return jsonify([_redact(u) for u in data]), 200
     except Exception as e:
@@ -430,12 +714,23 @@ def edit_user_role():
         ).lower()
 
         # ✅ Resolve profile correctly for each mode
-        if editor_auth == "dev-demo":
-            editor_profile = get_profile_by_id(editor_oid) if editor_oid else {}
-        elif editor_email:
-            editor_profile = get_profile_by_email(editor_email)
-        else:
-            editor_profile = {}
+        def _load_editor():
+            if editor_auth == "session":
+                return {"role": claims.get("role")}  # already verified, no DB read
+            if editor_auth == "dev-demo":
+                return get_profile_by_id(editor_oid) if editor_oid else {}
+            if editor_email:
+                return get_profile_by_email(editor_email)
+            return {}
+
+        # editor + target lookups are independent -> run them concurrently
+        editor_profile, target_profile = run_parallel(
+            _load_editor,
+            lambda: get_profile_by_email(target_email),
+        )
+        editor_profile = editor_profile or {}
+        if not target_profile:
+            return jsonify({"error": f"User {target_email} not found"}), 404
 
         editor_role = (editor_profile.get("role") or "").lower()
 
@@ -456,6 +751,7 @@ def edit_user_role():
 
         success = update_role_only(email=target_email, new_role=new_role)
         if success:
+            bump_user_epoch(target_email)  # outstanding tokens carry the old role
             return jsonify({"message": "Role updated successfully"}), 200
         else:
             return jsonify({"error": "Failed to update role"}), 500
@@ -479,6 +775,7 @@ def update_user_profile_by_email():
 
         claims    = getattr(g, "user_claims", {}) if hasattr(g, "user_claims") else {}
         edited_by = body.get("edited_by") or claims.get("name") or claims.get("preferred_username") or email
+        env       = get_env()
         env_val   = body.get("env") or env
 
         # Use provided timestamps or fallback to now
@@ -505,6 +802,7 @@ def update_user_profile_by_email():
             )
             if not ok:
                 return jsonify(error="failed to persist profile"), 500
+            bump_user_epoch(email)
         
         prof = get_profile_by_email(email) or {}
     
@@ -526,40 +824,10 @@ def update_user_profile_by_email():
         return jsonify(error="internal server error"), 500
 
 
-# In a real app, use a library like python-jose or PyJWT with cryptographic checks.
-def validate_and_decode_token(token):
-    """
-    Validates the token's signature, expiry, and claims.
-    Returns the decoded claims or None if validation fails.
-    
-    This is a conceptual placeholder. A production-ready function would:
-    1. Fetch the public key from Microsoft's keys endpoint.
-    2. Use a library like python-jose to decode and verify the token.
-    3. Handle various errors (expired token, invalid signature, etc.).
-    """
-    try:
-        # NOTE: This is for demonstration purposes ONLY. Do NOT use this in production.
-        # It assumes the token is a standard JWT and a library would do the heavy lifting.
-        # A real implementation would involve fetching jwks_uri and verifying the signature.
-        import jwt # Example library to use
-        
-        # This is a placeholder for a real validation process
-        # For example, with PyJWT, you'd do:
-        # decoded_token = jwt.decode(token, key="your-key", algorithms=["RS256"], audience="your-app-id")
-        
-        # For now, we'll just parse the payload part of the JWT
-        token_payload = token.split('.')[1]
-        decoded_payload = json.loads(token_payload) # In a real scenario, this would be base64-decoded and parsed.
-        return decoded_payload
-        
-    except Exception as e:
-        app.logger.exception(f"Token validation failed: {e}")
-        return None
-
 @app.route("/api/submissions", methods=["GET"])
 @protected_route
 def get_submissions():
-    global env
+    env = get_env()
     claims = getattr(g, "user_claims", {})
     user_id = claims.get("oid") or claims.get("sub")
     if not user_id:
@@ -567,7 +835,15 @@ def get_submissions():
 
     try:
         created_by = request.args.get("created_by")
-        onboard_data = get_onboard_all()
+        try:
+            fields = resolve_fields(request.args.get("fields"), ONBOARD_EXPORT_COLUMNS, always=("submission_id",))
+        except ValueError as e:
+            return jsonify({"error": str(e), "allowed": ONBOARD_EXPORT_COLUMNS}), 400
+        drop_creator = bool(fields and created_by and "Createdby" not in fields)
+        if drop_creator:
+            fields.append("Createdby")  # needed for the filter below, not returned
+
+        onboard_data = get_onboard_all(columns=fields)
         if getattr(onboard_data, "empty", True):
             return jsonify({"message": "No submissions found", "env": env}), 200
 
@@ -581,6 +857,8 @@ def get_submissions():
                 onboard_data = onboard_data[onboard_data[col_name].str.strip().str.lower() == created_by.strip().lower()]
             else:
                 app.logger.warning("No 'Createdby' or 'create_by' column in onboard_data")
+            if drop_creator:
+                onboard_data = onboard_data.drop(columns=["createdby"])
 
         page = int(request.args.get("page", 1))
         per_page = int(request.args.get("per_page") or request.args.get("limit") or 20)
@@ -609,49 +887,100 @@ def get_submissions():
 
 # --- GET Submission by ID ---
 @app.route('/api/submissions/<uuid:submission_id>', methods=['GET'])
+@protected_route
 def get_submission_by_id(submission_id):
     try:
         submission = get_onboard_request_by_id(submission_id)
         if submission:
-            # Convert datetime objects in the dictionary to string for JSON serialization
-            for key, value in submission.items():
-                if isinstance(value, (datetime, date)):
-                    submission[key] = value.isoformat()
-            return jsonify(submission), 200
+            return jsonify(submission), 200  # dates etc. handled by FastJSONProvider
         else:
             return jsonify({"message": f"Submission with ID {submission_id} not found"}), 404
     except Exception as e:
         app.logger.exception(f"Error in get_submission_by_id route: {e}")
         return jsonify({"error": "Internal server error"}), 500
 
+BATCH_GET_MAX = int(os.getenv("BATCH_GET_MAX", "500"))
+
+def _batch_ids(data: dict, key: str = "ids"):
+    """Validate a batch-get body ({"ids": [...]}); returns (ids, None) or (None, error response)."""
+    ids = data.get(key)
+    if not isinstance(ids, list) or not ids:
+        return None, (jsonify({"error": f"Body must be {{\"{key}\": [...]}}"}), 400)
+    if len(ids) > BATCH_GET_MAX:
+        return None, (jsonify({"error": f"Too many ids ({len(ids)} > {BATCH_GET_MAX})"}), 413)
+    return ids, None
+
+@app.route('/api/submissions/batch', methods=['POST'])
+@protected_route
+def get_submissions_batch():
+    """Body: {"ids": [submission_id, ...]} -> {"items": {id: submission}, "missing": [...]}."""
+    ids, err = _batch_ids(request.get_json(silent=True) or {})
+    if err:
+        return err
+    try:
+        wanted = [str(UUID(str(i))).lower() for i in ids]
+    except ValueError:
+        return jsonify({"error": "ids must be submission UUIDs"}), 400
+    try:
+        found = get_onboard_requests_by_ids(wanted, env=get_env())
+        return jsonify({"items": found, "missing": [i for i in dict.fromkeys(wanted) if i not in found]}), 200
+    except Exception as e:
+        app.logger.exception(f"Error in get_submissions_batch: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+
+@app.route('/api/submissions/<uuid:submission_id>/task-job', methods=['GET'])
+@protected_route
+def get_submission_task_job(submission_id):
+    """Status of the background task-generation job for a submission."""
+    job = get_job(_submission_tasks_job_key(submission_id))
+    if not job:
+        return jsonify({"message": f"No task job for submission {submission_id}"}), 404
+    return jsonify(job), 200
+
 # --- CREATE Operation ---
 # CREATE
 @app.route('/api/submissions', methods=['POST'])
+@protected_route
 def add_submission():
     request_data = request.get_json(silent=True) or {}
     if not request_data:
         return jsonify({"error": "Invalid data: Request body must be JSON"}), 400
     try:
-        new_id = insert_onboard_request(request_data)
-        return jsonify({"message": "Submission created", "id": str(new_id)}), 201
+        created = insert_onboard_request(request_data)
+        if not created or not created.get("submission_id"):
+            return jsonify({"error": "Submission was not persisted"}), 500
+        new_id = created["submission_id"]
+        try:
+            job_id = new_id if isinstance(new_id, UUID) else UUID(str(new_id))
+        except ValueError:
+            # the row is persisted; only task generation can't be keyed
+            app.logger.error(f"add_submission: insert returned a non-GUID submission_id {new_id!r}; tasks not queued")
+            job_id = None
+        if job_id is not None:
+            enqueue_submission_tasks(job_id, request_data)
+        return jsonify({"message": "Submission created", "id": str(new_id), "submission": created}), 201
     except Exception as e:
         app.logger.exception(f"Error in add_submission: {e}")
         return jsonify({"error": f"Internal server error: {e}"}), 500
 
 # UPDATE
 @app.route('/api/submissions', methods=['PUT'])
+@protected_route
 def update_submission():
     data = request.get_json(silent=True) or {}
     submission_id = data.get("submission_id")
     if not data:
         return jsonify({"error": "Invalid data: Request body must be JSON"}), 400
     try:
+        before = get_onboard_request_by_id(submission_id)
         ok = update_onboard_request(submission_id, data)
         if not ok:
             return jsonify({"error": f"Submission {submission_id} not found"}), 404
+        if _submission_tasks_changed(before, data, _get_category_map(get_env())):
+            enqueue_submission_tasks(submission_id, data)
         return jsonify({"message": f"Submission {submission_id} updated"}), 200
     except Exception as e:
-        if (env == "dev"):
+        if (get_env() == "dev"):
             return jsonify({
                 "error": str(e),         # human-readable error
                 "details": repr(e)       # Python exception repr, optional
@@ -661,22 +990,171 @@ def update_submission():
             return jsonify({"error": "Internal server error during update"}), 500
 
 
+# --- Bulk import / export ---
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "5000"))
+
+def _parse_bulk_rows(body: str, content_type: str, fmt: str) -> list:
+    """
+    Parse a bulk body as CSV (header row) or JSON lines. A JSON array is also accepted.
+    Unparseable JSON lines are kept as ValueError entries so they get a per-row result.
+    """
+    if fmt == "csv" or "text/csv" in content_type:
+        return list(csv.DictReader(io.StringIO(body)))
+
+    stripped = body.lstrip()
+    if stripped.startswith("["):
+        return json.loads(stripped)
+
+    rows = []
+    for n, line in enumerate(body.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            rows.append(json.loads(line))
+        except ValueError as e:
+            rows.append(ValueError(f"line {n}: invalid JSON ({e})"))
+    return rows
+
+@app.route('/api/submissions/bulk', methods=['POST'])
+@protected_route
+def bulk_add_submissions():
+    """
+    Body: JSON lines (default), a JSON array, or CSV (?format=csv or Content-Type: text/csv).
+    ?dry_run=1 validates only. Returns per-row results in input order.
+    """
+    fmt = (request.args.get("format") or "").lower()
+    dry_run = str(request.args.get("dry_run", "")).lower() in ("1", "true", "yes")
+    try:
+        rows = _parse_bulk_rows(request.get_data(as_text=True), (request.content_type or "").lower(), fmt)
+    except Exception as e:
+        return jsonify({"error": f"Could not parse body: {e}"}), 400
+
+    if not rows:
+        return jsonify({"error": "No rows supplied"}), 400
+    if len(rows) > BULK_MAX_ROWS:
+        return jsonify({"error": f"Too many rows ({len(rows)} > {BULK_MAX_ROWS})"}), 413
+
+    try:
+        summary = bulk_insert_onboard_requests(rows, dry_run=dry_run, on_inserted=enqueue_submission_tasks)
+        status = 200 if dry_run or summary["failed"] else 201
+        return jsonify(summary), status
+    except Exception as e:
+        app.logger.exception(f"Error in bulk_add_submissions: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+
+@app.route('/api/submissions/export', methods=['GET'])
+@protected_route
+@admit("export")
+def export_submissions():
+    """
+    Stream submissions as CSV (default) or JSON lines (?format=jsonl).
+    ?columns=a,b,c selects columns; ?created_by=<user> filters by creator.
+    Needs read:all; PayRate is left empty unless the caller also holds pay:read.
+    """
+    if not _caller_can(PERMISSIONS["READ_ALL"]):
+        return _forbidden(PERMISSIONS["READ_ALL"])
+    fmt = (request.args.get("format") or "csv").lower()
+    if fmt not in ("csv", "jsonl"):
+        return jsonify({"error": "format must be csv or jsonl"}), 400
+
+    columns = [c.strip() for c in (request.args.get("columns") or "").split(",") if c.strip()]
+    unknown = [c for c in columns if c not in ONBOARD_EXPORT_COLUMNS]
+    if unknown:
+        return jsonify({"error": f"Unknown columns: {', '.join(unknown)}"}), 400
+    columns = columns or ONBOARD_EXPORT_COLUMNS
+    # masked columns are never read, so they are never decrypted either
+    masked = set() if _caller_can(PERMISSIONS["PAY_READ"]) else {"PayRate"}
+    selected = [c for c in columns if c not in masked]
+    if not selected:
+        return _forbidden(PERMISSIONS["PAY_READ"])
+    records = (
+        {c: rec.get(c) for c in columns}
+        for rec in iter_onboard_requests(columns=selected, created_by=request.args.get("created_by"), env=get_env())
+    )
+
+    def generate_csv():
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(columns)
+        for n, rec in enumerate(records, start=1):
+            writer.writerow([rec.get(c) for c in columns])
+            if n % 200 == 0:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+        yield buf.getvalue()
+
+    def generate_jsonl():
+        for rec in records:
+            yield app.json.dumps(rec) + "\n"
+
+    stamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    if fmt == "csv":
+        body, mimetype = generate_csv(), "text/csv"
+    else:
+        body, mimetype = generate_jsonl(), "application/x-ndjson"
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="submissions-{stamp}.{fmt}"'},
+    )
+
 # --- Task-specific Endpoints (Now interacting with servertest.py's in-memory tasks_db) ---
 @app.route('/api/tasks', methods=['GET'])
+@protected_route
 def get_all_tasks():
-    """Returns all tasks currently in the in-memory database."""
-    # tasks_db is now imported from servertest.py
-    return jsonify(list_all_tasks_simple()), 200
+    """Returns all tasks for the request env; ?fields=a,b,c limits the columns."""
+    try:
+        fields = resolve_fields(request.args.get("fields"), TASK_LIST_COLUMNS, always=("task_id",))
+    except ValueError as e:
+        return jsonify({"error": str(e), "allowed": TASK_LIST_COLUMNS}), 400
+    include_archived = _arg_flag("include_archived")
+    return jsonify(list_all_tasks_simple(columns=fields, include_archived=include_archived)), 200
+
+@app.route('/api/tasks/summary', methods=['GET'])
+@protected_route
+@admit("counts")
+def get_tasks_summary():
+    """
+    Grouped task counts for the board header/charts without shipping every task.
+    ?mode=cached serves a per-env snapshot (TASK_SUMMARY_CACHE, shared by all
+    workers) up to TASK_SUMMARY_CACHE_TTL_S old; task writes invalidate it.
+    """
+    env = get_env()
+    loaded = []
+
+    def load():
+        loaded.append(True)
+        return {**get_task_summary(env=env), "as_of": datetime.utcnow().isoformat() + "Z"}
+
+    if request.args.get("mode", "live").lower() == "cached":
+        summary = TASK_SUMMARY_CACHE.get_or_load(env, load)
+    else:
+        summary = load()
+    return jsonify({**summary, "cached": not loaded}), 200
 
 @app.route('/api/tasks/<uuid:task_id>', methods=['GET'])
+@protected_route
 def get_task_by_id(task_id):
     tid = str(task_id)
-    task = find_task_by_id(tid)
+    task = find_task_by_id(tid, include_archived=_arg_flag("include_archived"))
     if task:
         return jsonify(task), 200
     return jsonify({"message": "Task not found"}), 404
 
+@app.route('/api/tasks/batch', methods=['POST'])
+@protected_route
+def get_tasks_batch():
+    """Body: {"ids": [task_id, ...]} -> {"items": {task_id: task}, "missing": [...]}."""
+    ids, err = _batch_ids(request.get_json(silent=True) or {})
+    if err:
+        return err
+    wanted = [str(i).strip() for i in ids if str(i or "").strip()]
+    found = find_tasks_by_ids(wanted, env=get_env())
+    return jsonify({"items": found, "missing": [i for i in dict.fromkeys(wanted) if i not in found]}), 200
+
 @app.route('/api/tasks/update', methods=['POST'])
+@protected_route
 def update_task_status():
     update_data = request.get_json(silent=True) or {}
     task_id = update_data.get("task_id")
@@ -690,6 +1168,34 @@ def update_task_status():
         return jsonify({"error": "Failed to update task"}), 500
     return jsonify({"message": "Task not found"}), 404
 
+BULK_TASK_UPDATE_MAX = int(os.getenv("BULK_TASK_UPDATE_MAX", "1000"))
+
+@app.route('/api/tasks/bulk-update', methods=['POST'])
+@protected_route
+def bulk_update_task_status():
+    """
+    Body: {"updates": [{"task_id": ..., "Status": ..., ...}, ...]}
+      or  {"task_ids": [...], "fields": {"Status": ...}} to apply one change to many tasks.
+    All updates run in one transaction; returns per-task results in input order.
+    Admin/HR only (roles:edit): one call can rewrite the whole board.
+    """
+    if not _caller_can(PERMISSIONS["ROLE_EDIT"]):
+        return _forbidden(PERMISSIONS["ROLE_EDIT"])
+    data = request.get_json(silent=True) or {}
+    updates = data.get("updates")
+    if updates is None and isinstance(data.get("task_ids"), list):
+        fields = data.get("fields") or {}
+        updates = [{**fields, "task_id": tid} for tid in data["task_ids"]]
+    if not isinstance(updates, list) or not updates:
+        return jsonify({"error": "Provide 'updates' or 'task_ids' + 'fields'"}), 400
+    if len(updates) > BULK_TASK_UPDATE_MAX:
+        return jsonify({"error": f"Too many updates ({len(updates)} > {BULK_TASK_UPDATE_MAX})"}), 413
+
+    summary = bulk_update_tasks(updates, env=get_env())
+    if summary.get("failed"):
+        return jsonify(summary), 500
+    return jsonify(summary), 200
+
 @app.route('/api/tasks/<uuid:task_id>', methods=['DELETE'])
 def delete_task(task_id):
     tid = str(task_id)
@@ -700,6 +1206,7 @@ def delete_task(task_id):
     return jsonify({"message": "Task not found"}), 404
 
 @app.route('/api/employee-search', methods=['GET'])
+@admit("search")
 def search_employees():
     """
     Searches for employee details using the CF_SP_Emp_Detail_Search function
@@ -716,6 +1223,14 @@ def search_employees():
             # The CF_SP_Emp_Detail_Search function is expected to handle empty strings
             employee_df = CF_SP_Emp_Detail_Search(search_term=search_term)
 
+            # the stored procedure fixes its result set, so fields= trims the payload only
+            if request.args.get("fields") and not employee_df.empty:
+                try:
+                    fields = resolve_fields(request.args.get("fields"), list(employee_df.columns))
+                except ValueError as e:
+                    return jsonify({"error": str(e), "allowed": list(employee_df.columns)}), 400
+                employee_df = employee_df[fields]
+
             if not employee_df.empty:
                 # Convert DataFrame to a list of dictionaries for JSON response
                 employees_list = employee_df.to_dict(orient='records')
@@ -724,6 +1239,8 @@ def search_employees():
             else:
                 app.logger.exception(f"No employees found for term '{search_term}'.")
                 return jsonify({"message": "No matching employees found"}), 404
+        except CircuitOpenError as e:
+            return unavailable(str(e), e.retry_after)
         except Exception as e:
             app.logger.exception(f"Error during employee search: {e}")
             return jsonify({"message": f"An error occurred during search: {str(e)}"}), 500
@@ -0,0 +1,152 @@
+# archival.py
+# -*- coding: utf-8 -*-
+"""
+Move cold rows out of the hot tables (migrations/003_archive_tables.sql):
+
+- MR_OnBoardTask: tasks in a done status (TASK_DONE_STATUSES) not touched for
+  ARCHIVE_TASKS_AFTER_DAYS
+- MR_OnBoardRoleInfo: superseded audit rows (not the latest per email+env)
+  older than ARCHIVE_PROFILES_AFTER_DAYS; the current row always stays hot
+
+Each batch is one DELETE ... OUTPUT DELETED.* INTO <archive> statement, so a
+row is moved atomically and a crash mid-run loses nothing. sp_getapplock keeps
+concurrent runners (several workers / cron) from doing the same work.
+
+    python archival.py [--dry-run]             # cron / Task Scheduler
+    ARCHIVE_INTERVAL_S=86400 -> app starts an in-process scheduler thread
+"""
+
+import os
+import time
+import datetime
+import argparse
+import threading
+import traceback
+from typing import Any, Dict, List
+
+from servertest import get_db_connection, TASK_TABLE, TASK_DONE_STATUSES, TASK_SUMMARY_CACHE
+
+TASK_ARCHIVE_TABLE    = "MR_OnBoardTask_Archive"
+PROFILE_TABLE         = "MR_OnBoardRoleInfo"
+PROFILE_ARCHIVE_TABLE = "MR_OnBoardRoleInfo_Archive"
+
+ARCHIVE_TASKS_AFTER_DAYS    = int(os.getenv("ARCHIVE_TASKS_AFTER_DAYS", "90"))
+ARCHIVE_PROFILES_AFTER_DAYS = int(os.getenv("ARCHIVE_PROFILES_AFTER_DAYS", "180"))
+ARCHIVE_BATCH_SIZE          = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+ARCHIVE_MAX_BATCHES         = int(os.getenv("ARCHIVE_MAX_BATCHES", "500"))   # per table per run
+ARCHIVE_INTERVAL_S          = float(os.getenv("ARCHIVE_INTERVAL_S", "0"))    # 0 = no in-process scheduler
+ARCHIVE_LOCK                = "onboarding_archival"
+
+def _columns(cur, table: str) -> List[str]:
+    cur.execute(
+        "SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_SCHEMA = 'dbo' AND TABLE_NAME = ? "
+        "ORDER BY ORDINAL_POSITION",
+        (table,),
+    )
+    return [r[0] for r in cur.fetchall()]
+
+def _move_batches(conn, sql: str, params: tuple, dry_run: bool, count_sql: str) -> int:
+    cur = conn.cursor()
+    if dry_run:
+        cur.execute(count_sql, params[1:])
+        return int(cur.fetchone()[0])
+    moved = 0
+    for _ in range(ARCHIVE_MAX_BATCHES):
+        cur.execute(sql, params)
+        n = cur.rowcount or 0
+        conn.commit()                 # one short transaction per batch
+        moved += max(n, 0)
+        if n < ARCHIVE_BATCH_SIZE:
+            break
+    return moved
+
+def archive_tasks(conn, now: datetime.datetime, dry_run: bool = False) -> int:
+    cur = conn.cursor()
+    cols = ", ".join(f"[{c}]" for c in _columns(cur, TASK_TABLE))
+    deleted = ", ".join(f"DELETED.[{c}]" for c in _columns(cur, TASK_TABLE))
+    marks = ", ".join("?" for _ in TASK_DONE_STATUSES)
+    where = f"Status IN ({marks}) AND TRY_CONVERT(datetime2, COALESCE(updated_at, created_at)) < ?"
+    cutoff = now - datetime.timedelta(days=ARCHIVE_TASKS_AFTER_DAYS)
+    return _move_batches(
+        conn,
+        f"DELETE TOP (?) FROM {TASK_TABLE} OUTPUT {deleted} INTO {TASK_ARCHIVE_TABLE} ({cols}) WHERE {where}",
+        (ARCHIVE_BATCH_SIZE, *TASK_DONE_STATUSES, cutoff),
+        dry_run,
+        f"SELECT COUNT(*) FROM {TASK_TABLE} WHERE {where}",
+    )
+
+def archive_profiles(conn, now: datetime.datetime, dry_run: bool = False) -> int:
+    cur = conn.cursor()
+    names = _columns(cur, PROFILE_TABLE)
+    cols = ", ".join(f"[{c}]" for c in names)
+    deleted = ", ".join(f"DELETED.[{c}]" for c in names)
+    ranked = f"""
+        WITH ranked AS (
+            SELECT *, ROW_NUMBER() OVER (PARTITION BY email, env
+                                         ORDER BY COALESCE(editTime, createdTime) DESC, ROW_ID DESC) AS rn
+            FROM {PROFILE_TABLE}
+        )
+    """
+    where = "rn > 1 AND TRY_CONVERT(datetime2, COALESCE(editTime, createdTime)) < ?"
+    cutoff = now - datetime.timedelta(days=ARCHIVE_PROFILES_AFTER_DAYS)
+    return _move_batches(
+        conn,
+        f"{ranked} DELETE TOP (?) FROM ranked OUTPUT {deleted} INTO {PROFILE_ARCHIVE_TABLE} ({cols}) WHERE {where}",
+        (ARCHIVE_BATCH_SIZE, cutoff),
+        dry_run,
+        f"{ranked} SELECT COUNT(*) FROM ranked WHERE {where}",
+    )
+
+def run_archival(dry_run: bool = False) -> Dict[str, Any]:
+    """One archival pass; returns counts (rows that would move, with dry_run)."""
+    started = time.time()
+    now = datetime.datetime.utcnow()
+    with get_db_connection(query_timeout=0) as conn:   # long batched moves
+        cur = conn.cursor()
+        cur.execute(
+            "DECLARE @r INT; EXEC @r = sp_getapplock @Resource = ?, @LockMode = 'Exclusive', "
+            "@LockOwner = 'Session', @LockTimeout = 0; SELECT @r",
+            (ARCHIVE_LOCK,),
+        )
+        if cur.fetchone()[0] < 0:
+            return {"skipped": "another archival run holds the lock"}
+        try:
+            result = {
+                "tasks": archive_tasks(conn, now, dry_run),
+                "profiles": archive_profiles(conn, now, dry_run),
+                "dry_run": dry_run,
+            }
+        finally:
+            cur.execute("EXEC sp_releaseapplock @Resource = ?, @LockOwner = 'Session'", (ARCHIVE_LOCK,))
+            conn.commit()
+    if result["tasks"] and not dry_run:
+        TASK_SUMMARY_CACHE.invalidate()   # archived tasks leave the board counts
+    result["seconds"] = round(time.time() - started, 2)
+    print(f"[archival] {result}")
+    return result
+
+_scheduler = None
+
+def start_archival_scheduler(interval_s: float = ARCHIVE_INTERVAL_S) -> None:
+    """Run run_archival every interval_s in a daemon thread (no-op when interval_s <= 0)."""
+    global _scheduler
+    if interval_s <= 0 or _scheduler is not None:
+        return
+
+    def _loop():
+        while True:
+            time.sleep(interval_s)
+            try:
+                run_archival()
+            except Exception as e:
+                print(f"[archival] run failed: {e}")
+                traceback.print_exc()
+
+    _scheduler = threading.Thread(target=_loop, name="archival", daemon=True)
+    _scheduler.start()
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Move closed tasks and superseded profile rows to archive tables.")
+    ap.add_argument("--dry-run", action="store_true", help="only count what would move")
+    args = ap.parse_args()
+    run_archival(dry_run=args.dry_run)
@@ -0,0 +1,24 @@
+# asgi.py
+# -*- coding: utf-8 -*-
+"""
+ASGI entry point:  uvicorn asgi:asgi_app --host 0.0.0.0 --port 5000
+
+One event loop accepts connections; each Flask request runs on a bounded
+thread pool (ASGI_WSGI_THREADS) and fans independent DB lookups out to
+concurrency.DB_EXECUTOR, so one process handles many concurrent I/O-bound
+requests without adding worker processes.
+Uses a2wsgi when installed (configurable pool), otherwise asgiref.
+"""
+
+import os
+
+from app import app
+
+ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "32"))
+
+try:
+    from a2wsgi import WSGIMiddleware
+    asgi_app = WSGIMiddleware(app, workers=ASGI_WSGI_THREADS)
+except ImportError:  # pragma: no cover - fallback adapter
+    from asgiref.wsgi import WsgiToAsgi
+    asgi_app = WsgiToAsgi(app)
@@ -5,6 +5,7 @@ from jwt import PyJWKClient
 from functools import wraps
 from flask import request, jsonify, g
 from app_config import Config
+from token_cache import API_TOKEN_CACHE
 
 TENANT = os.getenv("AZURE_AD_TENANT_ID")
 JWKS_URL = f"https://login.microsoftonline.com/{TENANT}/discovery/v2.0/keys"
@@ -27,7 +28,7 @@ def require_auth(required_scope: str):
                 return jsonify({"error":"missing bearer token"}), 401
             token = auth.split(" ",1)[1]
             try:
-                claims = _decode_ms_token(token)
+                claims = API_TOKEN_CACHE.get_or_verify(token, _decode_ms_token)
             except Exception as e:
                 return jsonify({"error":"invalid token","detail":str(e)}), 401
 
@@ -0,0 +1,52 @@
+# bench_json.py
+# Serialization benchmark for list-endpoint payloads: python bench_json.py [rows]
+import sys
+import json
+import time
+import uuid
+import datetime
+from decimal import Decimal
+
+import numpy as np
+
+import json_provider
+
+def make_rows(n: int) -> list:
+    now = datetime.datetime.utcnow()
+    return [
+        {
+            "submission_id": uuid.uuid4(),
+            "LegalFirstName": f"First{i}",
+            "LegalLastName": f"Last{i}",
+            "PositionTitle": "Technician",
+            "PayRate": Decimal("22.50"),
+            "Row_ID": np.int64(i),
+            "score": np.float64("nan") if i % 10 == 0 else np.float64(i / 3),
+            "IsDriver": bool(i % 2),
+            "ProjectedStartDate": now.date(),
+            "CreatedAt": now,
+            "NoteField": "note " * 20,
+        }
+        for i in range(n)
+    ]
+
+def _stdlib(rows):
+    # what jsonify effectively did before (default=str for unknown types)
+    return json.dumps(rows, default=str).encode("utf-8")
+
+def bench(fn, rows, repeat=5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    rows = make_rows(n)
+    base = bench(_stdlib, rows)
+    fast = bench(json_provider.dumps_bytes, rows)
+    print(f"rows={n} encoder={'orjson' if json_provider.orjson else 'stdlib'}")
+    print(f"  json.dumps(default=str): {base * 1000:8.1f} ms")
+    print(f"  json_provider.dumps:     {fast * 1000:8.1f} ms  ({base / fast:.1f}x)")
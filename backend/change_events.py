@@ -0,0 +1,285 @@
+# change_events.py
+# -*- coding: utf-8 -*-
+"""
+Change-event bus for tasks and submissions, exposed as Server-Sent Events.
+
+- the write helpers in servertest.py call publish() after their commit
+- every event is appended to a small shared SQLite log (same approach as
+  task_queue.py), so gunicorn workers / job processes on one host see each
+  other's writes; a poller thread per process forwards foreign events
+- local subscribers get events immediately; each has a bounded buffer and is
+  sent a "resync" event (refetch) instead of growing without limit
+- the log id doubles as the SSE id, so a reconnect with Last-Event-ID replays
+  what was missed while the log still holds it
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+import traceback
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+
+from flask import Response, request
+
+from env_context import get_env
+
+CHANGE_EVENTS_DB          = os.getenv("CHANGE_EVENTS_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "change_events.sqlite3"))
+CHANGE_EVENTS_RETENTION_S = float(os.getenv("CHANGE_EVENTS_RETENTION_S", "900"))
+CHANGE_EVENTS_POLL_S      = float(os.getenv("CHANGE_EVENTS_POLL_S", "0.5"))
+CHANGE_STREAM_BUFFER      = int(os.getenv("CHANGE_STREAM_BUFFER", "256"))
+CHANGE_STREAM_HEARTBEAT_S = float(os.getenv("CHANGE_STREAM_HEARTBEAT_S", "15"))
+# each open stream pins a request thread for its lifetime (asgi.py runs Flask on
+# ASGI_WSGI_THREADS threads), so by default streams may take a quarter of them
+CHANGE_STREAM_MAX_CLIENTS = int(os.getenv("CHANGE_STREAM_MAX_CLIENTS",
+                                          str(max(1, int(os.getenv("ASGI_WSGI_THREADS", "32")) // 4))))
+
+_ORIGIN = uuid.uuid4().hex   # this process; the poller skips its own rows
+
+# ------------------------------------------------------------------------------
+# Shared log
+# ------------------------------------------------------------------------------
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(CHANGE_EVENTS_DB, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+_init_lock = threading.Lock()
+_initialized = False
+
+def init_log() -> None:
+    global _initialized
+    with _init_lock:
+        if _initialized:
+            return
+        with _connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS events (
+                    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+                    origin     TEXT NOT NULL,
+                    body       TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_events_created ON events(created_at)")
+        _initialized = True
+
+def _read_since(last_id: int, limit: int = 1000) -> List[sqlite3.Row]:
+    with _connect() as conn:
+        return conn.execute(
+            "SELECT id, origin, body FROM events WHERE id > ? ORDER BY id LIMIT ?", (last_id, limit)
+        ).fetchall()
+
+def _decode(row: sqlite3.Row) -> Dict[str, Any]:
+    return {**json.loads(row["body"]), "id": row["id"]}
+
+# ------------------------------------------------------------------------------
+# Subscribers
+# ------------------------------------------------------------------------------
+class Subscriber:
+    def __init__(self, env: Optional[str], assignee: Optional[str], submission_id: Optional[str],
+                 kinds: Optional[set], maxlen: int = CHANGE_STREAM_BUFFER):
+        self.env = env
+        self.assignee = (assignee or "").strip().lower() or None
+        self.submission_id = (submission_id or "").strip().lower() or None
+        self.kinds = kinds
+        self.maxlen = maxlen
+        self.buffer: deque = deque()
+        self.overflowed = False
+        self.cond = threading.Condition()
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        if self.kinds and event.get("kind") not in self.kinds:
+            return False
+        if self.env and event.get("env") and event["env"] != self.env:
+            return False
+        if self.submission_id and str(event.get("submission_id") or "").lower() != self.submission_id:
+            return False
+        if self.assignee and event.get("kind") == "task":
+            return str(event.get("assignee") or "").strip().lower() == self.assignee
+        return True
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        if not self.matches(event):
+            return
+        with self.cond:
+            if len(self.buffer) >= self.maxlen:
+                # slow client: drop what's queued and tell it to refetch
+                self.buffer.clear()
+                self.overflowed = True
+            else:
+                self.buffer.append(event)
+            self.cond.notify()
+
+    def drain(self, timeout: float) -> List[Dict[str, Any]]:
+        with self.cond:
+            if not self.buffer and not self.overflowed:
+                self.cond.wait(timeout)
+            out = list(self.buffer)
+            self.buffer.clear()
+            if self.overflowed:
+                self.overflowed = False
+                out = [{"kind": "stream", "action": "resync", "ts": time.time()}]
+            return out
+
+_subscribers: set = set()
+_subs_lock = threading.Lock()
+
+def _fanout(event: Dict[str, Any]) -> None:
+    with _subs_lock:
+        subs = list(_subscribers)
+    for s in subs:
+        s.offer(event)
+
+# ------------------------------------------------------------------------------
+# Cross-process poller
+# ------------------------------------------------------------------------------
+_poller: Optional[threading.Thread] = None
+_poller_lock = threading.Lock()
+_last_seen = 0
+
+def _poll_loop() -> None:
+    global _last_seen
+    last_prune = 0.0
+    while True:
+        try:
+            for row in _read_since(_last_seen):
+                _last_seen = row["id"]
+                if row["origin"] != _ORIGIN:
+                    _fanout(_decode(row))
+            now = time.time()
+            if now - last_prune > 60:
+                with _connect() as conn:
+                    conn.execute("DELETE FROM events WHERE created_at < ?", (now - CHANGE_EVENTS_RETENTION_S,))
+                last_prune = now
+        except Exception as e:
+            print(f"[change_events] poll failed: {e}")
+        time.sleep(CHANGE_EVENTS_POLL_S)
+
+def _ensure_poller() -> None:
+    global _poller, _last_seen
+    with _poller_lock:
+        if _poller is not None:
+            return
+        init_log()
+        with _connect() as conn:
+            _last_seen = conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+        _poller = threading.Thread(target=_poll_loop, name="change-events", daemon=True)
+        _poller.start()
+
+# ------------------------------------------------------------------------------
+# Publish
+# ------------------------------------------------------------------------------
+def _event(kind: str, action: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+    ev = {"kind": kind, "action": action, "env": get_env(), "ts": time.time()}
+    for k, v in fields.items():
+        ev[k] = None if v is None else str(v) if not isinstance(v, (int, float, bool)) else v
+    return ev
+
+def publish_many(kind: str, action: str, items: Iterable[Dict[str, Any]]) -> int:
+    """
+    Record and fan out change events. Never raises: a failed publish only
+    means subscribers refetch later, it must not fail the write that caused it.
+    """
+    try:
+        events = [_event(kind, action, f) for f in items]
+        if not events:
+            return 0
+        init_log()
+        now = time.time()
+        conn = _connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for ev in events:
+                cur = conn.execute(
+                    "INSERT INTO events (origin, body, created_at) VALUES (?, ?, ?)",
+                    (_ORIGIN, json.dumps(ev, default=str), now),
+                )
+                ev["id"] = cur.lastrowid
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        for ev in events:
+            _fanout(ev)
+        return len(events)
+    except Exception as e:
+        print(f"[change_events] publish {kind}/{action} failed: {e}")
+        traceback.print_exc()
+        return 0
+
+def publish(kind: str, action: str, **fields: Any) -> int:
+    return publish_many(kind, action, [fields])
+
+# ------------------------------------------------------------------------------
+# SSE
+# ------------------------------------------------------------------------------
+def _sse(event: Dict[str, Any]) -> str:
+    head = f"id: {event['id']}\n" if event.get("id") is not None else ""
+    return f"{head}event: {event['kind']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+def stream(sub: Subscriber, last_event_id: Optional[int] = None) -> Iterable[str]:
+    try:
+        yield "retry: 3000\n: connected\n\n"
+        if last_event_id is not None:
+            for row in _read_since(last_event_id):
+                ev = _decode(row)
+                if sub.matches(ev):
+                    yield _sse(ev)
+        while True:
+            events = sub.drain(CHANGE_STREAM_HEARTBEAT_S)
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            for ev in events:
+                yield _sse(ev)
+    finally:
+        with _subs_lock:
+            _subscribers.discard(sub)
+
+def register_change_event_routes(app, auth):
+    """`auth` is the route decorator that authenticates the caller (app.protected_route)."""
+
+    @app.get("/api/events/stream")
+    @auth
+    def change_event_stream():
+        """
+        SSE feed for the caller's env (resolved from their credentials; an
+        `env` query param can't widen it). Query: assignee, submission_id,
+        kinds=task,submission. Honors Last-Event-ID.
+        """
+        _ensure_poller()
+        with _subs_lock:
+            if len(_subscribers) >= CHANGE_STREAM_MAX_CLIENTS:
+                return Response("too many event stream clients\n", status=503,
+                                headers={"Retry-After": "10"}, mimetype="text/plain")
+
+        kinds = {k.strip() for k in (request.args.get("kinds") or "").split(",") if k.strip()} or None
+        sub = Subscriber(
+            env=get_env(),
+            assignee=request.args.get("assignee"),
+            submission_id=request.args.get("submission_id"),
+            kinds=kinds,
+        )
+        last = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+        try:
+            last_id = int(last) if last else None
+        except ValueError:
+            last_id = None
+
+        with _subs_lock:
+            _subscribers.add(sub)
+        return Response(
+            stream(sub, last_id),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
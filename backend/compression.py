@@ -0,0 +1,160 @@
+# compression.py
+# -*- coding: utf-8 -*-
+"""
+Response compression + precompressed static assets.
+
+- init_compression(app): negotiated br/gzip for responses above
+  COMPRESS_MIN_BYTES; streamed responses go through an incremental compressor
+  that flushes per chunk (exports, SSE keep flowing)
+- register_frontend_routes(app, build_dir): serves the React build, preferring
+  the .br/.gz siblings written by precompress_assets.py; hashed files under
+  /static get long-lived immutable cache headers, index.html is revalidated
+"""
+
+import os
+import gzip
+import zlib
+import mimetypes
+from typing import Iterable, Optional
+
+from flask import request, send_from_directory, abort
+
+try:
+    import brotli  # optional
+except ImportError:  # pragma: no cover - gzip only
+    brotli = None
+
+COMPRESS_MIN_BYTES   = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_GZIP_LEVEL  = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESS_BR_QUALITY  = int(os.getenv("COMPRESS_BR_QUALITY", "5"))   # dynamic; static uses 11
+COMPRESSIBLE_TYPES = {
+    "application/json", "application/x-ndjson", "application/javascript",
+    "application/xml", "image/svg+xml", "text/csv", "text/event-stream",
+}
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+# ------------------------------------------------------------------------------
+# Negotiation
+# ------------------------------------------------------------------------------
+def _accepted_encodings(header: str) -> dict:
+    out = {}
+    for part in (header or "").split(","):
+        bits = [b.strip() for b in part.split(";")]
+        if not bits[0]:
+            continue
+        q = 1.0
+        for b in bits[1:]:
+            if b.startswith("q="):
+                try:
+                    q = float(b[2:])
+                except ValueError:
+                    q = 0.0
+        out[bits[0].lower()] = q
+    return out
+
+def choose_encoding(header: str, available=("br", "gzip")) -> Optional[str]:
+    acc = _accepted_encodings(header)
+    for enc in available:
+        if enc == "br" and brotli is None:
+            continue
+        if acc.get(enc, acc.get("*", 0)) > 0:
+            return enc
+    return None
+
+def _is_compressible(mimetype: Optional[str]) -> bool:
+    if not mimetype:
+        return False
+    return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_TYPES
+
+# ------------------------------------------------------------------------------
+# Dynamic responses
+# ------------------------------------------------------------------------------
+def _compress_stream(chunks: Iterable, encoding: str) -> Iterable[bytes]:
+    if encoding == "br":
+        comp = brotli.Compressor(quality=COMPRESS_BR_QUALITY)
+        for chunk in chunks:
+            data = chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+            out = comp.process(data) + comp.flush()
+            if out:
+                yield out
+        yield comp.finish()
+    else:
+        comp = zlib.compressobj(COMPRESS_GZIP_LEVEL, zlib.DEFLATED, 31)  # 31 -> gzip container
+        for chunk in chunks:
+            data = chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+            out = comp.compress(data) + comp.flush(zlib.Z_SYNC_FLUSH)
+            if out:
+                yield out
+        yield comp.flush()
+
+def _compress_bytes(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=COMPRESS_BR_QUALITY)
+    return gzip.compress(data, compresslevel=COMPRESS_GZIP_LEVEL)
+
+def init_compression(app, min_bytes: int = COMPRESS_MIN_BYTES) -> None:
+
+    @app.after_request
+    def _compress_response(response):
+        if (
+            response.status_code < 200
+            or response.status_code in (204, 304)
+            or "Content-Encoding" in response.headers
+            or response.direct_passthrough          # send_file / precompressed assets
+            or not _is_compressible(response.mimetype)
+        ):
+            return response
+
+        encoding = choose_encoding(request.headers.get("Accept-Encoding", ""))
+        if not encoding:
+            return response
+
+        if response.is_streamed:
+            response.response = _compress_stream(response.response, encoding)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < min_bytes:
+                return response
+            response.set_data(_compress_bytes(data, encoding))
+
+        response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        return response
+
+# ------------------------------------------------------------------------------
+# Static frontend build
+# ------------------------------------------------------------------------------
+def register_frontend_routes(app, build_dir: str) -> None:
+    """Serve a React build (SPA fallback to index.html) with precompressed variants."""
+    build_dir = os.path.abspath(build_dir)
+
+    def _serve(rel_path: str):
+        full = os.path.join(build_dir, rel_path)
+        mimetype = mimetypes.guess_type(rel_path)[0] or "application/octet-stream"
+        available = tuple(e for e, ext in (("br", ".br"), ("gzip", ".gz")) if os.path.isfile(full + ext))
+        encoding = choose_encoding(request.headers.get("Accept-Encoding", ""), available) if available else None
+
+        if encoding:
+            resp = send_from_directory(build_dir, rel_path + (".br" if encoding == "br" else ".gz"), mimetype=mimetype)
+            resp.headers["Content-Encoding"] = encoding
+        else:
+            resp = send_from_directory(build_dir, rel_path, mimetype=mimetype)
+        resp.vary.add("Accept-Encoding")
+
+        if rel_path.startswith("static/"):
+            resp.headers["Cache-Control"] = IMMUTABLE_CACHE  # CRA fingerprints these file names
+        else:
+            resp.headers["Cache-Control"] = "no-cache"
+        return resp
+
+    @app.route("/", defaults={"path": ""})
+    @app.route("/<path:path>")
+    def frontend(path: str):
+        if path.startswith("api/"):
+            abort(404)
+        if path and os.path.isfile(os.path.join(build_dir, path)):
+            return _serve(path)
+        if path.startswith("static/"):
+            abort(404)  # missing hashed asset: don't hand back index.html
+        return _serve("index.html")
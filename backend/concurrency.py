@@ -0,0 +1,46 @@
+# concurrency.py
+# -*- coding: utf-8 -*-
+"""
+Managed thread pool for blocking DB / HTTP calls.
+
+pyodbc and requests release the GIL while waiting on the network, so
+independent lookups inside one request can overlap on this pool, and the
+ASGI entry point (asgi.py) can await them without blocking the event loop.
+Do not call run_parallel() from inside a DB_EXECUTOR thread (no nesting).
+"""
+
+import os
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "16"))
+DB_EXECUTOR  = ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix="db")
+
+def _submit(fn: Callable[[], Any]):
+    # copy contextvars so request-scoped state follows the call into the pool
+    ctx = contextvars.copy_context()
+    return DB_EXECUTOR.submit(ctx.run, fn)
+
+def run_parallel(*calls: Callable[[], Any]) -> List[Any]:
+    """
+    Run independent zero-arg callables concurrently and return their results in
+    order. The first call runs inline on the current thread; exceptions propagate.
+    """
+    if len(calls) <= 1:
+        return [c() for c in calls]
+    futures = [_submit(c) for c in calls[1:]]
+    first = calls[0]()
+    return [first] + [f.result() for f in futures]
+
+async def run_db(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Await a blocking call on DB_EXECUTOR (for async views / ASGI handlers)."""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(DB_EXECUTOR, functools.partial(ctx.run, fn, *args, **kwargs))
+
+async def gather_db(*calls: Callable[[], Any]) -> List[Any]:
+    """Async counterpart of run_parallel()."""
+    return list(await asyncio.gather(*(run_db(c) for c in calls)))
@@ -0,0 +1,191 @@
+# db_routing.py
+# -*- coding: utf-8 -*-
+"""
+Read-replica routing for the read-only helpers in servertest.py.
+
+- configure a replica with serverGFTReplica (+ optional databaseGFTSharePointReplica),
+  or REPLICA_READ_INTENT=1 to reuse the primary listener with
+  ApplicationIntent=ReadOnly (AG read-only routing)
+- each connection string gets its own pyodbc/ODBC driver-manager pool
+- read-your-writes: after a successful write request the caller is pinned to
+  the primary for READ_YOUR_WRITES_S (per-process map + a short-lived cookie,
+  so the pin holds whichever worker serves the next request)
+- the replica is skipped while it is failing (REPLICA_RETRY_S back-off) or its
+  reported lag exceeds REPLICA_MAX_LAG_S; reads then fall back to the primary
+"""
+
+import os
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+
+import pyodbc
+
+from resilience import DB_CONNECT_TIMEOUT_S, DB_QUERY_TIMEOUT_S
+
+REPLICA_SERVER      = os.environ.get("serverGFTReplica")
+REPLICA_DATABASE    = os.environ.get("databaseGFTSharePointReplica") or os.environ.get("databaseGFTSharePoint")
+REPLICA_READ_INTENT = os.getenv("REPLICA_READ_INTENT", "0") == "1"
+REPLICA_MAX_LAG_S   = float(os.getenv("REPLICA_MAX_LAG_S", "10"))
+REPLICA_RETRY_S     = float(os.getenv("REPLICA_RETRY_S", "30"))
+REPLICA_HEALTH_TTL_S = float(os.getenv("REPLICA_HEALTH_TTL_S", "15"))
+READ_YOUR_WRITES_S  = float(os.getenv("READ_YOUR_WRITES_S", "5"))
+PIN_COOKIE          = "read_primary_until"
+
+# lag of the local secondary as the replica itself reports it (NULL/absent on a non-AG copy)
+_LAG_SQL = """
+SELECT MAX(DATEDIFF(SECOND, last_commit_time, SYSDATETIME()))
+FROM sys.dm_hadr_database_replica_states
+WHERE is_local = 1 AND is_primary_replica = 0
+"""
+
+_force_primary: ContextVar[bool] = ContextVar("force_primary", default=False)
+
+def replica_configured() -> bool:
+    return bool(REPLICA_SERVER) or REPLICA_READ_INTENT
+
+def _replica_conn_str() -> str:
+    server = REPLICA_SERVER or os.environ.get("serverGFT")
+    conn_str = (
+        f"DRIVER={os.environ.get('addressGFT')};SERVER={server};DATABASE={REPLICA_DATABASE};"
+        f"UID={os.environ.get('usernameSharePointGFT')};PWD={os.environ.get('passwordSharePointGFT')};"
+        f"TrustServerCertificate=yes;"
+    )
+    if REPLICA_READ_INTENT:
+        conn_str += "ApplicationIntent=ReadOnly;"
+    return conn_str
+
+# ------------------------------------------------------------------------------
+# Read-your-writes pins
+# ------------------------------------------------------------------------------
+_pins: Dict[str, float] = {}
+_pins_lock = threading.Lock()
+
+def pin_key(authorization: str, fallback: str = "") -> str:
+    raw = authorization or fallback
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] if raw else ""
+
+def note_write(key: str) -> float:
+    """Pin `key` to the primary for READ_YOUR_WRITES_S; returns the pin expiry (epoch seconds)."""
+    until = time.time() + READ_YOUR_WRITES_S
+    if key:
+        with _pins_lock:
+            _pins[key] = until
+            if len(_pins) > 10000:
+                now = time.time()
+                for k in [k for k, t in _pins.items() if t <= now]:
+                    del _pins[k]
+    return until
+
+def is_pinned(key: str, cookie_until: Optional[str] = None) -> bool:
+    now = time.time()
+    try:
+        if cookie_until and float(cookie_until) > now:
+            return True
+    except ValueError:
+        pass
+    with _pins_lock:
+        return _pins.get(key, 0) > now
+
+def set_force_primary(value: bool):
+    return _force_primary.set(bool(value))
+
+@contextmanager
+def primary_reads():
+    """Route every read in the block to the primary (e.g. read-modify-write sequences)."""
+    token = _force_primary.set(True)
+    try:
+        yield
+    finally:
+        _force_primary.reset(token)
+
+# ------------------------------------------------------------------------------
+# Replica health
+# ------------------------------------------------------------------------------
+class _ReplicaState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.down_until = 0.0
+        self.lag_s: Optional[float] = None
+        self.lag_checked_at = 0.0
+        self.last_error: Optional[str] = None
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.fallbacks = 0
+
+    def usable(self) -> bool:
+        with self.lock:
+            if time.time() < self.down_until:
+                return False
+            return self.lag_s is None or self.lag_s <= REPLICA_MAX_LAG_S
+
+    def mark_down(self, err: Exception) -> None:
+        with self.lock:
+            self.down_until = time.time() + REPLICA_RETRY_S
+            self.last_error = f"{type(err).__name__}: {err}"
+            self.fallbacks += 1
+
+    def lag_due(self) -> bool:
+        with self.lock:
+            if time.time() - self.lag_checked_at < REPLICA_HEALTH_TTL_S:
+                return False
+            self.lag_checked_at = time.time()   # one checker per TTL window
+            return True
+
+_state = _ReplicaState()
+
+def _check_lag(conn: pyodbc.Connection) -> None:
+    try:
+        row = conn.cursor().execute(_LAG_SQL).fetchone()
+        lag = float(row[0]) if row and row[0] is not None else None
+    except pyodbc.Error:
+        lag = None   # no VIEW SERVER STATE / not an AG secondary: nothing to compare
+    with _state.lock:
+        _state.lag_s = lag
+
+def read_connection(primary_connect: Callable[[], pyodbc.Connection]) -> pyodbc.Connection:
+    """Replica connection when configured, healthy and the caller isn't pinned; else the primary."""
+    if not replica_configured() or _force_primary.get() or not _state.usable():
+        with _state.lock:
+            _state.primary_reads += 1
+        return primary_connect()
+    try:
+        conn = pyodbc.connect(_replica_conn_str(), timeout=DB_CONNECT_TIMEOUT_S)
+        conn.timeout = DB_QUERY_TIMEOUT_S
+        if _state.lag_due():
+            _check_lag(conn)
+            if not _state.usable():
+                conn.close()
+                with _state.lock:
+                    _state.primary_reads += 1
+                    _state.fallbacks += 1
+                return primary_connect()
+        with _state.lock:
+            _state.replica_reads += 1
+        return conn
+    except pyodbc.Error as e:
+        print(f"[db_routing] replica unavailable, using primary: {e}")
+        _state.mark_down(e)
+        with _state.lock:
+            _state.primary_reads += 1
+        return primary_connect()
+
+def routing_stats() -> Dict[str, Any]:
+    now = time.time()
+    with _pins_lock:
+        pinned = sum(1 for t in _pins.values() if t > now)
+    with _state.lock:
+        return {
+            "replica_configured": replica_configured(),
+            "replica_reads": _state.replica_reads,
+            "primary_reads": _state.primary_reads,
+            "fallbacks": _state.fallbacks,
+            "replica_down_for_s": max(0.0, round(_state.down_until - now, 1)),
+            "replica_lag_s": _state.lag_s,
+            "max_lag_s": REPLICA_MAX_LAG_S,
+            "last_error": _state.last_error,
+            "pinned_callers": pinned,
+        }
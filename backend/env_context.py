@@ -0,0 +1,36 @@
+# env_context.py
+# -*- coding: utf-8 -*-
+"""
+Request-scoped environment ("dev" / "prod").
+
+Replaces the old mutable module-level `env` globals in app.py/servertest.py,
+which leaked between concurrent requests. The value lives in a ContextVar,
+so each request/thread/task sees its own env (concurrency.run_parallel copies
+it into pool threads).
+"""
+
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+
+DEFAULT_ENV = os.getenv("APP_ENV", "dev")
+
+_current_env: ContextVar[str] = ContextVar("current_env", default=DEFAULT_ENV)
+
+def get_env() -> str:
+    return _current_env.get()
+
+def set_env(value: str) -> Token:
+    return _current_env.set((value or DEFAULT_ENV).strip().lower())
+
+def reset_env(token: Token) -> None:
+    _current_env.reset(token)
+
+@contextmanager
+def env_scope(value: str):
+    """Run a block (e.g. a background job) under a specific env."""
+    token = set_env(value)
+    try:
+        yield
+    finally:
+        reset_env(token)
@@ -0,0 +1,96 @@
+# json_provider.py
+# -*- coding: utf-8 -*-
+"""
+Flask JSON provider for DB/DataFrame payloads.
+
+Uses orjson when installed (falls back to stdlib json) and natively handles
+datetime/date/time, Decimal, UUID, numpy/pandas scalars and NaN/NaT (-> null),
+so routes can jsonify to_dict() output directly. Datetimes are ISO 8601 with an
+offset; naive ones (what pyodbc returns) are UTC and get a "Z", as Flask's
+default HTTP-date output ("... GMT") implied. Install: `app.json = FastJSONProvider(app)`.
+"""
+
+import json
+import math
+import uuid
+import datetime
+from decimal import Decimal
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib fallback
+    orjson = None
+
+_ORJSON_OPTS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z) if orjson else 0
+
+
+def _default(o: Any) -> Any:
+    if o is None or o is pd.NaT:
+        return None
+    if isinstance(o, datetime.datetime):
+        if o.tzinfo is None:
+            return o.isoformat() + "Z"
+        return o.isoformat().replace("+00:00", "Z")
+    if isinstance(o, (datetime.date, datetime.time)):
+        return o.isoformat()
+    if isinstance(o, Decimal):
+        return None if o.is_nan() else float(o)
+    if isinstance(o, uuid.UUID):
+        return str(o)
+    if isinstance(o, np.integer):
+        return int(o)
+    if isinstance(o, np.floating):
+        f = float(o)
+        return None if math.isnan(f) or math.isinf(f) else f
+    if isinstance(o, np.bool_):
+        return bool(o)
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+    if isinstance(o, (bytes, bytearray)):
+        return o.decode("utf-8", errors="replace")
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+def _strip_nan(o: Any) -> Any:
+    """stdlib json writes NaN/Infinity (invalid JSON); orjson already writes null."""
+    if isinstance(o, float):
+        return None if math.isnan(o) or math.isinf(o) else o
+    if isinstance(o, dict):
+        return {k: _strip_nan(v) for k, v in o.items()}
+    if isinstance(o, (list, tuple)):
+        return [_strip_nan(v) for v in o]
+    return o
+
+def dumps_bytes(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTS)
+    return json.dumps(_strip_nan(obj), default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def dumps(obj: Any) -> str:
+    return dumps_bytes(obj).decode("utf-8")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is not None and not kwargs:
+            return dumps(obj)
+        # formatting options (indent, sort_keys...) -> stdlib path
+        kwargs.setdefault("default", _default)
+        kwargs.setdefault("ensure_ascii", False)
+        return json.dumps(_strip_nan(obj), **kwargs)
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        # encode straight to bytes (skips the str round trip and Flask's debug pretty-printing)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
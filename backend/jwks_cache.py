@@ -0,0 +1,118 @@
+# jwks_cache.py
+# -*- coding: utf-8 -*-
+"""
+kid-indexed JWKS key store.
+
+- RSA keys are parsed once (RSAAlgorithm.from_jwk) into {kid: public_key}
+- a daemon thread refreshes the set before it expires, so logins never wait
+  on the JWKS endpoint in the steady state
+- an unknown kid triggers one refetch shared by all concurrent callers
+  (single-flight), rate-limited by min_refetch_interval
+- `local_path` loads keys from a JSON file instead of HTTP (offline tests)
+- an optional CircuitBreaker (resilience.py) makes fetches fail fast while
+  the endpoint is down; already-parsed keys keep verifying tokens meanwhile
+"""
+
+import json
+import time
+import threading
+import traceback
+from typing import Any, Dict, Optional
+
+import requests
+from jwt.algorithms import RSAAlgorithm
+
+
+class JwksKeyStore:
+    def __init__(self, url: Optional[str] = None, local_path: Optional[str] = None,
+                 ttl: float = 3600, refresh_ahead: float = 300,
+                 min_refetch_interval: float = 30, timeout: float = 5, breaker=None):
+        if not url and not local_path:
+            raise ValueError("JwksKeyStore needs a url or a local_path")
+        self.url = url
+        self.local_path = local_path
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.min_refetch_interval = min_refetch_interval
+        self.timeout = timeout
+        self.breaker = breaker
+
+        self._keys: Dict[str, Any] = {}
+        self._fetched_at = 0.0
+        self._generation = 0
+        self._fetch_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+    # --------------------------------------------------------------------------
+    def _load_jwks(self) -> Dict[str, Any]:
+        if self.local_path:
+            with open(self.local_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        resp = requests.get(self.url, timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+    def _refresh(self, seen_generation: Optional[int] = None) -> None:
+        """Fetch + parse all keys. Callers that queued behind an in-flight fetch reuse its result."""
+        with self._fetch_lock:
+            if seen_generation is not None and self._generation != seen_generation:
+                return  # someone else refreshed while we waited
+            if self.breaker is not None:
+                with self.breaker.guard():
+                    data = self._load_jwks()
+            else:
+                data = self._load_jwks()
+            keys = {}
+            for jwk in data.get("keys", []):
+                kid = jwk.get("kid")
+                if not kid or jwk.get("kty") != "RSA":
+                    continue
+                try:
+                    keys[kid] = RSAAlgorithm.from_jwk(json.dumps(jwk))
+                except Exception as e:
+                    print(f"[jwks] skipping key {kid}: {e}")
+            self._keys = keys          # atomic swap; readers never see a partial dict
+            self._fetched_at = time.time()
+            self._generation += 1
+
+    def _refresh_loop(self) -> None:
+        while True:
+            wait = self._fetched_at + self.ttl - self.refresh_ahead - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                self._refresh()
+            except Exception as e:
+                print(f"[jwks] background refresh failed, keeping {len(self._keys)} cached key(s): {e}")
+                traceback.print_exc()
+                time.sleep(min(60, self.refresh_ahead or 60))
+
+    def _ensure_background_refresh(self) -> None:
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._refresh_loop, name="jwks-refresh", daemon=True)
+                self._thread.start()
+
+    # --------------------------------------------------------------------------
+    def get_key(self, kid: str):
+        """Return the parsed public key for `kid`; raises KeyError if it is unknown after a refetch."""
+        key = self._keys.get(kid)
+        if key is not None:
+            self._ensure_background_refresh()
+            return key
+
+        generation = self._generation
+        if not self._keys or time.time() - self._fetched_at >= self.min_refetch_interval:
+            self._refresh(seen_generation=generation)
+        self._ensure_background_refresh()
+
+        key = self._keys.get(kid)
+        if key is None:
+            raise KeyError(f"signing key '{kid}' not found in JWKS")
+        return key
+
+    def stats(self) -> Dict[str, Any]:
+        return {"keys": len(self._keys), "fetched_at": self._fetched_at, "generation": self._generation}
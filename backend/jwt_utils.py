@@ -1,10 +1,16 @@
-# not used
 # jwt_utils.py
-import os, time
-from datetime import datetime, timedelta
+# Self-contained session tokens (HS256) issued at login; see app.protected_route
+import os, time, threading
+from uuid import uuid4
+from datetime import datetime
 import jwt  # PyJWT
 
-JWT_SECRET   = os.getenv("JWT_SECRET", "dev-secret-change-me")
+# JWT_SECRET is required: without it (or with the old built-in default) no
+# session tokens are issued or accepted. JWT_ALLOW_DEV_SECRET=1 opts a local
+# dev box into the built-in default.
+_DEV_SECRET  = "dev-secret-change-me"
+JWT_ALLOW_DEV_SECRET = os.getenv("JWT_ALLOW_DEV_SECRET", "0") == "1"
+JWT_SECRET   = os.getenv("JWT_SECRET") or (_DEV_SECRET if JWT_ALLOW_DEV_SECRET else "")
 JWT_ISSUER   = os.getenv("JWT_ISSUER", "velia-api")
 JWT_AUDIENCE = os.getenv("JWT_AUDIENCE", "velia-client")
 ALG          = "HS256"
@@ -13,28 +19,45 @@ REFRESH_TTL_DAYS = int(os.getenv("REFRESH_TTL_DAYS", "7"))
 
 def _now(): return datetime.utcnow()
 
+def _now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+def session_tokens_enabled() -> bool:
+    """False when JWT_SECRET is unset, or is the built-in default without JWT_ALLOW_DEV_SECRET=1."""
+    return bool(JWT_SECRET) and (JWT_SECRET != _DEV_SECRET or JWT_ALLOW_DEV_SECRET)
+
+if not session_tokens_enabled():
+    print("[jwt_utils] JWT_SECRET is not set: session tokens are disabled")
+
 def _make_token(sub: str, claims: dict, minutes: int) -> str:
-    iat = _now()
-    exp = iat + timedelta(minutes=minutes)
+    if not session_tokens_enabled():
+        raise RuntimeError("JWT_SECRET is not set; session tokens are disabled")
+    # epoch seconds from time.time(): naive utcnow().timestamp() is skewed on non-UTC hosts
+    iat_ms = _now_ms()
+    iat = iat_ms // 1000
     payload = {
         "iss": JWT_ISSUER,
         "aud": JWT_AUDIENCE,
-        "iat": int(iat.timestamp()),
-        "nbf": int(iat.timestamp()),
-        "exp": int(exp.timestamp()),
+        "iat": iat,
+        "iat_ms": iat_ms,   # finer than iat, for the user-epoch check
+        "nbf": iat,
+        "exp": iat + minutes * 60,
         "sub": sub,
+        "jti": uuid4().hex,
         **(claims or {})
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=ALG)
 
 def make_access_token(user_id: str, role: str, extra: dict | None = None) -> str:
-    return _make_token(user_id, {"role": role, **(extra or {})}, ACCESS_TTL_MIN)
+    return _make_token(user_id, {"typ": "access", "role": role, **(extra or {})}, ACCESS_TTL_MIN)
 
-def make_refresh_token(user_id: str) -> str:
+def make_refresh_token(user_id: str, extra: dict | None = None) -> str:
     minutes = REFRESH_TTL_DAYS * 24 * 60
-    return _make_token(user_id, {"typ": "refresh"}, minutes)
+    return _make_token(user_id, {**(extra or {}), "typ": "refresh"}, minutes)
 
 def decode_token(token: str) -> dict:
+    if not session_tokens_enabled():
+        raise jwt.InvalidTokenError("session tokens are disabled (JWT_SECRET is not set)")
     return jwt.decode(
         token,
         JWT_SECRET,
@@ -42,3 +65,55 @@ def decode_token(token: str) -> dict:
         audience=JWT_AUDIENCE,
         options={"require": ["exp","iat","nbf","iss","aud","sub"]}
     )
+
+def is_session_token(token: str) -> bool:
+    """True if the bearer token looks like one of ours (HS256 + our issuer), without verifying it."""
+    try:
+        if jwt.get_unverified_header(token).get("alg") != ALG:
+            return False
+        return jwt.decode(token, options={"verify_signature": False}).get("iss") == JWT_ISSUER
+    except jwt.PyJWTError:
+        return False
+
+# ----------------------------------------------------------------------
+# Revocation: per-token (jti) and per-user epoch ("tokens issued before T are dead")
+# In-memory and per-process; entries are pruned once every token they cover has expired.
+# ----------------------------------------------------------------------
+_REVOKED_JTI: dict = {}       # jti -> exp
+_USER_NOT_BEFORE: dict = {}   # sub -> epoch milliseconds
+_REVOKE_LOCK = threading.Lock()
+
+def _prune(now: float) -> None:
+    horizon = (now - REFRESH_TTL_DAYS * 24 * 3600) * 1000
+    for jti in [j for j, exp in _REVOKED_JTI.items() if exp < now]:
+        _REVOKED_JTI.pop(jti, None)
+    for sub in [u for u, nb in _USER_NOT_BEFORE.items() if nb < horizon]:
+        _USER_NOT_BEFORE.pop(sub, None)
+
+def revoke_token(claims: dict) -> None:
+    with _REVOKE_LOCK:
+        if claims.get("jti"):
+            _REVOKED_JTI[claims["jti"]] = claims.get("exp") or time.time()
+        _prune(time.time())
+
+def bump_user_epoch(sub: str) -> None:
+    """Invalidate every token already issued to `sub` (e.g. after a role change)."""
+    if not sub:
+        return
+    with _REVOKE_LOCK:
+        _USER_NOT_BEFORE[sub.strip().lower()] = _now_ms()
+        _prune(time.time())
+
+def verify_session_token(token: str, typ: str = "access") -> dict:
+    """decode_token + type, jti revocation and user-epoch checks. Raises jwt.InvalidTokenError."""
+    claims = decode_token(token)
+    if claims.get("typ") != typ:
+        raise jwt.InvalidTokenError(f"expected a {typ} token")
+    if claims.get("jti") in _REVOKED_JTI:
+        raise jwt.InvalidTokenError("token revoked")
+    not_before = _USER_NOT_BEFORE.get(str(claims.get("sub", "")).lower())
+    # <=: a token minted in the same millisecond as the bump may predate it
+    issued_ms = int(claims.get("iat_ms") or int(claims.get("iat", 0)) * 1000)
+    if not_before is not None and issued_ms <= not_before:
+        raise jwt.InvalidTokenError("token predates a permission change")
+    return claims
@@ -0,0 +1,51 @@
+-- 001_env_indexes.sql
+-- Env-leading composite indexes backing the `env = ?` predicates that the read
+-- helpers in servertest.py now push into SQL (instead of app.filter_by_env
+-- post-filtering every row in Python). Idempotent; safe to re-run.
+
+-- MR_OnBoardRoleInfo ----------------------------------------------------------
+-- get_profile_by_email / get_profile_by_id / create_or_update_user_from_claims
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_MR_OnBoardRoleInfo_env_email'
+               AND object_id = OBJECT_ID('dbo.MR_OnBoardRoleInfo'))
+    CREATE NONCLUSTERED INDEX IX_MR_OnBoardRoleInfo_env_email
+        ON dbo.MR_OnBoardRoleInfo (env, email, editTime DESC)
+        INCLUDE (display_name, role, edited_by, createdTime, role_id, status);
+GO
+
+-- get_roles_with_role / get_all_roles
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_MR_OnBoardRoleInfo_env_role'
+               AND object_id = OBJECT_ID('dbo.MR_OnBoardRoleInfo'))
+    CREATE NONCLUSTERED INDEX IX_MR_OnBoardRoleInfo_env_role
+        ON dbo.MR_OnBoardRoleInfo (env, role);
+GO
+
+-- MR_OnBoardTask ---------------------------------------------------------------
+-- list_all_tasks_simple (WHERE env = ? ORDER BY created_at DESC)
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_MR_OnBoardTask_env_created_at'
+               AND object_id = OBJECT_ID('dbo.MR_OnBoardTask'))
+    CREATE NONCLUSTERED INDEX IX_MR_OnBoardTask_env_created_at
+        ON dbo.MR_OnBoardTask (env, created_at DESC);
+GO
+
+-- find_task_by_id (WHERE task_id = ? AND env = ?)
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_MR_OnBoardTask_env_task_id'
+               AND object_id = OBJECT_ID('dbo.MR_OnBoardTask'))
+    CREATE NONCLUSTERED INDEX IX_MR_OnBoardTask_env_task_id
+        ON dbo.MR_OnBoardTask (env, task_id);
+GO
+
+-- OnBoardRequestForm -----------------------------------------------------------
+-- get_onboard_all / export / dashboard counts (WHERE env = ? [AND Createdby = ?])
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_OnBoardRequestForm_env_CreatedAt'
+               AND object_id = OBJECT_ID('dbo.OnBoardRequestForm'))
+    CREATE NONCLUSTERED INDEX IX_OnBoardRequestForm_env_CreatedAt
+        ON dbo.OnBoardRequestForm (env, CreatedAt)
+        INCLUDE (Createdby);
+GO
+
+-- get_onboard_request_by_id (WHERE submission_id = ? AND env = ?)
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_OnBoardRequestForm_env_submission_id'
+               AND object_id = OBJECT_ID('dbo.OnBoardRequestForm'))
+    CREATE NONCLUSTERED INDEX IX_OnBoardRequestForm_env_submission_id
+        ON dbo.OnBoardRequestForm (env, submission_id);
+GO
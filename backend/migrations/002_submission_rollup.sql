@@ -0,0 +1,21 @@
+-- 002_submission_rollup.sql
+-- Dashboard rollup for OnBoardRequestForm, maintained in the same transaction
+-- as every submission insert/update/delete (see submission_rollup.py).
+-- One row per (env, created_by, grain, bucket):
+--   grain 'D' = day (bucket = that date), 'M' = month (bucket = 1st of month),
+--   'A' = all time (bucket = 1900-01-01); created_by '*' aggregates everyone.
+-- /api/submissions/count reads 1 + 1 + 12 rows by primary key regardless of history.
+-- Populate/repair with: python submission_rollup.py rebuild   (idempotent; safe to re-run)
+-- Until this is applied, writes skip the rollup (SUBMISSION_ROLLUP=auto) and the count
+-- endpoint scans OnBoardRequestForm; run the rebuild once after applying it.
+
+IF OBJECT_ID('dbo.OnBoardSubmissionRollup', 'U') IS NULL
+    CREATE TABLE dbo.OnBoardSubmissionRollup (
+        env        NVARCHAR(50)  NOT NULL,
+        created_by NVARCHAR(255) NOT NULL,
+        grain      CHAR(1)       NOT NULL,
+        bucket     DATE          NOT NULL,
+        cnt        INT           NOT NULL,
+        CONSTRAINT PK_OnBoardSubmissionRollup PRIMARY KEY CLUSTERED (env, created_by, grain, bucket)
+    );
+GO
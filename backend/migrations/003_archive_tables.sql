@@ -0,0 +1,39 @@
+-- 003_archive_tables.sql
+-- Cold tier for MR_OnBoardTask (closed tasks) and MR_OnBoardRoleInfo (superseded
+-- audit rows), filled in batches by archival.py. Same columns as the hot tables
+-- (the UNION ALL in SELECT ... INTO drops the IDENTITY property so archived
+-- ROW_IDs are kept verbatim) plus archived_at. Reads only touch these tables
+-- when a caller passes include_archived. Idempotent; safe to re-run.
+
+IF OBJECT_ID('dbo.MR_OnBoardTask_Archive', 'U') IS NULL
+BEGIN
+    SELECT TOP 0 * INTO dbo.MR_OnBoardTask_Archive FROM dbo.MR_OnBoardTask
+    UNION ALL
+    SELECT TOP 0 * FROM dbo.MR_OnBoardTask;
+    ALTER TABLE dbo.MR_OnBoardTask_Archive
+        ADD archived_at DATETIME2 NOT NULL CONSTRAINT DF_MR_OnBoardTask_Archive_archived_at DEFAULT SYSUTCDATETIME();
+    CREATE CLUSTERED INDEX CIX_MR_OnBoardTask_Archive_env_created_at
+        ON dbo.MR_OnBoardTask_Archive (env, created_at);
+    CREATE NONCLUSTERED INDEX IX_MR_OnBoardTask_Archive_task_id
+        ON dbo.MR_OnBoardTask_Archive (task_id);
+END
+GO
+
+IF OBJECT_ID('dbo.MR_OnBoardRoleInfo_Archive', 'U') IS NULL
+BEGIN
+    SELECT TOP 0 * INTO dbo.MR_OnBoardRoleInfo_Archive FROM dbo.MR_OnBoardRoleInfo
+    UNION ALL
+    SELECT TOP 0 * FROM dbo.MR_OnBoardRoleInfo;
+    ALTER TABLE dbo.MR_OnBoardRoleInfo_Archive
+        ADD archived_at DATETIME2 NOT NULL CONSTRAINT DF_MR_OnBoardRoleInfo_Archive_archived_at DEFAULT SYSUTCDATETIME();
+    CREATE CLUSTERED INDEX CIX_MR_OnBoardRoleInfo_Archive_env_email
+        ON dbo.MR_OnBoardRoleInfo_Archive (env, email);
+END
+GO
+
+-- archival scan for closed tasks (Status IN (...) AND updated_at < cutoff)
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_MR_OnBoardTask_Status_updated_at'
+               AND object_id = OBJECT_ID('dbo.MR_OnBoardTask'))
+    CREATE NONCLUSTERED INDEX IX_MR_OnBoardTask_Status_updated_at
+        ON dbo.MR_OnBoardTask (Status, updated_at);
+GO
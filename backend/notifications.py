@@ -0,0 +1,328 @@
+# notifications.py
+# -*- coding: utf-8 -*-
+"""
+Render and send the email/SMS templates carried by MR_OnBoardCategory
+(to_email, to_phone, email_subject, email_body_template, sms_message_template).
+
+- templates are compiled once per distinct template text (str.format syntax)
+- a batch of new tasks is rendered together and coalesced per recipient, so
+  one person assigned five tasks gets one digest instead of five messages
+- messages go through a pluggable transport ("file" stand-in by default, or SMTP)
+  on a bounded worker pool with a token-bucket rate limit
+- the digest buffer lives in SQLite (NOTIFY_DIGEST_DB), so messages buffered
+  when the process stops are flushed by the next one (start_digest_flusher)
+"""
+
+import os
+import json
+import time
+import sqlite3
+import smtplib
+import string
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+NOTIFY_TRANSPORT   = os.getenv("NOTIFY_TRANSPORT", "file")        # file | smtp | none
+NOTIFY_OUTBOX      = os.getenv("NOTIFY_OUTBOX", os.path.join(os.path.dirname(os.path.abspath(__file__)), "outbox.jsonl"))
+NOTIFY_WORKERS     = int(os.getenv("NOTIFY_WORKERS", "4"))
+NOTIFY_MAX_PENDING = int(os.getenv("NOTIFY_MAX_PENDING", "200"))
+NOTIFY_RATE_PER_S  = float(os.getenv("NOTIFY_RATE_PER_S", "5"))
+NOTIFY_DIGEST_WINDOW_S = float(os.getenv("NOTIFY_DIGEST_WINDOW_S", "30"))
+NOTIFY_DIGEST_DB   = os.getenv("NOTIFY_DIGEST_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "notify_digest.sqlite3"))
+NOTIFY_FROM        = os.getenv("NOTIFY_FROM", "hrportal@guardianfueltech.com")
+SMTP_HOST          = os.getenv("SMTP_HOST", "localhost")
+SMTP_PORT          = int(os.getenv("SMTP_PORT", "25"))
+SMTP_USER          = os.getenv("SMTP_USER")
+SMTP_PASSWORD      = os.getenv("SMTP_PASSWORD")
+SMTP_STARTTLS      = os.getenv("SMTP_STARTTLS", "0") == "1"
+SMS_GATEWAY_DOMAIN = os.getenv("SMS_GATEWAY_DOMAIN")              # e.g. "txt.example.com" -> <digits>@domain
+
+# ------------------------------------------------------------------------------
+# Templates
+# ------------------------------------------------------------------------------
+_FORMATTER = string.Formatter()
+
+@lru_cache(maxsize=512)
+def compile_template(text: str) -> Tuple[Tuple[str, Optional[str]], ...]:
+    """Parse a str.format template once into (literal, field_name) parts."""
+    return tuple((literal, field) for literal, field, _, _ in _FORMATTER.parse(text or ""))
+
+def render_template(text: str, ctx: Dict[str, Any]) -> str:
+    """Render a compiled template; unknown/missing fields render as empty strings."""
+    out = []
+    for literal, field in compile_template(text):
+        out.append(literal)
+        if field is not None:
+            val = ctx.get(field)
+            out.append("" if val is None else str(val))
+    return "".join(out)
+
+def _split_addresses(value: Optional[str]) -> List[str]:
+    if not value:
+        return []
+    return [a.strip() for a in str(value).replace(";", ",").split(",") if a.strip()]
+
+def _task_context(task: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        **task,
+        "onboarding_id": task.get("onboarding_id") or task.get("related_onboarding_id"),
+        "manager": task.get("manager"),
+        "employee_full_name": task.get("employee_full_name"),
+    }
+
+def render_task_messages(tasks: Iterable[Dict[str, Any]], categories: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Render one message per (task, recipient, channel).
+    Returns dicts: {"channel": "email"|"sms", "to", "subject", "body", "task_id"}.
+    """
+    # new tasks use the "*_Insert" (or unsuffixed) template; *_Update/*_Delete only fill gaps
+    def _rank(item):
+        key = str(item[0]).lower()
+        return 0 if key.endswith(("_update", "_delete", "_cancel")) else 1
+
+    by_type: Dict[str, Dict[str, Any]] = {}
+    for key, cfg in sorted(categories.items(), key=_rank):
+        if cfg.get("task_type"):
+            by_type[cfg["task_type"]] = cfg
+    messages: List[Dict[str, Any]] = []
+    for task in tasks:
+        cfg = by_type.get(task.get("task_type"))
+        if not cfg:
+            continue
+        ctx = _task_context(task)
+
+        emails = _split_addresses(task.get("to_email") or cfg.get("to_email"))
+        if emails and cfg.get("email_body_template"):
+            subject = render_template(cfg.get("email_subject") or task.get("name") or "", ctx)
+            body = render_template(cfg["email_body_template"], ctx)
+            for to in emails:
+                messages.append({"channel": "email", "to": to, "subject": subject, "body": body, "task_id": task.get("task_id")})
+
+        phones = _split_addresses(task.get("to_phone") or cfg.get("to_phone"))
+        if phones and cfg.get("sms_message_template"):
+            text = render_template(cfg["sms_message_template"], ctx)
+            for to in phones:
+                messages.append({"channel": "sms", "to": to, "subject": None, "body": text, "task_id": task.get("task_id")})
+    return messages
+
+def coalesce_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merge messages for the same (channel, recipient) into a single digest."""
+    groups: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    for m in messages:
+        groups.setdefault((m["channel"], m["to"].lower()), []).append(m)
+
+    out = []
+    for (channel, _), items in groups.items():
+        if len(items) == 1:
+            out.append(items[0])
+            continue
+        if channel == "email":
+            body = "\n\n".join(f"{i}. {m['subject']}\n{m['body']}" for i, m in enumerate(items, start=1))
+            subject = f"{len(items)} onboarding tasks assigned to you"
+        else:
+            body = "\n".join(m["body"] for m in items)
+            subject = None
+        out.append({
+            "channel": channel,
+            "to": items[0]["to"],
+            "subject": subject,
+            "body": body,
+            "task_id": [m["task_id"] for m in items],
+        })
+    return out
+
+# ------------------------------------------------------------------------------
+# Transports
+# ------------------------------------------------------------------------------
+class FileTransport:
+    """Local stand-in: append each message as a JSON line to NOTIFY_OUTBOX."""
+    def __init__(self, path: str = NOTIFY_OUTBOX):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, message: Dict[str, Any]) -> None:
+        line = json.dumps({**message, "sent_at": time.time()}, default=str)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+class SmtpTransport:
+    """Send email over SMTP; SMS goes out through an email-to-SMS gateway when configured."""
+    def send(self, message: Dict[str, Any]) -> None:
+        to = message["to"]
+        if message["channel"] == "sms":
+            if not SMS_GATEWAY_DOMAIN:
+                print(f"[notifications] SMS to {to} skipped (SMS_GATEWAY_DOMAIN not set)")
+                return
+            to = "".join(ch for ch in to if ch.isdigit()) + "@" + SMS_GATEWAY_DOMAIN
+
+        msg = EmailMessage()
+        msg["From"] = NOTIFY_FROM
+        msg["To"] = to
+        if message.get("subject"):
+            msg["Subject"] = message["subject"]
+        msg.set_content(message["body"])
+
+        with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=10) as smtp:
+            if SMTP_STARTTLS:
+                smtp.starttls()
+            if SMTP_USER:
+                smtp.login(SMTP_USER, SMTP_PASSWORD or "")
+            smtp.send_message(msg)
+
+class NullTransport:
+    def send(self, message: Dict[str, Any]) -> None:
+        pass
+
+TRANSPORTS = {"file": FileTransport, "smtp": SmtpTransport, "none": NullTransport}
+
+_transport = None
+
+def get_transport():
+    global _transport
+    if _transport is None:
+        _transport = TRANSPORTS.get(NOTIFY_TRANSPORT, FileTransport)()
+    return _transport
+
+def set_transport(transport) -> None:
+    """Swap the transport (anything with .send(message))."""
+    global _transport
+    _transport = transport
+
+# ------------------------------------------------------------------------------
+# Dispatch (bounded pool + token bucket)
+# ------------------------------------------------------------------------------
+class _RateLimiter:
+    def __init__(self, rate_per_s: float):
+        self.rate = max(rate_per_s, 0.01)
+        self.tokens = self.rate
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+_executor = ThreadPoolExecutor(max_workers=NOTIFY_WORKERS, thread_name_prefix="notify")
+_pending = threading.BoundedSemaphore(NOTIFY_MAX_PENDING)
+_limiter = _RateLimiter(NOTIFY_RATE_PER_S)
+
+def _send_one(message: Dict[str, Any]) -> None:
+    try:
+        _limiter.acquire()
+        get_transport().send(message)
+    except Exception as e:
+        print(f"[notifications] send to {message.get('to')} failed: {e}")
+        traceback.print_exc()
+    finally:
+        _pending.release()
+
+def dispatch(messages: List[Dict[str, Any]]) -> int:
+    """Queue messages on the worker pool; blocks when NOTIFY_MAX_PENDING are in flight."""
+    for m in messages:
+        _pending.acquire()
+        _executor.submit(_send_one, m)
+    return len(messages)
+
+# ------------------------------------------------------------------------------
+# Digest buffer (SQLite, shared by every process using NOTIFY_DIGEST_DB)
+# ------------------------------------------------------------------------------
+_digest_lock = threading.Lock()
+_digest_timer: Optional[threading.Timer] = None
+
+def _digest_connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(NOTIFY_DIGEST_DB, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS digest_messages ("
+        " id INTEGER PRIMARY KEY AUTOINCREMENT, message TEXT NOT NULL, created_at REAL NOT NULL)"
+    )
+    return conn
+
+def _buffer_messages(messages: List[Dict[str, Any]]) -> None:
+    now = time.time()
+    conn = _digest_connect()
+    try:
+        conn.executemany(
+            "INSERT INTO digest_messages (message, created_at) VALUES (?, ?)",
+            [(json.dumps(m, default=str), now) for m in messages],
+        )
+    finally:
+        conn.close()
+
+def _take_buffered() -> List[Dict[str, Any]]:
+    """Remove and return everything buffered; one process wins each message."""
+    conn = _digest_connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        rows = conn.execute("SELECT id, message FROM digest_messages ORDER BY id").fetchall()
+        if rows:
+            conn.execute("DELETE FROM digest_messages WHERE id <= ?", (rows[-1][0],))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return [json.loads(m) for _, m in rows]
+
+def _arm_digest_timer() -> None:
+    global _digest_timer
+    with _digest_lock:
+        if _digest_timer is None:
+            _digest_timer = threading.Timer(NOTIFY_DIGEST_WINDOW_S, flush_digests)
+            _digest_timer.daemon = True
+            _digest_timer.start()
+
+def flush_digests() -> int:
+    """Coalesce everything buffered so far and dispatch it."""
+    global _digest_timer
+    with _digest_lock:
+        _digest_timer = None
+    batch = _take_buffered()
+    return dispatch(coalesce_messages(batch)) if batch else 0
+
+def start_digest_flusher() -> None:
+    """Call at startup: flush messages a previous process buffered but never sent."""
+    try:
+        conn = _digest_connect()
+        try:
+            pending = conn.execute("SELECT COUNT(*) FROM digest_messages").fetchone()[0]
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"[notifications] digest buffer unavailable: {e}")
+        traceback.print_exc()
+        return
+    if pending:
+        _arm_digest_timer()
+
+def notify_new_tasks(tasks: List[Dict[str, Any]], categories: Dict[str, Dict[str, Any]]) -> int:
+    """
+    Render notifications for newly created tasks and buffer them for
+    NOTIFY_DIGEST_WINDOW_S so a whole onboarding wave is coalesced per recipient.
+    Returns the number of rendered (pre-coalescing) messages.
+    """
+    if not tasks or NOTIFY_TRANSPORT == "none":
+        return 0
+    messages = render_task_messages(tasks, categories)
+    if not messages:
+        return 0
+    if NOTIFY_DIGEST_WINDOW_S <= 0:
+        dispatch(coalesce_messages(messages))
+        return len(messages)
+
+    _buffer_messages(messages)
+    _arm_digest_timer()
+    return len(messages)
@@ -0,0 +1,71 @@
+# precompress_assets.py
+# Build step: unpack the React build (dir or build.zip) and write .gz/.br next
+# to every compressible asset so compression.register_frontend_routes can
+# serve them without compressing per request.
+#
+#   python precompress_assets.py ../frontend/build.zip --out ../frontend/build
+import os
+import sys
+import gzip
+import zipfile
+import argparse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+EXTENSIONS = {".js", ".css", ".html", ".json", ".map", ".svg", ".txt", ".ico", ".xml"}
+MIN_BYTES = 256
+
+def unpack(src: str, out: str) -> str:
+    if os.path.isdir(src):
+        return src
+    with zipfile.ZipFile(src) as zf:
+        zf.extractall(out)
+    # build.zip may contain a top-level "build/" folder
+    inner = os.path.join(out, "build")
+    return inner if os.path.isfile(os.path.join(inner, "index.html")) else out
+
+def precompress(build_dir: str) -> dict:
+    stats = {"files": 0, "gz": 0, "br": 0, "bytes_in": 0, "bytes_gz": 0, "bytes_br": 0}
+    for root, _, files in os.walk(build_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.splitext(name)[1].lower() not in EXTENSIONS:
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            if len(data) < MIN_BYTES:
+                continue
+            stats["files"] += 1
+            stats["bytes_in"] += len(data)
+
+            gz = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(gz) < len(data):
+                with open(path + ".gz", "wb") as f:
+                    f.write(gz)
+                stats["gz"] += 1
+                stats["bytes_gz"] += len(gz)
+
+            if brotli is not None:
+                br = brotli.compress(data, quality=11)
+                if len(br) < len(data):
+                    with open(path + ".br", "wb") as f:
+                        f.write(br)
+                    stats["br"] += 1
+                    stats["bytes_br"] += len(br)
+    return stats
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("src", help="build directory or build.zip")
+    ap.add_argument("--out", default="build", help="where to unpack a zip")
+    args = ap.parse_args()
+
+    build_dir = unpack(args.src, args.out)
+    s = precompress(build_dir)
+    print(f"[precompress] {build_dir}: {s['files']} files, {s['bytes_in']} bytes -> "
+          f"gz {s['bytes_gz']} ({s['gz']} files), br {s['bytes_br']} ({s['br']} files)"
+          + ("" if brotli else " [brotli not installed, .br skipped]"))
+    sys.exit(0)
@@ -0,0 +1,221 @@
+# resilience.py
+# -*- coding: utf-8 -*-
+"""
+Fail-fast guards for slow or failing dependencies.
+
+- CircuitBreaker: opens after BREAKER_FAILURES failures inside
+  BREAKER_WINDOW_S, rejects calls with CircuitOpenError for BREAKER_OPEN_S,
+  then lets a single probe through (half-open); a good probe closes it
+- BREAKERS: one per dependency - "db" (primary SQL Server), "gp_reporting"
+  (CF_SP_Emp_Detail_Search) and "jwks" (Microsoft signing keys)
+- AdmissionGate / admit(): caps concurrent in-flight expensive routes and
+  sheds the rest with 503 + Retry-After instead of queueing them on workers
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+from flask import jsonify, make_response
+
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_WINDOW_S = float(os.getenv("BREAKER_WINDOW_S", "30"))
+BREAKER_OPEN_S   = float(os.getenv("BREAKER_OPEN_S", "15"))
+
+DB_CONNECT_TIMEOUT_S      = int(os.getenv("DB_CONNECT_TIMEOUT_S", "5"))     # pyodbc login timeout
+DB_QUERY_TIMEOUT_S        = int(os.getenv("DB_QUERY_TIMEOUT_S", "30"))      # per statement; 0 = none
+REPORTING_QUERY_TIMEOUT_S = int(os.getenv("REPORTING_QUERY_TIMEOUT_S", "10"))
+
+ADMIT_WAIT_S     = float(os.getenv("ADMIT_WAIT_S", "0.25"))
+ADMIT_SEARCH_MAX = int(os.getenv("ADMIT_SEARCH_MAX", "8"))
+ADMIT_COUNTS_MAX = int(os.getenv("ADMIT_COUNTS_MAX", "8"))
+ADMIT_EXPORT_MAX = int(os.getenv("ADMIT_EXPORT_MAX", "2"))
+
+
+class CircuitOpenError(Exception):
+    """A dependency's breaker is open; callers should answer 503."""
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is unavailable (circuit open)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failures: int = BREAKER_FAILURES,
+                 window_s: float = BREAKER_WINDOW_S, open_s: float = BREAKER_OPEN_S):
+        self.name = name
+        self.failures = failures
+        self.window_s = window_s
+        self.open_s = open_s
+        self._recent: deque = deque()      # failure timestamps inside the window
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "open" if time.time() - self._opened_at < self.open_s else "half_open"
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self._opened_at + self.open_s - time.time())
+
+    def is_open(self) -> bool:
+        """Open and not yet due for a probe (half-open counts as not open)."""
+        return self.state == "open"
+
+    def before_call(self) -> bool:
+        """Raise CircuitOpenError if the call may not proceed; True if it is the half-open probe."""
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            remaining = self._opened_at + self.open_s - time.time()
+            if remaining <= 0 and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+        raise CircuitOpenError(self.name, max(remaining, 1.0))
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._probing:
+                self._opened_at = None
+                self._recent.clear()
+                self._probing = False
+
+    def record_failure(self) -> None:
+        now = time.time()
+        with self._lock:
+            if self._probing or self._opened_at is not None:
+                self._opened_at = now     # failed probe: stay open for another period
+                self._probing = False
+                return
+            self._recent.append(now)
+            while self._recent and self._recent[0] < now - self.window_s:
+                self._recent.popleft()
+            if len(self._recent) >= self.failures:
+                self._opened_at = now
+                self.trips += 1
+                print(f"[breaker] {self.name} opened after {len(self._recent)} failures in {self.window_s:.0f}s")
+
+    @contextmanager
+    def guard(self, failure_types: Tuple[Type[BaseException], ...] = (Exception,)):
+        """Wrap one call: reject while open, record the outcome otherwise."""
+        self.before_call()
+        try:
+            yield
+        except failure_types:
+            self.record_failure()
+            raise
+        except BaseException:
+            self.record_success()     # the dependency answered; the error is ours
+            raise
+        else:
+            self.record_success()
+
+    def stats(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "recent_failures": len(self._recent),
+                "trips": self.trips,
+                "rejected": self.rejected,
+                "retry_after_s": round(max(0.0, (self._opened_at or 0) + self.open_s - time.time()), 1)
+                                 if self._opened_at else 0.0,
+            }
+
+
+BREAKERS: Dict[str, CircuitBreaker] = {
+    "db":           CircuitBreaker("db"),
+    "gp_reporting": CircuitBreaker("gp_reporting"),
+    "jwks":         CircuitBreaker("jwks"),
+}
+
+# ------------------------------------------------------------------------------
+# Admission control
+# ------------------------------------------------------------------------------
+class AdmissionGate:
+    def __init__(self, name: str, limit: int, wait_s: float = ADMIT_WAIT_S):
+        self.name = name
+        self.limit = limit
+        self.wait_s = wait_s
+        self._sem = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.admitted = 0
+        self.shed = 0
+
+    def try_acquire(self) -> bool:
+        if not self._sem.acquire(timeout=self.wait_s):
+            with self._lock:
+                self.shed += 1
+            return False
+        with self._lock:
+            self.in_flight += 1
+            self.admitted += 1
+        return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        self._sem.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"limit": self.limit, "in_flight": self.in_flight, "admitted": self.admitted, "shed": self.shed}
+
+
+GATES: Dict[str, AdmissionGate] = {
+    "search": AdmissionGate("search", ADMIT_SEARCH_MAX),
+    "counts": AdmissionGate("counts", ADMIT_COUNTS_MAX),
+    "export": AdmissionGate("export", ADMIT_EXPORT_MAX),
+}
+
+def unavailable(message: str, retry_after: float = 1.0):
+    resp = jsonify({"error": message})
+    resp.status_code = 503
+    resp.headers["Retry-After"] = str(max(1, int(retry_after + 0.999)))
+    return resp
+
+def admit(gate_name: str) -> Callable:
+    """
+    Route decorator: hold a slot of GATES[gate_name] for the whole response,
+    including a streamed body, or answer 503 when the gate is full.
+    """
+    gate = GATES[gate_name]
+
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if not gate.try_acquire():
+                return unavailable(f"too many concurrent {gate_name} requests, retry shortly")
+            try:
+                resp = make_response(f(*args, **kwargs))
+            except BaseException:
+                gate.release()
+                raise
+            if resp.is_streamed:
+                resp.call_on_close(gate.release)
+            else:
+                gate.release()
+            return resp
+        return wrapper
+    return decorator
+
+def resilience_stats() -> Dict[str, Any]:
+    return {
+        "breakers": {n: b.stats() for n, b in BREAKERS.items()},
+        "admission": {n: g.stats() for n, g in GATES.items()},
+    }
@@ -7,8 +7,11 @@ import json
 import base64
 import hashlib
 import datetime, uuid
+import threading
 import traceback
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 import pandas as pd
 from pandas.core.series import sanitize_array
@@ -17,11 +20,18 @@ from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives import padding
 from cryptography.hazmat.backends import default_backend
 
+from concurrency import run_parallel
+from env_context import get_env
+from db_routing import read_connection
+from resilience import BREAKERS, CircuitOpenError, DB_CONNECT_TIMEOUT_S, DB_QUERY_TIMEOUT_S, REPORTING_QUERY_TIMEOUT_S
+from statement_cache import STATEMENTS, canonical_columns
+from change_events import publish_many
+from shared_cache import TieredCache
+import submission_rollup
+
 # ------------------------------------------------------------------------------
-# ENV
+# ENV (request-scoped, see env_context.py)
 # ------------------------------------------------------------------------------
-global env
-env = "dev"
 server     = os.environ.get("serverGFT")
 database   = os.environ.get("databaseGFTSharePoint")
 username   = os.environ.get("usernameSharePointGFT")
@@ -29,21 +39,208 @@ password   = os.environ.get("passwordSharePointGFT")
 SQLaddress = os.environ.get("addressGFT")
 ENCRYPTION_PASSPHRASE = os.environ.get("onboardPasscode") or "change-me"
 
+DB_BREAKER        = BREAKERS["db"]
+REPORTING_BREAKER = BREAKERS["gp_reporting"]
+
 # ------------------------------------------------------------------------------
 # DB
 # ------------------------------------------------------------------------------
-def get_db_connection() -> pyodbc.Connection:
-    """Connect to SQL Server using pyodbc (TrustServerCertificate enabled)."""
+# connect failures and statement timeouts / dropped links count against the "db" breaker
+DB_FAILURE_SQLSTATES = {"HYT00", "HYT01", "08S01", "08001"}
+
+def is_db_outage(e: BaseException) -> bool:
+    return isinstance(e, pyodbc.Error) and bool(e.args) and str(e.args[0]) in DB_FAILURE_SQLSTATES
+
+def get_db_connection(query_timeout: Optional[int] = None) -> pyodbc.Connection:
+    """
+    Connect to SQL Server using pyodbc (TrustServerCertificate enabled).
+    Login is bounded by DB_CONNECT_TIMEOUT_S and every statement by
+    DB_QUERY_TIMEOUT_S (`query_timeout` overrides, 0 = none, for batch jobs).
+    Raises CircuitOpenError without trying while the "db" breaker is open.
+    """
     conn_str = (
         f"DRIVER={SQLaddress};SERVER={server};DATABASE={database};"
         f"UID={username};PWD={password};TrustServerCertificate=yes;"
     )
-    return pyodbc.connect(conn_str)
+    with DB_BREAKER.guard((pyodbc.OperationalError, pyodbc.InterfaceError)):
+        conn = pyodbc.connect(conn_str, timeout=DB_CONNECT_TIMEOUT_S)
+    conn.timeout = DB_QUERY_TIMEOUT_S if query_timeout is None else query_timeout
+    return conn
+
+def get_read_connection() -> pyodbc.Connection:
+    """Connection for the read-only helpers: the read replica when one is configured and healthy (see db_routing.py)."""
+    return read_connection(get_db_connection)
+
+# ------------------------------------------------------------------------------
+# Unit of work: several helpers, one connection, one commit
+# ------------------------------------------------------------------------------
+class UnitOfWorkRolledBack(RuntimeError):
+    """A helper inside unit_of_work() failed (and swallowed the error), so nothing was committed."""
+
+class _UnitOfWork:
+    def __init__(self, conn: pyodbc.Connection):
+        self.conn = conn
+        self.owner = threading.get_ident()   # pyodbc connections must not be shared across threads
+        self.rollback_only = False
+        self.after_commit: List[Callable[[], Any]] = []
+
+_UOW: ContextVar[Optional[_UnitOfWork]] = ContextVar("db_unit_of_work", default=None)
+
+def _active_uow() -> Optional[_UnitOfWork]:
+    uow = _UOW.get()
+    return uow if uow is not None and uow.owner == threading.get_ident() else None
+
+@contextmanager
+def unit_of_work(query_timeout: Optional[int] = None):
+    """
+    Run several helpers on one primary connection and commit once at the end.
+    Helpers called inside join it via db_session(); their own commits become
+    no-ops and their change events are published only after the commit. Any
+    exception, or a helper failure it swallowed, rolls everything back
+    (the latter raises UnitOfWorkRolledBack). Nested calls join the outer one.
+    Work handed to other threads (run_parallel) uses its own connections and
+    does not see the uncommitted writes.
+    """
+    if _active_uow() is not None:
+        with db_session() as conn:
+            yield conn
+        return
+    conn = get_db_connection(query_timeout)
+    uow = _UnitOfWork(conn)
+    token = _UOW.set(uow)
+    try:
+        yield conn
+        if uow.rollback_only:
+            conn.rollback()
+            raise UnitOfWorkRolledBack("a step failed inside the unit of work; rolled back")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        _UOW.reset(token)
+        conn.close()
+    for callback in uow.after_commit:
+        callback()
+
+@contextmanager
+def db_session(read_only: bool = False):
+    """
+    Connection for one helper call: the active unit of work's, otherwise a
+    fresh one (the read replica when `read_only`) committed when the block exits.
+    """
+    uow = _active_uow()
+    if uow is not None:
+        try:
+            yield uow.conn
+        except BaseException:
+            uow.rollback_only = True
+            raise
+        return
+    with (get_read_connection() if read_only else get_db_connection()) as conn:
+        yield conn
+
+def _commit(conn: pyodbc.Connection) -> None:
+    uow = _active_uow()
+    if uow is None or uow.conn is not conn:
+        conn.commit()
+
+def _rollback(conn: pyodbc.Connection) -> None:
+    uow = _active_uow()
+    if uow is not None and uow.conn is conn:
+        uow.rollback_only = True
+    conn.rollback()
+
+def _on_commit(callback: Callable[[], Any]) -> None:
+    """Run `callback` after the active unit of work commits (now, outside one)."""
+    uow = _active_uow()
+    if uow is None:
+        callback()
+    else:
+        uow.after_commit.append(callback)
+
+def _publish(kind: str, action: str, **fields: Any) -> None:
+    _publish_many(kind, action, [fields])
+
+def _publish_many(kind: str, action: str, items: Iterable[Dict[str, Any]]) -> None:
+    """Change events go out after the commit that makes them true."""
+    items = list(items)
+    _on_commit(lambda: publish_many(kind, action, items))
+
+# ------------------------------------------------------------------------------
+# Read caches (local + shared tier, invalidated across workers; see shared_cache.py)
+# ------------------------------------------------------------------------------
+PROFILE_CACHE      = TieredCache("profiles", ttl=float(os.getenv("PROFILE_CACHE_TTL_S", "60")), max_entries=4096)
+CATEGORY_CACHE     = TieredCache("task_categories", ttl=float(os.getenv("CATEGORY_CACHE_TTL_S", "300")))
+TASK_SUMMARY_CACHE = TieredCache("task_summary", ttl=float(os.getenv("TASK_SUMMARY_CACHE_TTL_S", "30")))
+SEARCH_CACHE       = TieredCache("employee_search", ttl=float(os.getenv("SEARCH_CACHE_TTL_S", "60")), max_entries=2048)
+ROLE_ENV_CACHE     = TieredCache("role_env", ttl=float(os.getenv("PROFILE_CACHE_TTL_S", "60")), max_entries=4096)
+
+def _profile_cache_key(email: str, env: Optional[str]) -> str:
+    return f"{email.strip().lower()}|{env or ''}"
+
+def _profile_changed(email: Optional[str] = None) -> None:
+    """Drop the cached profile(s) for `email` (all of them when None) once the write commits."""
+    if email:
+        _on_commit(lambda: PROFILE_CACHE.invalidate(f"{email.strip().lower()}|", prefix=True))
+    else:
+        _on_commit(PROFILE_CACHE.invalidate)
+    _on_commit(ROLE_ENV_CACHE.invalidate)
+
+def _tasks_changed() -> None:
+    _on_commit(TASK_SUMMARY_CACHE.invalidate)
+
+def invalidate_task_categories() -> None:
+    """Call after editing MR_OnBoardCategory so every worker reloads the category map."""
+    CATEGORY_CACHE.invalidate()
 
 def rows_to_dicts(cursor: pyodbc.Cursor, rows: Iterable[Tuple]) -> List[Dict[str, Any]]:
     cols = [c[0] for c in cursor.description]
     return [dict(zip(cols, r)) for r in rows]
 
+def _env_predicate(env: Optional[str], first: bool = False) -> Tuple[str, Tuple]:
+    """
+    SQL fragment + params scoping a read to one env (served by the env-leading
+    indexes in migrations/001_env_indexes.sql). Empty when env is None/blank.
+    """
+    if env is None or str(env).strip() == "":
+        return "", ()
+    return (" WHERE env = ?" if first else " AND env = ?"), (sanitize_input(str(env).strip()),)
+
+def resolve_fields(raw: Optional[str], allowed: List[str], always: Tuple[str, ...] = ()) -> Optional[List[str]]:
+    """
+    Parse a `fields=a,b,c` sparse-fieldset parameter against a column whitelist.
+    None means "all columns"; `always` (key columns) are included first.
+    Raises ValueError listing unknown fields.
+    """
+    if raw is None or not str(raw).strip():
+        return None
+    requested = [f.strip() for f in str(raw).split(",") if f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys([*always, *requested]))
+
+def _select_list(columns: Optional[List[str]], default: str = "*") -> str:
+    return ", ".join(f"[{c}]" for c in columns) if columns else default
+
+def _tiered_source(table: str, columns: List[str], include_archived: bool) -> str:
+    """FROM-clause source: the hot table, or hot UNION ALL <table>_Archive (see archival.py)."""
+    if not include_archived:
+        return table
+    cols = ", ".join(f"[{c}]" for c in columns)
+    return f"(SELECT {cols} FROM {table} UNION ALL SELECT {cols} FROM {table}_Archive) AS tiered"
+
+BATCH_GET_CHUNK = 1000   # ids per IN (...) list; SQL Server caps a statement at 2100 parameters
+
+def _fetch_in_chunks(cur: pyodbc.Cursor, sql: str, values: List[Any], extra: Tuple = ()) -> List[Dict[str, Any]]:
+    """Run `sql` (containing one "{marks}" IN-list slot) for each chunk of values on one cursor."""
+    out: List[Dict[str, Any]] = []
+    for chunk in _chunked(values, BATCH_GET_CHUNK):
+        cur.execute(sql.format(marks=", ".join("?" for _ in chunk)), (*chunk, *extra))
+        out.extend(rows_to_dicts(cur, cur.fetchall()))
+    return out
+
 # ------------------------------------------------------------------------------
 # Crypto (AES-256-CBC)
 # ------------------------------------------------------------------------------
@@ -111,17 +308,18 @@ def sanitize_input(value: Any) -> Any:
 # ------------------------------------------------------------------------------
 # Role / Profile (MR_OnBoardRoleInfo)
 # ------------------------------------------------------------------------------
-def get_profile_by_username(username: str) -> Optional[Dict[str, Any]]:
-    """Return the latest role row for a given username/UPN (case-insensitive)."""
+def get_profile_by_username(username: str, env: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Return the latest role row for a given username/UPN (case-insensitive), optionally scoped to env."""
     try:
         if not username:
             return None
         u = sanitize_input(username.strip().lower())
+        env_sql, env_params = _env_predicate(env)
 
-        with get_db_connection() as conn:
+        with db_session(read_only=True) as conn:
             cur = conn.cursor()
             cur.execute(
-                """
+                f"""
                 SELECT TOP 1
                        display_name,
                        email,
@@ -136,10 +334,10 @@ def get_profile_by_username(username: str) -> Optional[Dict[str, Any]]:
                        ROW_ID
                 FROM MR_OnBoardRoleInfo
                 WHERE 
-                   LOWER(display_name) = ?
+                   LOWER(display_name) = ?{env_sql}
                 ORDER BY COALESCE(editTime, createdTime) DESC
                 """,
-                (u),
+                (u, *env_params),
             )
             row = cur.fetchone()
             if not row:
@@ -151,17 +349,18 @@ def get_profile_by_username(username: str) -> Optional[Dict[str, Any]]:
         traceback.print_exc()
         return None
 
-def get_profile_by_id(username: str) -> Optional[Dict[str, Any]]:
-    """Return the latest role row for a given username/UPN (case-insensitive)."""
+def get_profile_by_id(username: str, env: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Return the latest role row for a given role_id (case-insensitive), optionally scoped to env."""
     try:
         if not username:
             return None
         u = sanitize_input(username.strip().lower())
+        env_sql, env_params = _env_predicate(env)
 
-        with get_db_connection() as conn:
+        with db_session(read_only=True) as conn:
             cur = conn.cursor()
             cur.execute(
-                """
+                f"""
                 SELECT TOP 1
                        display_name,
                        email,
@@ -174,10 +373,10 @@ def get_profile_by_id(username: str) -> Optional[Dict[str, Any]]:
                        role_id,
                        ROW_ID
                 FROM MR_OnBoardRoleInfo
-                WHERE LOWER(role_id) = ?
+                WHERE LOWER(role_id) = ?{env_sql}
                 ORDER BY COALESCE(editTime, createdTime) DESC
                 """,
-                (u),
+                (u, *env_params),
             )
             row = cur.fetchone()
             if not row:
@@ -189,24 +388,47 @@ def get_profile_by_id(username: str) -> Optional[Dict[str, Any]]:
         traceback.print_exc()
         return None
 
+def get_env_for_caller(ident: str) -> Optional[str]:
+    """
+    Env of the caller's latest role row, looked up across all envs by role_id
+    (or by email when `ident` contains "@"); None when the caller is unknown.
+    Used to bind the request env from the caller's identity.
+    """
+    if not ident or not ident.strip():
+        return None
+    key = ident.strip().lower()
+    if "@" in key:
+        env = (get_profile_by_email(key) or {}).get("env")
+    else:
+        env = ROLE_ENV_CACHE.get_or_load(key, lambda: ((get_profile_by_id(key) or {}).get("env") or None))
+    return str(env).strip().lower() if env else None
+
 def get_profile_by_email(email: str, env: Optional[str] = None) -> Optional[Dict[str, Any]]:
     """
     Return the latest role row for a user email.
     If env is provided, scope the search to that environment.
+    Served from PROFILE_CACHE outside a unit of work.
     """
+    if not email:
+        return None
+    if _active_uow() is not None:
+        return _query_profile_by_email(email, env)
+    prof = PROFILE_CACHE.get_or_load(_profile_cache_key(email, env), lambda: _query_profile_by_email(email, env))
+    return dict(prof) if prof else None
+
+def _query_profile_by_email(email: str, env: Optional[str] = None) -> Optional[Dict[str, Any]]:
     try:
-        if not email:
-            return None
 
-        with get_db_connection() as conn:
+        with db_session(read_only=True) as conn:
             cur = conn.cursor()
 
             where_clauses = ["email = ?"]
             params = [sanitize_input(email)]
 
-            if env is not None and str(env).strip() != "":
+            env_sql, env_params = _env_predicate(env)
+            if env_sql:
                 where_clauses.append("env = ?")
-                params.append(sanitize_input(env))
+                params.extend(env_params)
 
             sql = f"""
                 SELECT TOP 1
@@ -240,16 +462,48 @@ def get_profile_by_email(email: str, env: Optional[str] = None) -> Optional[Dict
         traceback.print_exc()
         return None
 
-def get_all_roles() -> Optional[Dict[str, Any]]:
-    """Return the latest role row for a user email."""
+def get_profiles_by_emails(emails: List[str], env: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Latest audit row per email (same ordering as get_profile_by_email), keyed by lowercased email.
+    Emails are lower-cased here and compared to the bare column (case-insensitive
+    collation), so the email index can be used.
+    """
+    wanted = sorted({str(e).strip().lower() for e in emails if str(e or "").strip()})
+    if not wanted:
+        return {}
+    env_sql, env_params = _env_predicate(env)
+    sql = f"""
+        SELECT {", ".join(PROFILE_RETURN_COLUMNS)} FROM (
+            SELECT {", ".join(PROFILE_RETURN_COLUMNS)},
+                   ROW_NUMBER() OVER (PARTITION BY email
+                                      ORDER BY COALESCE(editTime, createdTime) DESC, ROW_ID DESC) AS rn
+            FROM MR_OnBoardRoleInfo
+            WHERE email IN ({{marks}}){env_sql}
+        ) x
+        WHERE rn = 1
+    """
+    try:
+        with db_session(read_only=True) as conn:
+            rows = _fetch_in_chunks(conn.cursor(), sql, wanted, env_params)
+        return {str(r["email"]).strip().lower(): r for r in rows}
+    except Exception as e:
+        return handle_db_exception("get_profiles_by_emails", e, {})
+
+def get_all_roles(env: Optional[str] = None, include_archived: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Return all role rows, optionally scoped to env. include_archived adds the
+    superseded audit rows moved to MR_OnBoardRoleInfo_Archive (PROFILE_RETURN_COLUMNS only).
+    """
     try:
-        with get_db_connection() as conn:
+        env_sql, env_params = _env_predicate(env, first=True)
+        with db_session(read_only=True) as conn:
             cur = conn.cursor()
             cur.execute(
-                """
+                f"""
                 SELECT *
-                FROM MR_OnBoardRoleInfo
-                """
+                FROM {_tiered_source("MR_OnBoardRoleInfo", PROFILE_RETURN_COLUMNS, include_archived)}{env_sql}
+                """,
+                env_params,
             )
             rows = cur.fetchall()
             if not rows:
@@ -270,22 +524,28 @@ def allowed_roles_for(role: str) -> List[str]:
     # Add other roles as needed
     return []
 
-def get_roles_with_role(role: str) -> Optional[List[dict]]:
-    """Return all rows from MR_OnBoardRoleInfo where role is in allowed roles."""
+def get_roles_with_role(role: str, env: Optional[str] = None, columns: Optional[List[str]] = None,
+                        include_archived: bool = False) -> Optional[List[dict]]:
+    """
+    Return all rows from MR_OnBoardRoleInfo where role is in allowed roles (optionally scoped to env).
+    `columns` (see resolve_fields / PROFILE_RETURN_COLUMNS) projects the SELECT list;
+    include_archived adds archived audit rows.
+    """
     try:
         allowed_roles = allowed_roles_for(role)
         if not allowed_roles:
             return []
+        env_sql, env_params = _env_predicate(env)
 
-        with get_db_connection() as conn:
+        with db_session(read_only=True) as conn:
             cur = conn.cursor()
             placeholders = ','.join(['?'] * len(allowed_roles))
             query = f"""
-                SELECT *
-                FROM MR_OnBoardRoleInfo 
-                WHERE role IN ({placeholders})
+                SELECT {_select_list(columns)}
+                FROM {_tiered_source("MR_OnBoardRoleInfo", PROFILE_RETURN_COLUMNS, include_archived)}
+                WHERE role IN ({placeholders}){env_sql}
             """
-            cur.execute(query, allowed_roles)
+            cur.execute(query, [*allowed_roles, *env_params])
             rows = cur.fetchall()
             if not rows:
                 return []
@@ -296,6 +556,11 @@ def get_roles_with_role(role: str) -> Optional[List[dict]]:
         traceback.print_exc()
         return None
 
+PROFILE_UPDATE_COLUMNS = ["role", "edited_by", "editTime", "status", "display_name", "env", "createdTime"]
+PROFILE_LATEST_WHERE = (
+    "email = ? AND editTime = (SELECT MAX(editTime) FROM MR_OnBoardRoleInfo WHERE email = ?)"
+)
+
 def update_profile(
     *,
     email: str,
@@ -319,59 +584,40 @@ def update_profile(
             edit_time = datetime.datetime.utcnow().isoformat()
 
         # Always update these three
-        set_cols = ["role = ?", "edited_by = ?", "editTime = ?"]
-        params   = [
-            sanitize_input(role),
-            sanitize_input(edited_by),
-            edit_time,
-        ]
+        fields: Dict[str, Any] = {
+            "role": sanitize_input(role),
+            "edited_by": sanitize_input(edited_by),
+            "editTime": edit_time,
+        }
 
         # Optional params
         if status is not None:
-            set_cols.append("status = ?")
-            params.append(sanitize_input(status))
-
+            fields["status"] = sanitize_input(status)
         if display_name is not None:
-            set_cols.append("display_name = ?")
-            params.append(sanitize_input(display_name))
-
+            fields["display_name"] = sanitize_input(display_name)
         if env is not None:
-            set_cols.append("env = ?")
-            params.append(sanitize_input(env))
-
+            fields["env"] = sanitize_input(env)
         if createdTime is not None:
-            set_cols.append("createdTime = ?")
-            params.append(createdTime)
+            fields["createdTime"] = createdTime
 
-        set_clause = ", ".join(set_cols)
+        cols = canonical_columns(fields, PROFILE_UPDATE_COLUMNS)
+        params = [fields[c] for c in cols]
 
-        with get_db_connection() as conn:
+        with db_session() as conn:
             cur = conn.cursor()
 
             if role_id:
                 # update specific record
-                sql = f"""
-                    UPDATE MR_OnBoardRoleInfo
-                    SET {set_clause}
-                    WHERE role_id = ? AND email = ?
-                """
+                sql = STATEMENTS.update_sql("MR_OnBoardRoleInfo", cols, "role_id = ? AND email = ?")
                 params_final = params + [role_id, sanitize_input(email)]
             else:
                 # update most recent row for this email
-                sql = f"""
-                    UPDATE MR_OnBoardRoleInfo
-                    SET {set_clause}
-                    WHERE email = ?
-                      AND editTime = (
-                          SELECT MAX(editTime)
-                          FROM MR_OnBoardRoleInfo
-                          WHERE email = ?
-                      )
-                """
+                sql = STATEMENTS.update_sql("MR_OnBoardRoleInfo", cols, PROFILE_LATEST_WHERE)
                 params_final = params + [sanitize_input(email), sanitize_input(email)]
 
-            cur.execute(sql, tuple(params_final))
-            conn.commit()
+            STATEMENTS.execute(cur, sql, params_final)
+            _commit(conn)
+            _profile_changed(email)
             return cur.rowcount > 0
 
     except Exception as e:
@@ -379,66 +625,98 @@ def update_profile(
         traceback.print_exc()
         return False
 
-def insert_profile( display_name: str, email: str, role: str, edited_by: str, createdTime: str, edit_time: str, password: str, status: str, role_id: Optional[uuid.UUID] = None, env: str = "dev" ) -> bool:
-    """Insert a new role row (audit table semantics). Skip role_id if None."""
+PROFILE_INSERT_COLUMNS = ["display_name", "email", "role", "edited_by", "role_id", "createdTime", "editTime", "env", "password", "status"]
+# what the read helpers return (never the password column)
+PROFILE_RETURN_COLUMNS = ["display_name", "email", "role", "edited_by", "createdTime", "editTime", "role_id", "env", "status", "ROW_ID"]
+
+def _first_result_set(cur: pyodbc.Cursor) -> List[Any]:
+    """
+    Skip row-count-only results of a batch and return the rows of the first
+    result set. The rest of the batch is drained so the cursor is free for the
+    next statement (batches run with NOCOUNT OFF, which rowcount checks rely on).
+    """
+    while cur.description is None:
+        if not cur.nextset():
+            return []
+    rows = cur.fetchall()
+    while cur.nextset():
+        pass
+    return rows
+
+def _first_result_row(cur: pyodbc.Cursor) -> Optional[Dict[str, Any]]:
+    """First row of the first result set of a batch, as a dict (see _first_result_set)."""
+    while cur.description is None:
+        if not cur.nextset():
+            return None
+    cols = [c[0] for c in cur.description]
+    rows = _first_result_set(cur)
+    return dict(zip(cols, rows[0])) if rows else None
+
+def insert_profile_returning(display_name: str, email: str, role: str, edited_by: str, createdTime: str, edit_time: str,
+                             password: str, status: str, role_id: Optional[uuid.UUID] = None, env: str = "dev") -> Optional[Dict[str, Any]]:
+    """
+    Insert a new role row (audit table semantics) and return it as stored, in
+    the shape of get_profile_by_email, from the same round trip. None on failure.
+    """
     try:
         if not edit_time:
             edit_time = datetime.datetime.utcnow()
 
-        with get_db_connection() as conn:
+        fields = {
+            "display_name": sanitize_input(display_name),
+            "email": sanitize_input(email),
+            "role": sanitize_input(role),
+            "edited_by": sanitize_input(edited_by),
+            "role_id": role_id,
+            "createdTime": createdTime,
+            "editTime": edit_time,
+            "env": sanitize_input(env),
+            "password": sanitize_input(password),
+            "status": sanitize_input(status),
+        }
+        if not role_id:
+            fields.pop("role_id")   # filled in by dbo.MR_UpdateSubmissionIds
+        cols = canonical_columns(fields, PROFILE_INSERT_COLUMNS)
+        params = [fields[c] for c in cols]
+        returned = ", ".join(f"[{c}]" for c in PROFILE_RETURN_COLUMNS)
+
+        with db_session() as conn:
             cur = conn.cursor()
             if role_id:
-                # Insert with role_id
-                cur.execute(
-                    """
-                    INSERT INTO MR_OnBoardRoleInfo 
-                        (display_name, email, role, edited_by, role_id, createdTime, editTime, env, password, status)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        sanitize_input(display_name),
-                        sanitize_input(email),
-                        sanitize_input(role),
-                        sanitize_input(edited_by),
-                        role_id,
-                        createdTime, edit_time,
-                        sanitize_input(env),
-                        sanitize_input(password),
-                        sanitize_input(status),
-                    ),
-                )
+                sql = STATEMENTS.insert_sql("MR_OnBoardRoleInfo", cols, output=PROFILE_RETURN_COLUMNS)
+                STATEMENTS.execute(cur, sql, params)
             else:
-                cur.execute(
-                    """
-                    INSERT INTO MR_OnBoardRoleInfo 
-                        (display_name, email, role, edited_by, createdTime, editTime, env, password, status)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        sanitize_input(display_name),
-                        sanitize_input(email),
-                        sanitize_input(role),
-                        sanitize_input(edited_by),
-                        createdTime, edit_time,
-                        sanitize_input(env),
-                        sanitize_input(password),
-                        sanitize_input(status),
-                    ),
+                # role_id is assigned by the proc, so capture ROW_ID and read the final row in the same batch
+                sql = (
+                    "DECLARE @ins TABLE (ROW_ID BIGINT); "
+                    + STATEMENTS.insert_sql("MR_OnBoardRoleInfo", cols, output=["ROW_ID"], output_into="@ins")
+                    + "; EXEC dbo.MR_UpdateSubmissionIds; "
+                    f"SELECT {returned} FROM MR_OnBoardRoleInfo WHERE ROW_ID = (SELECT TOP 1 ROW_ID FROM @ins)"
                 )
-                cur.execute("EXEC dbo.MR_UpdateSubmissionIds")
-            conn.commit()
-            return True
+                STATEMENTS.execute(cur, sql, params)
+            row = _first_result_row(cur)
+            _commit(conn)
+            _profile_changed(email)
+            return row or {k: v for k, v in fields.items() if k != "password"}
 
     except Exception as e:
         print(f"[insert_profile] {e}")
         traceback.print_exc()
-        return False
+        return None
+
+def insert_profile( display_name: str, email: str, role: str, edited_by: str, createdTime: str, edit_time: str, password: str, status: str, role_id: Optional[uuid.UUID] = None, env: str = "dev" ) -> bool:
+    """Insert a new role row (audit table semantics). Skip role_id if None."""
+    return insert_profile_returning(
+        display_name=display_name, email=email, role=role, edited_by=edited_by,
+        createdTime=createdTime, edit_time=edit_time, password=password, status=status,
+        role_id=role_id, env=env,
+    ) is not None
 
 def update_role_only(email: str, new_role: str) -> bool:
     """Update only the role field for a user identified by email."""
     try:
         edit_time = datetime.datetime.utcnow()
-        with get_db_connection() as conn:
+        with db_session() as conn:
             cur = conn.cursor()
             cur.execute(
                 """
@@ -452,7 +730,8 @@ def update_role_only(email: str, new_role: str) -> bool:
                     sanitize_input(email),
                 ),
             )
-            conn.commit()
+            _commit(conn)
+            _profile_changed(email)
             return True
     except Exception as e:
         print(f"[update_role_only] {e}")
@@ -465,7 +744,7 @@ def delete_all_profiles(reseed_identity: bool = False, env: str = "dev"):
     Treat NULL env as the provided env (via COALESCE). Returns (ok, deleted_count, message).
     """
     try:
-        with get_db_connection() as conn:
+        with db_session() as conn:
             cur = conn.cursor()
 
             table_name = "[dbo].[MR_OnBoardRoleInfo]"
@@ -487,7 +766,8 @@ def delete_all_profiles(reseed_identity: bool = False, env: str = "dev"):
                 cur.execute(reseed_sql)
                 msg += " Identity reseeded to 0."
 
-            conn.commit()
+            _commit(conn)
+            _profile_changed()
             print(msg)
             return True, deleted, msg
 
@@ -509,7 +789,7 @@ def delete_profile_by_email(email: str, env: str | None = None):
         return False, None, "Email is required"
 
     try:
-        with get_db_connection() as conn:
+        with db_session() as conn:
             cur = conn.cursor()
 
             table_name = "[dbo].[MR_OnBoardRoleInfo]"
@@ -532,7 +812,8 @@ def delete_profile_by_email(email: str, env: str | None = None):
 
             cur.execute(sql, params)
             deleted = cur.rowcount
-            conn.commit()
+            _commit(conn)
+            _profile_changed(email)
 
             msg = (f"Deleted {deleted} row(s) from {table_name} "
                    f"for email='{email}'" + (f" and env='{env}'." if env is not None else "."))
@@ -634,6 +915,168 @@ def seed_roles_from_users_json(path: str = None, env: str = None, dedupe: bool =
     print(f"[seed] file={summary['file']} env={summary['env']} -> inserted={summary['inserted']} skipped={summary['skipped']} failed={summary['failed']}")
     return summary
 
+# ------------------------------------------------------------------------------
+# Bulk seeding (streamed JSON -> prefetch existing keys -> batched executemany)
+# ------------------------------------------------------------------------------
+try:
+    import ijson  # optional: stream very large JSON files instead of json.load
+except ImportError:  # pragma: no cover - falls back to json.load
+    ijson = None
+
+SEED_BATCH_SIZE = int(os.getenv("SEED_BATCH_SIZE", "1000"))
+
+def _iter_json_records(path: str) -> Iterable[Dict[str, Any]]:
+    """
+    Yield records from a JSON file that is either an array of objects or a
+    {key: object} mapping (users.json style). Streams with ijson when installed.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        head = ""
+        while not head:
+            ch = f.read(1)
+            if not ch:
+                return
+            head = ch.strip()
+        f.seek(0)
+
+        if ijson is not None:
+            if head == "[":
+                yield from ijson.items(f, "item", use_float=True)
+            else:
+                for _, rec in ijson.kvitems(f, "", use_float=True):
+                    yield rec
+            return
+
+        data = json.load(f)
+        yield from (data.values() if isinstance(data, dict) else data)
+
+def _chunked(items: Iterable[Any], size: int) -> Iterable[List[Any]]:
+    batch: List[Any] = []
+    for it in items:
+        batch.append(it)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _latest_profiles_by_email(cur: pyodbc.Cursor, env: str) -> Dict[str, Tuple[str, str]]:
+    """One query: latest (display_name, role) per lower(email) for an env."""
+    cur.execute(
+        """
+        SELECT email, display_name, role
+        FROM (
+            SELECT email, display_name, role,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY LOWER(email)
+                       ORDER BY COALESCE(editTime, createdTime) DESC, ROW_ID DESC
+                   ) AS rn
+            FROM MR_OnBoardRoleInfo
+            WHERE env = ?
+        ) t
+        WHERE rn = 1
+        """,
+        (sanitize_input(env),),
+    )
+    return {
+        (email or "").strip().lower(): ((name or "").strip(), (role or "").strip().lower())
+        for email, name, role in cur.fetchall()
+    }
+
+def bulk_seed_roles_from_users_json(path: str = None, env: str = None, dedupe: bool = True,
+                                    batch_size: int = SEED_BATCH_SIZE) -> dict:
+    """
+    Bulk version of seed_roles_from_users_json for large migrations.
+    - streams the file (ijson when available)
+    - prefetches the latest profile per email in a single query for dedupe
+    - inserts with fast_executemany in batches, all inside one transaction
+    - runs dbo.MR_UpdateSubmissionIds once at the end (only if needed)
+    Returns the same summary shape as seed_roles_from_users_json.
+    """
+    path = path or os.getenv("USERS_DB_PATH", "users.json")
+    env  = env  or os.getenv("APP_ENV", "dev")
+
+    summary = {"file": path, "env": env, "total": 0, "inserted": 0, "skipped": 0, "failed": 0, "failures": []}
+
+    cols_with_id = ["display_name", "email", "role", "edited_by", "role_id", "createdTime", "editTime", "env", "password", "status"]
+    cols_no_id   = [c for c in cols_with_id if c != "role_id"]
+    sql_with_id = f"INSERT INTO MR_OnBoardRoleInfo ({', '.join(cols_with_id)}) VALUES ({', '.join('?' for _ in cols_with_id)})"
+    sql_no_id   = f"INSERT INTO MR_OnBoardRoleInfo ({', '.join(cols_no_id)}) VALUES ({', '.join('?' for _ in cols_no_id)})"
+
+    def _rows(existing: Dict[str, Tuple[str, str]]):
+        seen_emails = set()
+        for idx, u in enumerate(_iter_json_records(path)):
+            summary["total"] += 1
+            try:
+                email = (u.get("email") or "").strip().lower()
+                if not email:
+                    summary["failed"] += 1
+                    summary["failures"].append({"index": idx, "reason": "missing email"})
+                    continue
+                if email in seen_emails:
+                    summary["skipped"] += 1
+                    continue
+                seen_emails.add(email)
+
+                display_name = (u.get("display_name") or u.get("name") or email.split("@")[0]).strip()
+                role = (u.get("role") or "simple").strip()
+
+                if dedupe and existing.get(email) == (display_name, role.lower()):
+                    summary["skipped"] += 1
+                    continue
+
+                role_id = _as_uuid_or_none(u.get("role_id") or u.get("idhash") or u.get("id") or None)
+                yield idx, (
+                    sanitize_input(display_name),
+                    sanitize_input(email),
+                    sanitize_input(role),
+                    sanitize_input((u.get("edited_by") or email).strip()),
+                    role_id,
+                    u.get("createdTime"),
+                    u.get("editTime") or datetime.datetime.utcnow(),
+                    sanitize_input(env),
+                    sanitize_input(u.get("password")),
+                    sanitize_input(u.get("status").strip()),
+                )
+            except Exception as e:
+                summary["failed"] += 1
+                summary["failures"].append({"index": idx, "reason": f"{type(e).__name__}: {e}"})
+
+    try:
+        with db_session() as conn:
+            cur = conn.cursor()
+            cur.fast_executemany = True
+            existing = _latest_profiles_by_email(cur, env) if dedupe else {}
+            needs_sp = False
+            try:
+                for batch in _chunked(_rows(existing), batch_size):
+                    with_id = [row for _, row in batch if row[4]]
+                    no_id   = [row[:4] + row[5:] for _, row in batch if not row[4]]
+                    if with_id:
+                        cur.executemany(sql_with_id, with_id)
+                    if no_id:
+                        cur.executemany(sql_no_id, no_id)
+                        needs_sp = True
+                    summary["inserted"] += len(batch)
+
+                if needs_sp:
+                    cur.execute("EXEC dbo.MR_UpdateSubmissionIds")
+                _commit(conn)
+                _profile_changed()
+            except Exception:
+                _rollback(conn)
+                summary["failed"] += summary["inserted"]
+                summary["inserted"] = 0
+                raise
+
+    except Exception as e:
+        summary["failed"] += 1
+        summary["failures"].append({"index": None, "reason": f"{type(e).__name__}: {e}"})
+        traceback.print_exc()
+
+    print(f"[bulk_seed] file={summary['file']} env={summary['env']} -> inserted={summary['inserted']} skipped={summary['skipped']} failed={summary['failed']}")
+    return summary
+
 def elevate_all_roles_to_admin(env: str = "dev", include_null_env: bool = True, only_if_not_admin: bool = True, limit: int | None = None, dry_run: bool = False) -> dict:
     """
     Set role='admin' for all rows in MR_OnBoardRoleInfo for the given env.
@@ -642,7 +1085,7 @@ def elevate_all_roles_to_admin(env: str = "dev", include_null_env: bool = True,
     """
     table = "[dbo].[MR_OnBoardRoleInfo]"
     try:
-        with get_db_connection() as conn:
+        with db_session() as conn:
             cur = conn.cursor()
 
             # Build WHERE
@@ -673,7 +1116,8 @@ def elevate_all_roles_to_admin(env: str = "dev", include_null_env: bool = True,
             if not dry_run:
                 cur.execute(update_sql, tuple(params))
                 updated = cur.rowcount
-                conn.commit()
+                _commit(conn)
+                _profile_changed()
 
             return {
                 "env": env,
@@ -708,8 +1152,42 @@ def elevate_all_roles_to_admin(env: str = "dev", include_null_env: bool = True,
 def load_task_categories(env: str = None) -> Dict[str, Dict[str, Any]]:
     """
     Build a dict keyed by event_key (e.g. 'EmployeeID_Requested') from MR_OnBoardCategory.
-    If env is provided, filter by it.
+    If env is provided, filter by it. Cached per env (see invalidate_task_categories).
     """
+    return CATEGORY_CACHE.get_or_load(env or "", lambda: _query_task_categories(env) or None) or {}
+
+# MR_OnBoardCategory has no sms_message_template column; message templates the
+# table leaves empty are filled from taskcategory.json (keyed by ENV, then event_key)
+TASK_CATEGORY_JSON = os.getenv("TASK_CATEGORY_JSON", os.path.join(os.path.dirname(os.path.abspath(__file__)), "taskcategory.json"))
+CATEGORY_TEMPLATE_FIELDS = ("email_subject", "email_body_template", "sms_message_template")
+_category_templates: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None
+
+def _category_template_defaults() -> Dict[str, Dict[str, Dict[str, Any]]]:
+    global _category_templates
+    if _category_templates is None:
+        try:
+            with open(TASK_CATEGORY_JSON, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            _category_templates = {
+                str(env_key).upper(): {
+                    key: {k: cfg[k] for k in CATEGORY_TEMPLATE_FIELDS if cfg.get(k)}
+                    for key, cfg in (rows or {}).items()
+                }
+                for env_key, rows in data.items()
+            }
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"[load_task_categories] templates from {TASK_CATEGORY_JSON} unavailable: {e}")
+            _category_templates = {}
+    return _category_templates
+
+def _fill_category_templates(row: Dict[str, Any], env: Optional[str]) -> Dict[str, Any]:
+    defaults = _category_template_defaults().get(str(row.get("env") or env or "").upper(), {}).get(row.get("event_key"), {})
+    for k, v in defaults.items():
+        if not row.get(k):
+            row[k] = v
+    return row
+
+def _query_task_categories(env: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
     q = """
         SELECT event_key, env, short_code, task_type, name_prefix, assignedTo, description,
                to_email, to_phone, email_subject, email_body_template
@@ -721,13 +1199,13 @@ def load_task_categories(env: str = None) -> Dict[str, Dict[str, Any]]:
         params = (sanitize_input(env),)
 
     try:
-        with get_db_connection() as conn:
+        with db_session() as conn:
             cur = conn.cursor()
             cur.execute(q, params)
             rows = rows_to_dicts(cur, cur.fetchall())
             out = {}
             for r in rows:
-                out[r["event_key"]] = r
+                out[r["event_key"]] = _fill_category_templates(r, env)
             return out
     except Exception as e:
         print(f"[load_task_categories] {e}")
@@ -736,7 +1214,11 @@ def load_task_categories(env: str = None) -> Dict[str, Dict[str, Any]]:
 
 def handle_db_exception(ctx: str, e: Exception, default):
     """Handle DB exceptions differently in dev vs prod."""
-    if env == "dev":
+    if isinstance(e, CircuitOpenError):
+        raise     # fail fast: the route answers 503 instead of an empty result
+    if is_db_outage(e):
+        DB_BREAKER.record_failure()
+    if get_env() == "dev":
         # Raise full error stack so Flask route catches & returns JSON
         raise
     else:
@@ -762,17 +1244,23 @@ def compose_task_id(onboarding_id: uuid.UUID, short_code: str) -> str:
 #         # add other conversions here if needed (e.g., Decimal -> float)
 #     return obj
 
-def list_all_tasks_simple() -> List[Dict[str, Any]]:
+TASK_LIST_COLUMNS = [
+    "task_id", "name", "description", "task_type", "assignedTo", "employee_full_name",
+    "related_onboarding_id", "manager", "onboarding_id", "to_email", "to_phone",
+    "Status", "created_at", "updated_at", "submission_id", "env", "Row_ID",
+]
+
+def list_all_tasks_simple(env: Optional[str] = None, columns: Optional[List[str]] = None,
+                          include_archived: bool = False) -> List[Dict[str, Any]]:
     try:
-        with get_db_connection() as conn:
+        env_sql, env_params = _env_predicate(env, first=True)
+        with db_session(read_only=True) as conn:
             cur = conn.cursor()
             cur.execute(f"""
-                SELECT task_id, name, description, task_type, assignedTo, employee_full_name,
-                       related_onboarding_id, manager, onboarding_id, to_email, to_phone,
-                       Status, created_at, updated_at, submission_id, env, Row_ID
-                FROM {TASK_TABLE}
+                SELECT {_select_list(columns or TASK_LIST_COLUMNS)}
+                FROM {_tiered_source(TASK_TABLE, TASK_LIST_COLUMNS, include_archived)}{env_sql}
                 ORDER BY created_at DESC
-            """)
+            """, env_params)
             columns = [desc[0] for desc in cur.description]
             rows = cur.fetchall()
 
@@ -792,32 +1280,123 @@ def list_all_tasks_simple() -> List[Dict[str, Any]]:
             return unique_tasks
     except Exception as e:
         print(f"[list_all_tasks_simple] ⚠️ Error: {e}")
-    return handle_db_exception("list_all_tasks_simple", e, [])
+        return handle_db_exception("list_all_tasks_simple", e, [])
 # print(list_all_tasks_simple())
 
-def find_task_by_id(task_id: str) -> Optional[Dict[str, Any]]:
+def find_task_by_id(task_id: str, env: Optional[str] = None, include_archived: bool = False) -> Optional[Dict[str, Any]]:
     try:
-        with get_db_connection() as conn:
+        env_sql, env_params = _env_predicate(env)
+        source = _tiered_source(TASK_TABLE, TASK_LIST_COLUMNS, include_archived)
+        with db_session() as conn:
             cur = conn.cursor()
             cur.execute(
-                f"SELECT * FROM {TASK_TABLE} WHERE task_id = ?",
-                (sanitize_input(task_id),),
+                f"SELECT * FROM {source} WHERE task_id = ?{env_sql}",
+                (sanitize_input(task_id), *env_params),
             )
             row = cur.fetchone()
             return dict(zip([c[0] for c in cur.description], row)) if row else None
     except Exception as e:
         return handle_db_exception("find_task_by_id", e, [])
 
+TASK_DONE_STATUSES = [s.strip() for s in os.getenv("TASK_DONE_STATUSES", "Completed,Resolved,N/A,Closed,Done").split(",") if s.strip()]
+
+def get_task_summary(env: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Task board header numbers computed in SQL (one round trip, two result sets):
+    counts by Status overall / per assignedTo / per task_type, and per-submission
+    completion. A NULL/blank Status counts as "Open", like the board shows it.
+    """
+    env_sql, env_params = _env_predicate(env, first=True)
+    done_marks = ", ".join("?" for _ in TASK_DONE_STATUSES) or "NULL"
+    base = f"""
+        SELECT ISNULL(NULLIF(LTRIM(RTRIM(Status)), ''), 'Open') AS st,
+               ISNULL(assignedTo, '') AS assignee,
+               ISNULL(task_type, '') AS task_type,
+               related_onboarding_id, employee_full_name
+        FROM {TASK_TABLE}{env_sql}
+    """
+    sql = f"""
+        SET NOCOUNT ON;
+        WITH t AS ({base})
+        SELECT st, assignee, task_type, GROUPING(assignee) AS g_assignee, GROUPING(task_type) AS g_type, COUNT(*) AS n
+        FROM t
+        GROUP BY GROUPING SETS ((st), (assignee, st), (task_type, st));
+        WITH t AS ({base})
+        SELECT related_onboarding_id, MAX(employee_full_name) AS employee_full_name, COUNT(*) AS total,
+               SUM(CASE WHEN st IN ({done_marks}) THEN 1 ELSE 0 END) AS done
+        FROM t
+        WHERE related_onboarding_id IS NOT NULL
+        GROUP BY related_onboarding_id;
+        SET NOCOUNT OFF;
+    """
+    params = (*env_params, *env_params, *TASK_DONE_STATUSES)
+    out: Dict[str, Any] = {
+        "env": env, "total": 0, "by_status": {}, "by_assignee": {}, "by_task_type": {},
+        "submissions": [], "done_statuses": TASK_DONE_STATUSES,
+    }
+    try:
+        with db_session(read_only=True) as conn:
+            cur = conn.cursor()
+            cur.execute(sql, params)
+            for st, assignee, task_type, g_assignee, g_type, n in cur.fetchall():
+                n = int(n)
+                if g_assignee and g_type:
+                    out["by_status"][st] = n
+                    out["total"] += n
+                elif not g_assignee:
+                    bucket = out["by_assignee"].setdefault(assignee, {"total": 0})
+                    bucket[st] = n
+                    bucket["total"] += n
+                else:
+                    bucket = out["by_task_type"].setdefault(task_type, {"total": 0})
+                    bucket[st] = n
+                    bucket["total"] += n
+            cur.nextset()
+            for sid, name, total, done in cur.fetchall():
+                total, done = int(total), int(done or 0)
+                out["submissions"].append({
+                    "submission_id": str(sid),
+                    "employee_full_name": name,
+                    "total": total,
+                    "done": done,
+                    "percent_complete": round(100.0 * done / total, 1) if total else 0.0,
+                })
+        return out
+    except Exception as e:
+        return handle_db_exception("get_task_summary", e, out)
+
+def find_tasks_by_ids(task_ids: List[str], env: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Batch find_task_by_id: one connection, chunked IN lists, keyed by task_id."""
+    wanted = sorted({str(t).strip() for t in task_ids if str(t or "").strip()})
+    if not wanted:
+        return {}
+    env_sql, env_params = _env_predicate(env)
+    try:
+        with db_session(read_only=True) as conn:
+            rows = _fetch_in_chunks(
+                conn.cursor(), f"SELECT * FROM {TASK_TABLE} WHERE task_id IN ({{marks}}){env_sql}", wanted, env_params
+            )
+        return {str(r["task_id"]): r for r in rows}
+    except Exception as e:
+        return handle_db_exception("find_tasks_by_ids", e, {})
+
 def db_find_task(employee_full_name: str, task_type: str, related_onboarding_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+    """
+    Latest task of this type for the submission, hot table first, then
+    MR_OnBoardTask_Archive; archived rows come back with is_archived = 1.
+    """
+    cols = ", ".join(f"[{c}]" for c in TASK_LIST_COLUMNS)
     try:
-        with get_db_connection() as conn:
+        with db_session() as conn:
             cur = conn.cursor()
             cur.execute(
                 f"""
                 SELECT TOP 1 *
-                FROM {TASK_TABLE}
+                FROM (SELECT {cols}, 0 AS is_archived FROM {TASK_TABLE}
+                      UNION ALL
+                      SELECT {cols}, 1 AS is_archived FROM {TASK_TABLE}_Archive) AS tiered
                 WHERE employee_full_name = ? AND task_type = ? AND related_onboarding_id = ?
-                ORDER BY updated_at DESC
+                ORDER BY is_archived, updated_at DESC
                 """,
                 (sanitize_input(employee_full_name), sanitize_input(task_type), related_onboarding_id),
             )
@@ -826,68 +1405,219 @@ def db_find_task(employee_full_name: str, task_type: str, related_onboarding_id:
     except Exception as e:
         return handle_db_exception("db_find_task", e, [])
 
-def db_insert_task(task: Dict[str, Any]) -> bool:
-    cols = [
-        "task_id","name","description","task_type","assignedTo","employee_full_name",
-        "related_onboarding_id","manager","onboarding_id","to_email","to_phone","Status",
-        "created_at","updated_at","submission_id"
-    ]
-    now = datetime.datetime.utcnow()
+TASK_INSERT_COLS = [
+    "task_id","name","description","task_type","assignedTo","employee_full_name",
+    "related_onboarding_id","manager","onboarding_id","to_email","to_phone","Status",
+    "created_at","updated_at","submission_id"
+]
+TASK_INSERT_SQL = f"""
+    INSERT INTO {TASK_TABLE} ({", ".join("[" + c + "]" for c in TASK_INSERT_COLS)})
+    VALUES ({", ".join("?" for _ in TASK_INSERT_COLS)})
+"""
+
+def _task_insert_values(task: Dict[str, Any], now: datetime.datetime) -> Tuple:
     task = {**task}
     task.setdefault("Status", "Open")
     task.setdefault("created_at", now)
     task.setdefault("updated_at", now)
-    values = [task.get(c) for c in cols]
-    q = f"""
-        INSERT INTO {TASK_TABLE} ({", ".join("[" + c + "]" for c in cols)})
-        VALUES ({", ".join("?" for _ in cols)})
-    """
+    return tuple(task.get(c) for c in TASK_INSERT_COLS)
+
+# columns carried by task change events (see change_events.py)
+TASK_EVENT_COLS = ["task_id", "task_type", "assignedTo", "related_onboarding_id", "Status"]
+
+def _task_event_fields(task: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "task_id": task.get("task_id"),
+        "task_type": task.get("task_type"),
+        "assignee": task.get("assignedTo"),
+        "submission_id": task.get("related_onboarding_id") or task.get("onboarding_id"),
+        "status": task.get("Status"),
+    }
+
+def db_insert_task(task: Dict[str, Any]) -> bool:
+    values = _task_insert_values(task, datetime.datetime.utcnow())
+    q = TASK_INSERT_SQL
     try:
-        with get_db_connection() as conn:
+        with db_session() as conn:
             cur = conn.cursor()
             cur.execute(q, tuple(values))
-            conn.commit()
+            _commit(conn)
             print(f"[db_insert_task] inserted {task.get('task_id')}")
-            return True
+        _tasks_changed()
+        _publish("task", "created", **_task_event_fields(task))
+        return True
     except Exception as e:
         return handle_db_exception("db_insert_task", e, [])
 
+# columns clients may change through the single and bulk task updates
+TASK_UPDATABLE_COLUMNS = [
+    "name", "description", "task_type", "assignedTo", "employee_full_name",
+    "manager", "to_email", "to_phone", "Status",
+]
+
 def update_task_in_db_list(task_id: str, fields: Dict[str, Any]) -> bool:
+    """Update one task; keys outside TASK_UPDATABLE_COLUMNS (env, ids, ...) are ignored."""
+    fields = {k: v for k, v in (fields or {}).items() if k in TASK_UPDATABLE_COLUMNS}
     if not fields:
         return True
-    fields = {k: v for k, v in fields.items() if k.lower() != "task_id"}
     fields["updated_at"] = datetime.datetime.utcnow()
-    sets = ", ".join(f"[{k}] = ?" for k in fields.keys())
-    vals = list(fields.values()) + [task_id]
-    q = f"UPDATE {TASK_TABLE} SET {sets} WHERE task_id = ?"
     try:
-        with get_db_connection() as conn:
+        cols = canonical_columns(fields, TASK_UPDATABLE_COLUMNS + ["updated_at"])
+        q = STATEMENTS.update_sql(TASK_TABLE, cols, "task_id = ?", output=TASK_EVENT_COLS)
+        vals = [fields[c] for c in cols] + [task_id]
+        with db_session() as conn:
             cur = conn.cursor()
-            cur.execute(q, tuple(vals))
-            conn.commit()
-            return cur.rowcount > 0
+            STATEMENTS.execute(cur, q, vals)
+            updated = rows_to_dicts(cur, cur.fetchall())
+            _commit(conn)
+        _tasks_changed()
+        _publish_many("task", "updated", (_task_event_fields(r) for r in updated))
+        return len(updated) > 0
     except Exception as e:
         return handle_db_exception("update_task_in_db_list", e, [])
         return False
 
+def bulk_update_tasks(updates: List[Dict[str, Any]], env: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Apply many {"task_id": ..., <field>: <value>} updates in one transaction.
+    Fields are checked against TASK_UPDATABLE_COLUMNS; existing tasks are locked
+    and looked up first (scoped to env), then each column-set is applied with
+    one fast_executemany. Returns per-task results in input order.
+    """
+    summary: Dict[str, Any] = {"total": len(updates), "updated": 0, "not_found": 0, "invalid": 0, "results": []}
+    results: List[Optional[Dict[str, Any]]] = [None] * len(updates)
+    valid: List[Tuple[int, str, Dict[str, Any]]] = []
+
+    for i, item in enumerate(updates):
+        task_id = str((item or {}).get("task_id") or "").strip() if isinstance(item, dict) else ""
+        fields = {k: v for k, v in (item or {}).items() if k != "task_id"} if isinstance(item, dict) else {}
+        unknown = [k for k in fields if k not in TASK_UPDATABLE_COLUMNS]
+        if not task_id or not fields or unknown:
+            summary["invalid"] += 1
+            error = "task_id is required" if not task_id else (
+                f"unknown columns: {', '.join(map(str, unknown))}" if unknown else "no fields to update")
+            results[i] = {"task_id": task_id or None, "ok": False, "error": error}
+            continue
+        valid.append((i, task_id, {k: sanitize_input(v) for k, v in fields.items()}))
+
+    if valid:
+        env_sql, env_params = _env_predicate(env)
+        now = datetime.datetime.utcnow()
+        try:
+            with db_session() as conn:
+                cur = conn.cursor()
+                locked = _fetch_in_chunks(
+                    cur,
+                    f"SELECT {', '.join('[' + c + ']' for c in TASK_EVENT_COLS)} FROM {TASK_TABLE} WITH (UPDLOCK) "
+                    f"WHERE task_id IN ({{marks}}){env_sql}",
+                    sorted({tid for _, tid, _ in valid}),
+                    env_params,
+                )
+                existing = {str(r["task_id"]): r for r in locked}
+
+                # repeated task_ids collapse into one row (later fields win), then group by column-set
+                merged: Dict[str, Dict[str, Any]] = {}
+                applied: List[Tuple[int, str, Dict[str, Any]]] = []
+                for i, task_id, fields in valid:
+                    if task_id not in existing:
+                        summary["not_found"] += 1
+                        results[i] = {"task_id": task_id, "ok": False, "error": "not found"}
+                        continue
+                    merged[task_id] = {**merged.get(task_id, {}), **fields}
+                    applied.append((i, task_id, fields))
+
+                groups: Dict[Tuple[str, ...], List[Tuple]] = {}
+                for task_id, fields in merged.items():
+                    row = {**fields, "updated_at": now}
+                    cols = canonical_columns(row)
+                    groups.setdefault(cols, []).append(tuple(row[c] for c in cols) + (task_id,))
+
+                cur.fast_executemany = True
+                for cols, params in groups.items():
+                    sql = STATEMENTS.update_sql(TASK_TABLE, cols, "task_id = ?")
+                    cur.executemany(sql, params)
+                _commit(conn)
+        except Exception as e:
+            print(f"[bulk_update_tasks] {e}")
+            traceback.print_exc()
+            for i, task_id, _ in valid:
+                if results[i] is None:
+                    results[i] = {"task_id": task_id, "ok": False, "error": f"transaction failed: {e}"}
+            summary["failed"] = len(valid) - summary["not_found"]
+            summary["results"] = results
+            return summary
+
+        for i, task_id, _ in applied:
+            summary["updated"] += 1
+            results[i] = {"task_id": task_id, "ok": True}
+        _tasks_changed()
+        _publish_many("task", "updated", (_task_event_fields({**existing[tid], **fields}) for tid, fields in merged.items()))
+
+    summary["results"] = results
+    return summary
+
 def remove_task_by_id(task_id: str) -> bool:
     try:
-        with get_db_connection() as conn:
+        with db_session() as conn:
             cur = conn.cursor()
-            cur.execute(f"DELETE FROM {TASK_TABLE} WHERE task_id = ?", (task_id,))
-            conn.commit()
-            return cur.rowcount > 0
+            cur.execute(
+                f"DELETE FROM {TASK_TABLE} OUTPUT {', '.join('DELETED.[' + c + ']' for c in TASK_EVENT_COLS)} WHERE task_id = ?",
+                (task_id,),
+            )
+            deleted = rows_to_dicts(cur, cur.fetchall())
+            _commit(conn)
+        _tasks_changed()
+        _publish_many("task", "deleted", (_task_event_fields(r) for r in deleted))
+        return len(deleted) > 0
     except Exception as e:
         return handle_db_exception("remove_task_by_id", e, [])
 
 # ------------------------------------------------------------------------------
 # OnBoardRequestForm CRUD (with PayRate encryption in DB / decryption on read)
 # ------------------------------------------------------------------------------
-def get_onboard_all() -> pd.DataFrame:
+# Full column whitelist for OnBoardRequestForm writes (explicitly defined for safety)
+ONBOARD_COLUMNS = [
+    "Type",
+    "adminSpField",
+    "ProjectedStartDate",
+    "LegalFirstName",
+    "LegalMiddleName",
+    "LegalLastName",
+    "Suffix",
+    "employee_email",
+    "PositionTitle",
+    "Manager",
+    "Department",
+    "Location",
+    "PayRateType",
+    "PayRate",
+    "AdditionType",
+    "env",
+    "IsReHire",
+    "IsDriver",
+    "EmployeeID_Requested",
+    "PurchasingCard_Requested",
+    "GasCard_Requested",
+    "EmailAddress_Provided",
+    "MobilePhone_Requested",
+    "TLCBonusEligible",
+    "NoteField",
+    "Createdby",
+    "CreatedAt",
+    "UpdatedAt",
+]
+
+def get_onboard_all(env: Optional[str] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    All submissions as a DataFrame. `columns` (see resolve_fields /
+    ONBOARD_EXPORT_COLUMNS) projects the SELECT list; PayRate is only
+    decrypted (and undecryptable rows dropped) when it is selected.
+    """
     try:
-        with get_db_connection() as conn:
+        env_sql, env_params = _env_predicate(env, first=True)
+        with db_session(read_only=True) as conn:
             cur = conn.cursor()
-            cur.execute("SELECT * FROM OnBoardRequestForm")
+            cur.execute(f"SELECT {_select_list(columns)} FROM OnBoardRequestForm{env_sql}", env_params)
             rows = cur.fetchall()
             cols = [c[0] for c in cur.description]
             df = pd.DataFrame.from_records(rows, columns=cols)
@@ -905,118 +1635,127 @@ def get_onboard_all() -> pd.DataFrame:
     except Exception as e:
         return handle_db_exception("get_onboard_all", e, [])
         
+def get_submission_counts(created_by: Optional[str] = None, env: Optional[str] = None,
+                          today: Optional[datetime.date] = None) -> Dict[str, Any]:
+    """Dashboard totals from the rollup table (primary-key lookups); raises if it's unavailable."""
+    with db_session(read_only=True) as conn:
+        return submission_rollup.read_counts(
+            conn.cursor(), env if env is not None else get_env(), created_by,
+            today or datetime.datetime.now().date(),
+        )
+
 # pd.set_option('display.max_rows', None)
 # pd.set_option('display.max_columns', None)
 # print(get_onboard_all())
 
-def get_onboard_request_by_id(submission_id: uuid) -> Optional[Dict[str, Any]]:
+def _decode_onboard_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Decrypt PayRate back to a number (dropped when it can't be decrypted)."""
+    if "PayRate" in record:
+        dec = decrypt_aes_cbc(str(record["PayRate"]))
+        if not dec:
+            record.pop("PayRate", None)
+        else:
+            try:
+                record["PayRate"] = float(dec) if "." in dec else int(dec)
+            except Exception:
+                record["PayRate"] = dec
+    return record
+
+def get_onboard_request_by_id(submission_id: uuid, env: Optional[str] = None) -> Optional[Dict[str, Any]]:
     try:
-        with get_db_connection() as conn:
+        env_sql, env_params = _env_predicate(env)
+        with db_session(read_only=True) as conn:
             cur = conn.cursor()
-            cur.execute("SELECT * FROM OnBoardRequestForm WHERE submission_id = ?", (submission_id,))
+            cur.execute(f"SELECT * FROM OnBoardRequestForm WHERE submission_id = ?{env_sql}", (submission_id, *env_params))
             row = cur.fetchone()
             if not row:
                 return None
-            record = dict(zip([c[0] for c in cur.description], row))
-            if "PayRate" in record:
-                dec = decrypt_aes_cbc(str(record["PayRate"]))
-                if not dec:
-                    record.pop("PayRate", None)
-                else:
-                    try:
-                        record["PayRate"] = float(dec) if "." in dec else int(dec)
-                    except Exception:
-                        record["PayRate"] = dec
-            return record
+            return _decode_onboard_record(dict(zip([c[0] for c in cur.description], row)))
     except Exception as e:
         return handle_db_exception("get_onboard_request_by_id", e, [])
         
-def insert_onboard_request(request_data: Dict[str, Any]) -> Optional[int]:
+def get_onboard_requests_by_ids(submission_ids: List[Any], env: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Batch get_onboard_request_by_id: one connection, chunked IN lists, PayRate decrypted, keyed by id."""
+    wanted = sorted({uuid.UUID(str(i)) for i in submission_ids}, key=str)
+    if not wanted:
+        return {}
+    env_sql, env_params = _env_predicate(env)
     try:
-        # Copy request data and filter out primary key fields
-        request_data = {
-            k: v
-            for k, v in (request_data or {}).items()
-            if isinstance(k, str) and k.lower() not in {"id", "submission_id"}
-        }
+        with db_session(read_only=True) as conn:
+            rows = _fetch_in_chunks(
+                conn.cursor(), f"SELECT * FROM OnBoardRequestForm WHERE submission_id IN ({{marks}}){env_sql}",
+                wanted, env_params,
+            )
+        return {str(r["submission_id"]).lower(): _decode_onboard_record(r) for r in rows}
+    except Exception as e:
+        return handle_db_exception("get_onboard_requests_by_ids", e, {})
+
+def _prepare_onboard_insert(request_data: Dict[str, Any], now: datetime.datetime) -> Dict[str, Any]:
+    """Filter, encrypt and sanitize one submission; returned dict is in ONBOARD_COLUMNS order."""
+    # Copy request data and filter out primary key fields
+    request_data = {
+        k: v
+        for k, v in (request_data or {}).items()
+        if isinstance(k, str) and k.lower() not in {"id", "submission_id"}
+    }
 
-        # Add timestamps
-        now = datetime.datetime.utcnow()
-        request_data["UpdatedAt"] = now
-        request_data["CreatedAt"] = now
+    # Add timestamps
+    request_data["UpdatedAt"] = now
+    request_data["CreatedAt"] = now
+
+    # Sanitize data
+    sanitized = {}
+    for k, v in request_data.items():
+        if k.lower() == "payrate":
+            sanitized[k] = encrypt_aes_cbc(str(v))
+        elif k.lower() == "email":
+            sanitized[k] = str(v).strip()
+        else:
+            sanitized[k] = sanitize_input(v)
 
-        # Sanitize data
-        sanitized = {}
-        for k, v in request_data.items():
-            if k.lower() == "payrate":
-                sanitized[k] = encrypt_aes_cbc(str(v))
-            elif k.lower() == "email":
-                sanitized[k] = str(v).strip()
-            else:
-                sanitized[k] = sanitize_input(v)
+    sanitized["env"] = get_env()
 
-        valid_columns = [
-        "Type",
-        "adminSpField",
-        "ProjectedStartDate",
-        "LegalFirstName",
-        "LegalMiddleName",
-        "LegalLastName",
-        "Suffix",
-        "employee_email",
-        "PositionTitle",
-        "Manager",
-        "Department",
-        "Location",
-        "PayRateType",
-        "PayRate",
-        "AdditionType",
-        "env",
-        "IsReHire",
-        "IsDriver",
-        "EmployeeID_Requested",
-        "PurchasingCard_Requested",
-        "GasCard_Requested",
-        "EmailAddress_Provided",
-        "MobilePhone_Requested",
-        "TLCBonusEligible",
-        "NoteField",
-        "Createdby",
-        "CreatedAt",
-        "UpdatedAt",
-        ]
-        global env
-        sanitized["env"] = env
-
-        # 3️⃣ Rebuild in the exact order of valid_columns
-        sanitized = {col: sanitized[col] for col in valid_columns if col in sanitized}
-
-        # Build SQL
-        cols = ", ".join(f"[{k}]" for k in sanitized.keys())
-        vals = ", ".join("?" for _ in sanitized)
-        sql = f"INSERT INTO OnBoardRequestForm ({cols}) VALUES ({vals})"
-
-        with get_db_connection() as conn:
-            cur = conn.cursor()
-            cur.execute(sql, tuple(sanitized.values()))
-            print(sql, tuple(sanitized.values()))
+    # 3️⃣ Rebuild in the exact order of ONBOARD_COLUMNS
+    return {col: sanitized[col] for col in ONBOARD_COLUMNS if col in sanitized}
 
-            # If table has an identity column, fetch new ID
-            new_id = None
-            try:
-                cur.execute("SELECT SCOPE_IDENTITY()")
-                new_id = cur.fetchone()[0]
-            except Exception:
-                pass
+def insert_onboard_request(request_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Insert one submission and return the persisted row (generated submission_id,
+    timestamps, ...) from the same round trip, PayRate decrypted.
+    """
+    try:
+        sanitized = _prepare_onboard_insert(request_data, datetime.datetime.utcnow())
+
+        # sanitized is already in ONBOARD_COLUMNS order -> one statement per column-set.
+        # OUTPUT needs INTO when the table has triggers, so capture the key and read the row back.
+        sql = (
+            "DECLARE @ins TABLE (submission_id UNIQUEIDENTIFIER); "
+            + STATEMENTS.insert_sql("OnBoardRequestForm", tuple(sanitized.keys()), output=["submission_id"], output_into="@ins")
+            + "; SELECT * FROM OnBoardRequestForm WHERE submission_id = (SELECT TOP 1 submission_id FROM @ins)"
+        )
 
-            conn.commit()
-            return new_id
+        with db_session() as conn:
+            cur = conn.cursor()
+            STATEMENTS.execute(cur, sql, tuple(sanitized.values()))
+            row = _first_result_row(cur)
+            if row:
+                submission_rollup.apply_deltas(cur, submission_rollup.deltas_for(
+                    [submission_rollup.rollup_key(row.get("env"), row.get("Createdby"), row.get("CreatedAt"))]
+                ))
+            _commit(conn)
+        if not row:
+            return None
+        _publish("submission", "created", submission_id=row.get("submission_id"), created_by=row.get("Createdby"))
+        return _decode_onboard_record(row)
 
     except Exception as e:
         print(f"[insert_onboard_request] {e}")
         traceback.print_exc()
         raise
     
+# columns that decide which rollup bucket a submission is counted in
+ROLLUP_COLUMNS = {"env", "Createdby", "CreatedAt"}
+
 def update_onboard_request(submission_id: uuid.UUID, update_data: Dict[str, Any]) -> bool:
     try:
         # 1️⃣ Normalize incoming keys (trim whitespace etc.)
@@ -1048,64 +1787,44 @@ def update_onboard_request(submission_id: uuid.UUID, update_data: Dict[str, Any]
             else:
                 sanitized[k] = sanitize_input(v)
 
-        # 5️⃣ Full column whitelist (explicitly defined for safety)
-        valid_columns = [
-            "Type",
-            "adminSpField",
-            "ProjectedStartDate",
-            "LegalFirstName",
-            "LegalMiddleName",
-            "LegalLastName",
-            "Suffix",
-            "employee_email",
-            "PositionTitle",
-            "Manager",
-            "Department",
-            "Location",
-            "PayRateType",
-            "PayRate",
-            "AdditionType",
-            "env",
-            "IsReHire",
-            "IsDriver",
-            "EmployeeID_Requested",
-            "PurchasingCard_Requested",
-            "GasCard_Requested",
-            "EmailAddress_Provided",
-            "MobilePhone_Requested",
-            "TLCBonusEligible",
-            "NoteField",
-            "Createdby",
-            "CreatedAt",
-            "UpdatedAt",
-        ]
-
-        # 6️⃣ Keep only known columns
-        sanitized = {k: v for k, v in sanitized.items() if k in valid_columns}
-
-        if not sanitized:
+        # 6️⃣ Keep only known columns, in canonical ONBOARD_COLUMNS order
+        cols = canonical_columns(sanitized, ONBOARD_COLUMNS)
+
+        if not cols:
             print("⚠️ No valid fields to update.")
             return False
 
-        # 7️⃣ Construct SQL safely
-        set_clause = ", ".join(f"[{col}] = ?" for col in sanitized.keys())
-        sql = f"""
-        UPDATE OnBoardRequestForm
-        SET {set_clause}
-        WHERE submission_id = ?
-        """
+        # 7️⃣ Cached statement text for this column-set
+        sql = STATEMENTS.update_sql("OnBoardRequestForm", cols, "submission_id = ?")
 
         # Add parameters (in order)
-        params = list(sanitized.values()) + [uuid.UUID(str(submission_id))]
+        params = [sanitized[c] for c in cols] + [uuid.UUID(str(submission_id))]
 
         # 8️⃣ Execute
-        with get_db_connection() as conn:
+        with db_session() as conn:
             cur = conn.cursor()
+            before = None
+            if ROLLUP_COLUMNS.intersection(cols):
+                # the row moves between rollup buckets: lock + read its old key in this transaction
+                cur.execute(
+                    "SELECT env, Createdby, CreatedAt FROM OnBoardRequestForm WITH (UPDLOCK) WHERE submission_id = ?",
+                    (params[-1],),
+                )
+                before = cur.fetchone()
             print(f"[SQL EXEC]: {sql}")
             print(f"[PARAMS]: {tuple(params)}")
-            cur.execute(sql, tuple(params))
-            conn.commit()
+            STATEMENTS.execute(cur, sql, params)
             ok = (cur.rowcount or 0) > 0
+            if ok and before is not None:
+                old = {"env": before[0], "Createdby": before[1], "CreatedAt": before[2]}
+                new = {**old, **{c: sanitized[c] for c in ROLLUP_COLUMNS.intersection(cols)}}
+                deltas = submission_rollup.deltas_for([submission_rollup.rollup_key(old["env"], old["Createdby"], old["CreatedAt"])], -1)
+                for k, n in submission_rollup.deltas_for([submission_rollup.rollup_key(new["env"], new["Createdby"], new["CreatedAt"])]).items():
+                    deltas[k] = deltas.get(k, 0) + n
+                submission_rollup.apply_deltas(cur, deltas)
+            _commit(conn)
+        if ok:
+            _publish("submission", "updated", submission_id=submission_id)
         return ok
 
     except Exception as e:
@@ -1115,16 +1834,205 @@ def update_onboard_request(submission_id: uuid.UUID, update_data: Dict[str, Any]
 
 def delete_onboard_request(id: int) -> bool:
     try:
-        with get_db_connection() as conn:
+        with db_session() as conn:
             cur = conn.cursor()
-            cur.execute("DELETE FROM OnBoardRequestForm WHERE submission_id = ?", (sanitize_input(id),))
-            conn.commit()
-            return cur.rowcount > 0
+            # OUTPUT ... INTO: a bare OUTPUT clause is rejected on tables with triggers
+            cur.execute(
+                "DECLARE @del TABLE (env NVARCHAR(64), Createdby NVARCHAR(256), CreatedAt DATETIME2); "
+                "DELETE FROM OnBoardRequestForm OUTPUT DELETED.env, DELETED.Createdby, DELETED.CreatedAt INTO @del "
+                "WHERE submission_id = ?; "
+                "SELECT env, Createdby, CreatedAt FROM @del",
+                (sanitize_input(id),),
+            )
+            deleted = _first_result_set(cur)
+            submission_rollup.apply_deltas(cur, submission_rollup.deltas_for(
+                (submission_rollup.rollup_key(*r) for r in deleted), -1
+            ))
+            _commit(conn)
+            ok = len(deleted) > 0
+        if ok:
+            _publish("submission", "deleted", submission_id=id)
+        return ok
     except Exception as e:
         print(f"[delete_onboard_request] {e}")
         traceback.print_exc()
         return False
 
+# ------------------------------------------------------------------------------
+# Bulk import / streaming export for OnBoardRequestForm
+# ------------------------------------------------------------------------------
+ONBOARD_BIT_COLUMNS = {
+    "IsReHire", "IsDriver", "EmployeeID_Requested", "PurchasingCard_Requested",
+    "GasCard_Requested", "MobilePhone_Requested", "TLCBonusEligible",
+}
+ONBOARD_EXPORT_COLUMNS = ["submission_id"] + ONBOARD_COLUMNS
+BULK_INSERT_BATCH_SIZE = int(os.getenv("BULK_INSERT_BATCH_SIZE", "500"))
+
+def _coerce_onboard_row(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normalize a row coming from CSV/JSON lines: trim keys, blank -> None,
+    "true"/"false" strings -> bool for bit columns. Raises ValueError on bad values.
+    """
+    if isinstance(raw, Exception):  # parse error forwarded by the caller
+        raise ValueError(str(raw))
+    if not isinstance(raw, dict):
+        raise ValueError("row must be an object")
+    row: Dict[str, Any] = {}
+    for k, v in raw.items():
+        if not isinstance(k, str):
+            continue
+        k = k.strip()
+        if isinstance(v, str):
+            v = v.strip()
+            if v == "":
+                v = None
+        if k in ONBOARD_BIT_COLUMNS and isinstance(v, str):
+            lv = v.lower()
+            if lv in ("true", "1", "yes", "y"):
+                v = True
+            elif lv in ("false", "0", "no", "n"):
+                v = False
+            else:
+                raise ValueError(f"{k}: expected true/false, got {v!r}")
+        row[k] = v
+
+    if not any(k in ONBOARD_COLUMNS for k in row):
+        raise ValueError("row has no known OnBoardRequestForm columns")
+    if row.get("PayRate") is not None:
+        try:
+            float(row["PayRate"])
+        except (TypeError, ValueError):
+            raise ValueError(f"PayRate: not a number ({row['PayRate']!r})")
+    if row.get("ProjectedStartDate") is not None and pd.isna(pd.to_datetime(row["ProjectedStartDate"], errors="coerce")):
+        raise ValueError(f"ProjectedStartDate: not a date ({row['ProjectedStartDate']!r})")
+    return row
+
+def bulk_insert_onboard_requests(rows: Iterable[Dict[str, Any]], dry_run: bool = False,
+                                 batch_size: int = BULK_INSERT_BATCH_SIZE,
+                                 generate_tasks: bool = True,
+                                 on_inserted: Optional[Callable[[uuid.UUID, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Validate and insert many submissions.
+    - every row gets a result entry {"row", "ok", "submission_id" | "error"}
+    - valid rows are encrypted/sanitized like insert_onboard_request, given a
+      server-generated submission_id and inserted with fast_executemany
+      (grouped by column set) in one transaction per batch
+    - after each batch commits, tasks are generated with one category lookup,
+      or handed to `on_inserted(submission_id, row)` (e.g. to enqueue them) instead
+    """
+    results: List[Dict[str, Any]] = []
+    summary = {"total": 0, "inserted": 0, "failed": 0, "dry_run": dry_run, "results": results}
+    now = datetime.datetime.utcnow()
+
+    def _valid_rows():
+        for i, raw in enumerate(rows):
+            summary["total"] += 1
+            try:
+                row = _coerce_onboard_row(raw)
+                prepared = _prepare_onboard_insert(row, now)
+            except Exception as e:
+                summary["failed"] += 1
+                results.append({"row": i, "ok": False, "error": str(e)})
+                continue
+            yield i, row, prepared
+
+    if dry_run:
+        for i, _, _ in _valid_rows():
+            results.append({"row": i, "ok": True})
+        results.sort(key=lambda r: r["row"])
+        return summary
+
+    env = get_env()
+    categories = _get_category_map(env) if generate_tasks and on_inserted is None else {}
+    try:
+        with db_session() as conn:
+            cur = conn.cursor()
+            cur.fast_executemany = True
+            for batch in _chunked(_valid_rows(), batch_size):
+                groups: Dict[Tuple[str, ...], List[Tuple]] = {}
+                created = []
+                for i, row, prepared in batch:
+                    sid = uuid.uuid4()
+                    cols = ("submission_id",) + tuple(prepared.keys())
+                    groups.setdefault(cols, []).append((sid,) + tuple(prepared.values()))
+                    created.append((i, row, sid))
+                try:
+                    for cols, params in groups.items():
+                        # cols is submission_id + ONBOARD_COLUMNS order: the same statement per column-set
+                        cur.executemany(STATEMENTS.insert_sql("OnBoardRequestForm", cols), params)
+                    submission_rollup.apply_deltas(cur, submission_rollup.deltas_for(
+                        submission_rollup.rollup_key(p.get("env"), p.get("Createdby"), p.get("CreatedAt"))
+                        for _, _, p in batch
+                    ))
+                    _commit(conn)
+                    _publish_many("submission", "created", (
+                        {"submission_id": sid, "created_by": row.get("Createdby")} for _, row, sid in created
+                    ))
+                except Exception as e:
+                    _rollback(conn)
+                    traceback.print_exc()
+                    for i, _, _ in created:
+                        summary["failed"] += 1
+                        results.append({"row": i, "ok": False, "error": f"batch insert failed: {e}"})
+                    continue
+
+                for i, row, sid in created:
+                    summary["inserted"] += 1
+                    results.append({"row": i, "ok": True, "submission_id": str(sid)})
+                    if generate_tasks:
+                        try:
+                            if on_inserted is not None:
+                                on_inserted(sid, row)
+                            else:
+                                manage_onboarding_tasks({**row, "submission_id": sid}, env=env, categories=categories)
+                        except Exception as e:
+                            print(f"[bulk_insert_onboard_requests] task generation failed for {sid}: {e}")
+                            traceback.print_exc()
+    except Exception as e:
+        print(f"[bulk_insert_onboard_requests] {e}")
+        traceback.print_exc()
+        raise
+
+    results.sort(key=lambda r: r["row"])
+    return summary
+
+def iter_onboard_requests(columns: Optional[List[str]] = None, created_by: Optional[str] = None,
+                          env: Optional[str] = None, chunk_size: int = 500) -> Iterable[Dict[str, Any]]:
+    """
+    Stream OnBoardRequestForm rows as dicts (fetchmany, no DataFrame).
+    `columns` must be a subset of ONBOARD_EXPORT_COLUMNS; PayRate is decrypted.
+    """
+    cols = [c for c in (columns or ONBOARD_EXPORT_COLUMNS) if c in ONBOARD_EXPORT_COLUMNS]
+    if not cols:
+        raise ValueError("no valid columns selected")
+
+    where: List[str] = []
+    params: List[Any] = []
+    if env:
+        where.append("env = ?")
+        params.append(sanitize_input(env))
+    if created_by:
+        where.append("LOWER(LTRIM(RTRIM(Createdby))) = ?")
+        params.append(sanitize_input(created_by.strip().lower()))
+
+    sql = f"SELECT {', '.join(f'[{c}]' for c in cols)} FROM OnBoardRequestForm"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY CreatedAt"
+
+    with db_session(read_only=True) as conn:
+        cur = conn.cursor()
+        cur.execute(sql, tuple(params))
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            for r in rows:
+                rec = dict(zip(cols, r))
+                if "PayRate" in rec and rec["PayRate"] is not None:
+                    rec["PayRate"] = decrypt_aes_cbc(str(rec["PayRate"]))
+                yield rec
+
 # ------------------------------------------------------------------------------
 # Employee Status Changes table (encrypt selected columns)
 # ------------------------------------------------------------------------------
@@ -1135,24 +2043,20 @@ def manage_EmployeeStatusChanges(request_data: Dict[str, Any]) -> Tuple[bool, st
         if col in processed and processed[col] is not None:
             processed[col] = encrypt_aes_cbc(processed[col])
     try:
-        with get_db_connection() as conn:
+        with db_session() as conn:
             cur = conn.cursor()
             if op == "INSERT":
-                cols = [c for c in processed.keys() if c not in ["SubmissionID", "SubmittedAt"]]
-                q = f"""
-                    INSERT INTO [dbo].[EmployeeStatusChanges] ({", ".join("[" + c + "]" for c in cols)})
-                    VALUES ({", ".join("?" for _ in cols)})
-                """
-                cur.execute(q, tuple(processed[c] for c in cols))
-                conn.commit()
+                cols = canonical_columns(c for c in processed.keys() if c not in ["SubmissionID", "SubmittedAt"])
+                q = STATEMENTS.insert_sql("[dbo].[EmployeeStatusChanges]", cols)
+                STATEMENTS.execute(cur, q, [processed[c] for c in cols])
+                _commit(conn)
                 return True, "Record inserted successfully."
             else:
                 sid = processed.pop("SubmissionID")
-                cols = [c for c in processed.keys() if c != "SubmittedAt"]
-                sets = ", ".join(f"[{c}] = ?" for c in cols)
-                q = f"UPDATE [dbo].[EmployeeStatusChanges] SET {sets} WHERE [SubmissionID] = ?"
-                cur.execute(q, tuple(processed[c] for c in cols) + (sid,))
-                conn.commit()
+                cols = canonical_columns(c for c in processed.keys() if c != "SubmittedAt")
+                q = STATEMENTS.update_sql("[dbo].[EmployeeStatusChanges]", cols, "[SubmissionID] = ?")
+                STATEMENTS.execute(cur, q, [processed[c] for c in cols] + [sid])
+                _commit(conn)
                 if cur.rowcount == 0:
                     return False, f"No record found with SubmissionID: {sid}."
                 return True, f"Record {sid} updated."
@@ -1189,10 +2093,17 @@ def _create_task_payload(onboarding_id: uuid.UUID, employee_full_name: str, mana
         "Status": "Open",
     }
 
-def manage_onboarding_tasks(onboarding_request_data: Dict[str, Any], env: Optional[str] = None) -> None:
+def flag_requested(value: Any) -> bool:
+    """True when a category flag on a submission asks for its task ("true"/"1"/"yes")."""
+    return str(value if value is not None else "False").lower() in ("true", "1", "yes")
+
+def manage_onboarding_tasks(onboarding_request_data: Dict[str, Any], env: Optional[str] = None,
+                            categories: Optional[Dict[str, Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
     """
     New version: writes tasks to MR_OnBoardTask, creates or updates as needed.
     Uses MR_OnBoardCategory to know which flags -> which tasks.
+    Pass `categories` (from _get_category_map) to reuse one lookup across many submissions.
+    Returns the payloads of newly inserted tasks (for notifications).
     """
     emp_first = onboarding_request_data.get("LegalFirstName", "N/A")
     emp_last  = onboarding_request_data.get("LegalLastName", "N/A")
@@ -1202,23 +2113,33 @@ def manage_onboarding_tasks(onboarding_request_data: Dict[str, Any], env: Option
 
     if submission_id is None:
         print("manage_onboarding_tasks: missing onboarding Id")
-        return
+        return []
 
-    cat = _get_category_map(env)
+    cat = categories if categories is not None else _get_category_map(env)
     print(f"--- Managing tasks for ONB {submission_id} ({employee_full_name}) ---")
+    created: List[Dict[str, Any]] = []
 
     for flag_field, cfg in cat.items():
-        requested = str(onboarding_request_data.get(flag_field, "False")).lower() in ("true", "1", "yes")
+        requested = flag_requested(onboarding_request_data.get(flag_field))
         existing = db_find_task(employee_full_name, cfg["task_type"], submission_id)
 
+        if existing and existing.get("is_archived"):
+            # only finished tasks are archived; never recreate or touch them
+            continue
+
         if requested:
             payload = _create_task_payload(submission_id, employee_full_name, manager_name, cfg)
             if not existing:
-                db_insert_task(payload)
+                if db_insert_task(payload):
+                    created.append(payload)
+            elif existing.get("Status") == "N/A":
+                # dropped earlier (below) and requested again -> re-open with the original description
+                update_task_in_db_list(existing["task_id"], {
+                    "Status": "Open", "description": payload["description"], "manager": manager_name,
+                })
             else:
-                # Re-open or just refresh details/manager
-                fields = {"Status": "Open", "manager": manager_name}
-                update_task_in_db_list(existing["task_id"], fields)
+                # open or finished work keeps its status; only refresh the manager
+                update_task_in_db_list(existing["task_id"], {"manager": manager_name})
         else:
             # Not requested: if exists and active -> mark N/A
             if existing and existing.get("Status") not in ("N/A", "Cancelled", "Completed"):
@@ -1226,6 +2147,7 @@ def manage_onboarding_tasks(onboarding_request_data: Dict[str, Any], env: Option
                     "Status": "N/A",
                     "description": f"{existing['description']} (No longer required)"
                 })
+    return created
 
 def seed_tasks_from_json_simple(path: str = None, skip_existing: bool = True) -> dict:
     """
@@ -1279,12 +2201,85 @@ def seed_tasks_from_json_simple(path: str = None, skip_existing: bool = True) ->
     return summary
 # seed_tasks_from_json_simple("tasks.json", skip_existing=True)
 
-def manage_tasks_after_submission_update(onboarding_id: uuid.UUID, updated_submission: Dict[str, Any], env: Optional[str] = None) -> None:
+def bulk_seed_tasks_from_json(path: str = None, skip_existing: bool = True,
+                              batch_size: int = SEED_BATCH_SIZE) -> dict:
+    """
+    Bulk version of seed_tasks_from_json_simple: streams the array, prefetches
+    existing task_ids in one query and inserts with fast_executemany in batches
+    inside a single transaction (rolled back entirely on failure).
+    """
+    path = path or os.getenv("TASKS_JSON_PATH", "tasks.json")
+    summary = {"file": path, "total": 0, "inserted": 0, "skipped": 0, "failed": 0, "failures": []}
+    now = datetime.datetime.utcnow()
+
+    def _rows(existing: set):
+        seen = set()
+        for i, task in enumerate(_iter_json_records(path)):
+            summary["total"] += 1
+            try:
+                # same minimal aliasing as seed_tasks_from_json_simple
+                if "task_id" not in task and "id" in task:
+                    task["task_id"] = task["id"]
+                if "submission_id" not in task and "submissionid" in task:
+                    task["submission_id"] = task["submissionid"]
+
+                tid = str(task.get("task_id") or "").strip()
+                if not tid:
+                    summary["failed"] += 1
+                    summary["failures"].append({"index": i, "reason": "missing task_id"})
+                    continue
+                if tid in seen or (skip_existing and tid in existing):
+                    summary["skipped"] += 1
+                    continue
+                seen.add(tid)
+                yield i, _task_insert_values(task, now)
+            except Exception as e:
+                summary["failed"] += 1
+                summary["failures"].append({"index": i, "reason": f"{type(e).__name__}: {e}"})
+
+    try:
+        with db_session() as conn:
+            cur = conn.cursor()
+            cur.fast_executemany = True
+            existing = set()
+            if skip_existing:
+                cur.execute(f"SELECT task_id FROM {TASK_TABLE}")
+                existing = {str(r[0]).strip() for r in cur.fetchall()}
+            try:
+                for batch in _chunked(_rows(existing), batch_size):
+                    cur.executemany(TASK_INSERT_SQL, [row for _, row in batch])
+                    summary["inserted"] += len(batch)
+                _commit(conn)
+                _tasks_changed()
+            except Exception:
+                _rollback(conn)
+                summary["failed"] += summary["inserted"]
+                summary["inserted"] = 0
+                raise
+
+    except Exception as e:
+        summary["failed"] += 1
+        summary["failures"].append({"index": None, "reason": f"{type(e).__name__}: {e}"})
+        traceback.print_exc()
+
+    print(f"[bulk_seed_tasks_from_json] file={summary['file']} inserted={summary['inserted']} skipped={summary['skipped']} failed={summary['failed']}")
+    return summary
+
+def manage_tasks_after_submission_update(onboarding_id: uuid.UUID, updated_submission: Dict[str, Any], env: Optional[str] = None,
+                                         categories: Optional[Dict[str, Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
     """
     Called after an UPDATE to OnBoardRequestForm — keeps tasks in sync with changed data.
+    Returns the payloads of newly inserted tasks.
     """
-    # load current request to get names if not provided
-    record = get_onboard_request_by_id(onboarding_id) or {}
+    # load current request (and the category map, if not supplied) concurrently
+    if categories is None:
+        record, categories = run_parallel(
+            lambda: get_onboard_request_by_id(onboarding_id),
+            lambda: _get_category_map(env),
+        )
+    else:
+        record = get_onboard_request_by_id(onboarding_id)
+    record = record or {}
     # prefer new values if present
     emp_first = updated_submission.get("LegalFirstName", record.get("LegalFirstName", ""))
     emp_last  = updated_submission.get("LegalLastName", record.get("LegalLastName", ""))
@@ -1293,37 +2288,57 @@ def manage_tasks_after_submission_update(onboarding_id: uuid.UUID, updated_submi
 
     # run the same orchestration using merged fields
     merged = {**record, **updated_submission, "submission_id": onboarding_id}
-    manage_onboarding_tasks(merged, env=env)
+    created = manage_onboarding_tasks(merged, env=env, categories=categories)
 
     # Ensure name/manager updates propagate to all tasks for this onboarding_id
     try:
-        with get_db_connection() as conn:
+        with db_session() as conn:
             cur = conn.cursor()
             cur.execute(
-                f"UPDATE {TASK_TABLE} SET employee_full_name = ?, manager = ?, updated_at = ? WHERE related_onboarding_id = ?",
+                f"UPDATE {TASK_TABLE} SET employee_full_name = ?, manager = ?, updated_at = ? "
+                f"OUTPUT {', '.join('INSERTED.[' + c + ']' for c in TASK_EVENT_COLS)} WHERE related_onboarding_id = ?",
                 (employee_full_name, manager_name, datetime.datetime.utcnow(), onboarding_id),
             )
-            conn.commit()
+            touched = rows_to_dicts(cur, cur.fetchall())
+            _commit(conn)
+        _tasks_changed()
+        _publish_many("task", "updated", (_task_event_fields(r) for r in touched))
     except Exception as e:
         print(f"[manage_tasks_after_submission_update] propagate names failed: {e}")
         traceback.print_exc()
+    return created
 
 # ------------------------------------------------------------------------------
-# Paylocity / employee directory SP (unchanged)
+# Paylocity / employee directory SP
 # ------------------------------------------------------------------------------
 def CF_SP_Emp_Detail_Search(search_term: Optional[str] = None) -> pd.DataFrame:
+    """Directory search; repeated terms within SEARCH_CACHE_TTL_S share one procedure call."""
+    key = "" if search_term is None else str(search_term).lower()
+    df = SEARCH_CACHE.get_or_load(key, lambda: _run_emp_detail_search(search_term))
+    return df if df is not None else pd.DataFrame()
+
+def _run_emp_detail_search(search_term: Optional[str]) -> Optional[pd.DataFrame]:
     try:
-        with get_db_connection() as conn:
-            cur = conn.cursor()
-            term = sanitize_input(search_term) if search_term is not None else None
-            cur.execute("EXEC [GPReporting].[dbo].[CF_SP_Emp_Detail_Search] ?", (term,))
-            rows = cur.fetchall()
-            cols = [c[0] for c in cur.description]
+        with db_session(read_only=True) as conn:
+            # the connection may belong to a unit of work: give its timeout back afterwards
+            previous_timeout = conn.timeout
+            conn.timeout = REPORTING_QUERY_TIMEOUT_S
+            try:
+                cur = conn.cursor()
+                term = sanitize_input(search_term) if search_term is not None else None
+                with REPORTING_BREAKER.guard((pyodbc.OperationalError, pyodbc.InterfaceError)):
+                    cur.execute("EXEC [GPReporting].[dbo].[CF_SP_Emp_Detail_Search] ?", (term,))
+                    rows = cur.fetchall()
+                cols = [c[0] for c in cur.description]
+            finally:
+                conn.timeout = previous_timeout
             return pd.DataFrame.from_records(rows, columns=cols)
+    except CircuitOpenError:
+        raise
     except Exception as e:
         print(f"[CF_SP_Emp_Detail_Search] {e}")
         traceback.print_exc()
-        return pd.DataFrame()
+        return None
 
 # ------------------------------------------------------------------------------
 # (Optional) tiny smoke tests when running directly
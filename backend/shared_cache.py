@@ -0,0 +1,294 @@
+# shared_cache.py
+# -*- coding: utf-8 -*-
+"""
+Two-tier cache shared by the gunicorn workers on one host.
+
+- local tier: per-process LRU with TTL (no I/O on a hit)
+- shared tier (SHARED_CACHE_VALUES=1): a SQLite file next to the app, so a
+  value loaded by one worker is reused by the others
+- invalidate() drops the key locally and in the shared tier, and appends a
+  message to an invalidation log; a poller thread per process (same approach
+  as change_events.py) drops the key from every other worker's local tier
+- a load that raced an invalidation is not stored, in either tier, so a write
+  can't be shadowed by a value read just before it committed
+
+Values go through pickle for the shared tier; the file is private to the app.
+"""
+
+import os
+import time
+import uuid
+import pickle
+import sqlite3
+import threading
+import traceback
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+SHARED_CACHE_DB          = os.getenv("SHARED_CACHE_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "shared_cache.sqlite3"))
+SHARED_CACHE_VALUES      = os.getenv("SHARED_CACHE_VALUES", "1") == "1"
+SHARED_CACHE_POLL_S      = float(os.getenv("SHARED_CACHE_POLL_S", "0.5"))
+SHARED_CACHE_RETENTION_S = float(os.getenv("SHARED_CACHE_RETENTION_S", "300"))
+
+_ORIGIN = uuid.uuid4().hex   # this process; the poller skips its own messages
+_MISS = object()
+
+# ------------------------------------------------------------------------------
+# Shared store
+# ------------------------------------------------------------------------------
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(SHARED_CACHE_DB, timeout=5, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+_init_lock = threading.Lock()
+_initialized = False
+
+def init_store() -> None:
+    global _initialized
+    with _init_lock:
+        if _initialized:
+            return
+        with _connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    ns         TEXT NOT NULL,
+                    key        TEXT NOT NULL,
+                    value      BLOB NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (ns, key)
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS invalidations (
+                    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+                    origin     TEXT NOT NULL,
+                    ns         TEXT NOT NULL,
+                    key        TEXT,                -- NULL: whole namespace
+                    prefix     INTEGER NOT NULL,    -- 1: key is a prefix
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_invalidations_ns_created ON invalidations(ns, created_at)")
+        _initialized = True
+
+# a newer invalidation covering (ns, key) exists -> the value being stored may be stale
+_INVALIDATED_SINCE = """
+    EXISTS (SELECT 1 FROM invalidations
+            WHERE ns = :ns AND created_at >= :since
+              AND (key IS NULL OR key = :key OR (prefix = 1 AND substr(:key, 1, length(key)) = key)))
+"""
+
+# ------------------------------------------------------------------------------
+# Cache
+# ------------------------------------------------------------------------------
+class TieredCache:
+    def __init__(self, namespace: str, ttl: float, max_entries: int = 1024, shared: bool = SHARED_CACHE_VALUES):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.shared = shared
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()   # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._generation = 0     # bumped by every invalidation seen by this process
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.invalidations_sent = 0
+        self.invalidations_received = 0
+        CACHES[namespace] = self
+
+    # -- local tier ------------------------------------------------------------
+    def _get_local(self, key: str) -> Any:
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                return _MISS
+            if hit[0] <= time.time():
+                del self._data[key]
+                return _MISS
+            self._data.move_to_end(key)
+            self.local_hits += 1
+            return hit[1]
+
+    def _set_local(self, key: str, value: Any, expires_at: float, generation: int) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return     # invalidated while loading
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def _drop_local(self, key: Optional[str], prefix: bool) -> None:
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._data.clear()
+            elif prefix:
+                for k in [k for k in self._data if k.startswith(key)]:
+                    del self._data[k]
+            else:
+                self._data.pop(key, None)
+
+    # -- shared tier -----------------------------------------------------------
+    def _get_shared(self, key: str):
+        try:
+            init_store()
+            with _connect() as conn:
+                row = conn.execute(
+                    "SELECT value, expires_at FROM entries WHERE ns = ? AND key = ? AND expires_at > ?",
+                    (self.namespace, key, time.time()),
+                ).fetchone()
+            if row is None:
+                return _MISS, 0.0
+            return pickle.loads(row[0]), row[1]
+        except Exception as e:
+            print(f"[shared_cache] {self.namespace} read failed: {e}")
+            return _MISS, 0.0
+
+    def _set_shared(self, key: str, value: Any, expires_at: float, since: float) -> None:
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            init_store()
+            with _connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (ns, key, value, expires_at) "
+                    f"SELECT :ns, :key, :value, :expires_at WHERE NOT {_INVALIDATED_SINCE}",
+                    {"ns": self.namespace, "key": key, "value": blob, "expires_at": expires_at, "since": since},
+                )
+        except Exception as e:
+            print(f"[shared_cache] {self.namespace} write failed: {e}")
+
+    # -- public ----------------------------------------------------------------
+    def get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Cached value for `key`, else loader() (None results are not cached)."""
+        _ensure_poller()
+        value = self._get_local(key)
+        if value is not _MISS:
+            return value
+
+        with self._lock:
+            generation = self._generation
+        since = time.time()
+        if self.shared:
+            value, expires_at = self._get_shared(key)
+            if value is not _MISS:
+                with self._lock:
+                    self.shared_hits += 1
+                self._set_local(key, value, expires_at, generation)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        value = loader()
+        if value is not None:
+            expires_at = time.time() + self.ttl
+            self._set_local(key, value, expires_at, generation)
+            if self.shared:
+                self._set_shared(key, value, expires_at, since)
+        return value
+
+    def invalidate(self, key: Optional[str] = None, prefix: bool = False) -> None:
+        """
+        Drop `key` (every key starting with it when `prefix`, the whole
+        namespace when None) here, in the shared tier and in every other worker.
+        Never raises; a lost message is bounded by the TTL.
+        """
+        self._drop_local(key, prefix)
+        with self._lock:
+            self.invalidations_sent += 1
+        try:
+            init_store()
+            now = time.time()
+            with _connect() as conn:
+                if key is None:
+                    conn.execute("DELETE FROM entries WHERE ns = ?", (self.namespace,))
+                elif prefix:
+                    conn.execute("DELETE FROM entries WHERE ns = ? AND substr(key, 1, ?) = ?",
+                                 (self.namespace, len(key), key))
+                else:
+                    conn.execute("DELETE FROM entries WHERE ns = ? AND key = ?", (self.namespace, key))
+                conn.execute(
+                    "INSERT INTO invalidations (origin, ns, key, prefix, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (_ORIGIN, self.namespace, key, 1 if prefix else 0, now),
+                )
+        except Exception as e:
+            print(f"[shared_cache] invalidate {self.namespace}/{key} failed: {e}")
+            traceback.print_exc()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.local_hits + self.shared_hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl,
+                "shared": self.shared,
+                "local_hits": self.local_hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.local_hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+                "invalidations_sent": self.invalidations_sent,
+                "invalidations_received": self.invalidations_received,
+            }
+
+CACHES: Dict[str, TieredCache] = {}
+
+# ------------------------------------------------------------------------------
+# Cross-process invalidation poller
+# ------------------------------------------------------------------------------
+_poller: Optional[threading.Thread] = None
+_poller_lock = threading.Lock()
+_last_seen = 0
+
+def _poll_loop() -> None:
+    global _last_seen
+    last_prune = 0.0
+    while True:
+        try:
+            with _connect() as conn:
+                rows = conn.execute(
+                    "SELECT id, origin, ns, key, prefix FROM invalidations WHERE id > ? ORDER BY id LIMIT 1000",
+                    (_last_seen,),
+                ).fetchall()
+            for row_id, origin, ns, key, prefix in rows:
+                _last_seen = row_id
+                cache = CACHES.get(ns)
+                if cache is not None and origin != _ORIGIN:
+                    cache._drop_local(key, bool(prefix))
+                    with cache._lock:
+                        cache.invalidations_received += 1
+            now = time.time()
+            if now - last_prune > 60:
+                with _connect() as conn:
+                    conn.execute("DELETE FROM invalidations WHERE created_at < ?", (now - SHARED_CACHE_RETENTION_S,))
+                    conn.execute("DELETE FROM entries WHERE expires_at < ?", (now,))
+                last_prune = now
+        except Exception as e:
+            print(f"[shared_cache] poll failed: {e}")
+        time.sleep(SHARED_CACHE_POLL_S)
+
+def _ensure_poller() -> None:
+    global _poller, _last_seen
+    if _poller is not None:
+        return
+    with _poller_lock:
+        if _poller is not None:
+            return
+        try:
+            init_store()
+            with _connect() as conn:
+                _last_seen = conn.execute("SELECT COALESCE(MAX(id), 0) FROM invalidations").fetchone()[0]
+        except Exception as e:
+            print(f"[shared_cache] store unavailable, local tier only until it is: {e}")
+        _poller = threading.Thread(target=_poll_loop, name="shared-cache", daemon=True)
+        _poller.start()
+
+def cache_stats() -> Dict[str, Any]:
+    return {name: c.stats() for name, c in CACHES.items()}
@@ -0,0 +1,139 @@
+# statement_cache.py
+# -*- coding: utf-8 -*-
+"""
+Canonical INSERT/UPDATE text per (table, column-set), built once and reused.
+
+The write helpers take whatever keys the client sent, so the same logical
+statement used to arrive in many column orders, i.e. many distinct SQL texts
+for SQL Server to compile. Columns are put in a canonical order (the table's
+whitelist order, or case-insensitive sort) before the text is built, so each
+column-set maps to exactly one string: identical text hits the server plan
+cache, and pyodbc skips the re-prepare when a cursor re-executes it.
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+STATEMENT_CACHE_MAX = int(os.getenv("STATEMENT_CACHE_MAX", "1024"))
+
+_IDENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _quote(name: str) -> str:
+    if not isinstance(name, str) or not _IDENT.match(name):
+        raise ValueError(f"invalid column name: {name!r}")
+    return f"[{name}]"
+
+
+def canonical_columns(cols: Iterable[str], order: Optional[Sequence[str]] = None) -> Tuple[str, ...]:
+    """
+    Deduplicate and order columns. With `order` (a whitelist) unknown columns
+    are dropped and the whitelist order wins; otherwise sort case-insensitively.
+    """
+    seen = set(cols)
+    if order is not None:
+        return tuple(c for c in order if c in seen)
+    return tuple(sorted(seen, key=lambda c: (c.lower(), c)))
+
+
+class StatementCache:
+    def __init__(self, max_entries: int = STATEMENT_CACHE_MAX):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[tuple, str]" = OrderedDict()
+        self._executions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get_or_build(self, key: tuple, build) -> str:
+        with self._lock:
+            sql = self._data.get(key)
+            if sql is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return sql
+        sql = build()
+        with self._lock:
+            self.misses += 1
+            self._data[key] = sql
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                _, old = self._data.popitem(last=False)
+                self._executions.pop(old, None)
+                self.evictions += 1
+        return sql
+
+    def insert_sql(self, table: str, cols: Sequence[str], output: Optional[Sequence[str]] = None,
+                   output_into: Optional[str] = None) -> str:
+        """
+        `cols` must already be canonical (see canonical_columns).
+        `output` adds an OUTPUT clause: "*" for INSERTED.*, or a list of columns,
+        so the persisted row comes back from the same statement. `output_into`
+        targets a table variable instead (needed when the table has triggers).
+        """
+        out_key = output if output is None or isinstance(output, str) else tuple(output)
+        key = ("insert", table, tuple(cols), out_key, output_into)
+
+        def build() -> str:
+            clause = ""
+            if output is not None:
+                if output == "*":
+                    clause = " OUTPUT INSERTED.*"
+                else:
+                    clause = " OUTPUT " + ", ".join(f"INSERTED.{_quote(c)}" for c in output)
+                if output_into:
+                    clause += f" INTO {output_into}"
+            return (
+                f"INSERT INTO {table} ({', '.join(_quote(c) for c in cols)}){clause} "
+                f"VALUES ({', '.join('?' for _ in cols)})"
+            )
+        return self._get_or_build(key, build)
+
+    def update_sql(self, table: str, cols: Sequence[str], where: str, output: Optional[Sequence[str]] = None) -> str:
+        """`where` is a fixed, parameterized fragment, e.g. "task_id = ?"; `output` as for insert_sql."""
+        key = ("update", table, tuple(cols), where, tuple(output) if output else None)
+        clause = ""
+        if output:
+            clause = " OUTPUT " + ", ".join(f"INSERTED.{_quote(c)}" for c in output)
+        return self._get_or_build(key, lambda: (
+            f"UPDATE {table} SET {', '.join(_quote(c) + ' = ?' for c in cols)}{clause} WHERE {where}"
+        ))
+
+    def execute(self, cur, sql: str, params: Sequence[Any]):
+        """cur.execute + per-statement execution counter."""
+        with self._lock:
+            self._executions[sql] = self._executions.get(sql, 0) + 1
+        return cur.execute(sql, tuple(params))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._executions.clear()
+
+    def stats(self, top: int = 10) -> Dict[str, Any]:
+        with self._lock:
+            executions = sum(self._executions.values())
+            shapes = len(self._executions)
+            busiest: List[Tuple[str, int]] = sorted(self._executions.items(), key=lambda kv: -kv[1])[:top]
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "executions": executions,
+            "distinct_statements": shapes,
+            # executions that reused a statement text the server has already compiled
+            "reuse_rate": round((executions - shapes) / executions, 4) if executions else 0.0,
+            "top": [{"sql": sql, "executions": n} for sql, n in busiest],
+        }
+
+
+# shared by the write helpers in servertest.py
+STATEMENTS = StatementCache()
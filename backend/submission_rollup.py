@@ -0,0 +1,215 @@
+# submission_rollup.py
+# -*- coding: utf-8 -*-
+"""
+Incrementally maintained submission counts (dbo.OnBoardSubmissionRollup,
+migrations/002_submission_rollup.sql) behind /api/submissions/count.
+
+The helpers here take an open cursor so servertest.py can apply deltas inside
+the same transaction as the OnBoardRequestForm write. The rebuild command
+recomputes everything from the base table and verifies it:
+
+    python submission_rollup.py rebuild [--env dev]
+    python submission_rollup.py verify  [--env dev]
+
+Writes don't depend on the migration: with SUBMISSION_ROLLUP=auto (default)
+deltas are skipped until the table exists, and /api/submissions/count scans
+the base table meanwhile. Run `rebuild` once after applying 002 to pick up
+the writes made before it. SUBMISSION_ROLLUP=off disables the rollup entirely.
+"""
+
+import os
+import sys
+import argparse
+import datetime
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+ROLLUP_TABLE = "dbo.OnBoardSubmissionRollup"
+ALL_CREATORS = "*"
+ALL_TIME = datetime.date(1900, 1, 1)
+SUBMISSION_ROLLUP = os.getenv("SUBMISSION_ROLLUP", "auto").strip().lower()   # auto | on | off
+
+# single-row upsert; sent as a parameter array (fast_executemany) per write
+_MERGE_SQL = f"""
+MERGE {ROLLUP_TABLE} WITH (HOLDLOCK) AS t
+USING (VALUES (?, ?, ?, ?, ?)) AS s (env, created_by, grain, bucket, delta)
+   ON t.env = s.env AND t.created_by = s.created_by AND t.grain = s.grain AND t.bucket = s.bucket
+WHEN MATCHED THEN UPDATE SET cnt = t.cnt + s.delta
+WHEN NOT MATCHED THEN INSERT (env, created_by, grain, bucket, cnt)
+     VALUES (s.env, s.created_by, s.grain, s.bucket, s.delta);
+"""
+
+# full recompute from OnBoardRequestForm, same normalization as rollup_key()
+_REBUILD_CTE = """
+WITH base AS (
+    SELECT ISNULL(env, '') AS env,
+           LOWER(LTRIM(RTRIM(ISNULL(Createdby, '')))) AS created_by,
+           CAST(CreatedAt AS DATE) AS d
+    FROM OnBoardRequestForm
+    WHERE CreatedAt IS NOT NULL{env_sql}
+),
+who AS (
+    SELECT env, created_by, d FROM base
+    UNION ALL
+    SELECT env, '*', d FROM base
+)
+"""
+_REBUILD_SELECT = """
+SELECT env, created_by, 'D' AS grain, d AS bucket, COUNT(*) AS cnt FROM who GROUP BY env, created_by, d
+UNION ALL
+SELECT env, created_by, 'M', DATEFROMPARTS(YEAR(d), MONTH(d), 1), COUNT(*) FROM who
+    GROUP BY env, created_by, DATEFROMPARTS(YEAR(d), MONTH(d), 1)
+UNION ALL
+SELECT env, created_by, 'A', '1900-01-01', COUNT(*) FROM who GROUP BY env, created_by
+"""
+
+RollupKey = Tuple[str, str, datetime.date]
+
+def rollup_key(env: Any, created_by: Any, created_at: Any) -> Optional[RollupKey]:
+    """(env, normalized creator, day) for one submission; None when CreatedAt is missing."""
+    if created_at is None:
+        return None
+    if isinstance(created_at, str):
+        try:
+            created_at = datetime.datetime.fromisoformat(created_at)
+        except ValueError:
+            return None
+    day = created_at.date() if isinstance(created_at, datetime.datetime) else created_at
+    return (str(env or ""), str(created_by or "").strip().lower(), day)
+
+def _expand(deltas: Dict[RollupKey, int]) -> List[Tuple]:
+    rows: Counter = Counter()
+    for (env, who, day), n in deltas.items():
+        if not n:
+            continue
+        for w in (who, ALL_CREATORS):
+            rows[(env, w, "D", day)] += n
+            rows[(env, w, "M", day.replace(day=1))] += n
+            rows[(env, w, "A", ALL_TIME)] += n
+    return [(*k, n) for k, n in rows.items() if n]
+
+_table_seen = False
+
+def rollup_enabled(cur) -> bool:
+    """
+    off: never; on: always; auto: once the table exists. Only a positive
+    check is remembered, so writes start feeding the table as soon as 002 is applied.
+    """
+    global _table_seen
+    if SUBMISSION_ROLLUP in ("off", "0", "false"):
+        return False
+    if SUBMISSION_ROLLUP in ("on", "1", "true") or _table_seen:
+        return True
+    cur.execute("SELECT OBJECT_ID(?, 'U')", (ROLLUP_TABLE,))
+    row = cur.fetchone()
+    _table_seen = bool(row and row[0] is not None)
+    return _table_seen
+
+def apply_deltas(cur, deltas: Dict[RollupKey, int]) -> None:
+    """Upsert count deltas on the caller's cursor (and thus its transaction); no-op until the table exists."""
+    rows = _expand(deltas)
+    if not rows or not rollup_enabled(cur):
+        return
+    cur.fast_executemany = True
+    cur.executemany(_MERGE_SQL, rows)
+
+def deltas_for(keys: Iterable[Optional[RollupKey]], sign: int = 1) -> Dict[RollupKey, int]:
+    out: Counter = Counter()
+    for k in keys:
+        if k is not None:
+            out[k] += sign
+    return dict(out)
+
+def read_counts(cur, env: str, created_by: Optional[str], today: datetime.date) -> Dict[str, Any]:
+    """Dashboard numbers: all-time total, today, and per-month counts for today's year."""
+    if not rollup_enabled(cur):
+        raise RuntimeError(f"{ROLLUP_TABLE} is not available (SUBMISSION_ROLLUP={SUBMISSION_ROLLUP})")
+    who = (created_by or "").strip().lower() or ALL_CREATORS
+    cur.execute(
+        f"""
+        SELECT grain, bucket, cnt FROM {ROLLUP_TABLE}
+        WHERE env = ? AND created_by = ?
+          AND ((grain = 'A' AND bucket = ?)
+            OR (grain = 'D' AND bucket = ?)
+            OR (grain = 'M' AND bucket >= ? AND bucket < ?))
+        """,
+        (str(env or ""), who, ALL_TIME, today, datetime.date(today.year, 1, 1), datetime.date(today.year + 1, 1, 1)),
+    )
+    out = {"count": 0, "today": 0, "monthly": [0] * 12}
+    for grain, bucket, cnt in cur.fetchall():
+        if grain == "A":
+            out["count"] = int(cnt)
+        elif grain == "D":
+            out["today"] = int(cnt)
+        else:
+            out["monthly"][bucket.month - 1] = int(cnt)
+    return out
+
+def _env_filter(env: Optional[str]) -> Tuple[str, Tuple]:
+    if env is None:
+        return "", ()
+    return " AND ISNULL(env, '') = ?", (str(env),)
+
+def rebuild(cur, env: Optional[str] = None) -> int:
+    """Replace the rollup rows (for one env, or all) with a fresh recompute. Returns rows written."""
+    env_sql, params = _env_filter(env)
+    if env is None:
+        cur.execute(f"DELETE FROM {ROLLUP_TABLE}")
+    else:
+        cur.execute(f"DELETE FROM {ROLLUP_TABLE} WHERE env = ?", params)
+    cur.execute(
+        _REBUILD_CTE.format(env_sql=env_sql)
+        + f"INSERT INTO {ROLLUP_TABLE} (env, created_by, grain, bucket, cnt)"
+        + _REBUILD_SELECT,
+        params,
+    )
+    return cur.rowcount
+
+def verify(cur, env: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Rows where the stored rollup disagrees with a recompute (empty list = consistent)."""
+    env_sql, params = _env_filter(env)
+    stored_filter = "" if env is None else " WHERE env = ?"
+    cur.execute(
+        _REBUILD_CTE.format(env_sql=env_sql) + f""",
+        fresh AS ({_REBUILD_SELECT}),
+        stored AS (SELECT env, created_by, grain, bucket, cnt FROM {ROLLUP_TABLE}{stored_filter})
+        SELECT COALESCE(f.env, s.env), COALESCE(f.created_by, s.created_by),
+               COALESCE(f.grain, s.grain), COALESCE(f.bucket, s.bucket),
+               ISNULL(f.cnt, 0), ISNULL(s.cnt, 0)
+        FROM fresh f
+        FULL OUTER JOIN stored s
+          ON s.env = f.env AND s.created_by = f.created_by AND s.grain = f.grain AND s.bucket = f.bucket
+        WHERE ISNULL(f.cnt, 0) <> ISNULL(s.cnt, 0)
+        """,
+        params + params,
+    )
+    return [
+        {"env": e, "created_by": w, "grain": g, "bucket": str(b), "expected": int(x), "stored": int(y)}
+        for e, w, g, b, x, y in cur.fetchall()
+    ]
+
+if __name__ == "__main__":
+    from servertest import get_db_connection
+
+    ap = argparse.ArgumentParser(description="Rebuild or verify the submission rollup table.")
+    ap.add_argument("command", choices=["rebuild", "verify"])
+    ap.add_argument("--env", default=None, help="limit to one env (default: all)")
+    args = ap.parse_args()
+
+    with get_db_connection(query_timeout=0) as conn:   # full-table rebuild
+        cur = conn.cursor()
+        if args.command == "rebuild":
+            n = rebuild(cur, args.env)
+            mismatches = verify(cur, args.env)
+            if mismatches:
+                conn.rollback()
+                print(f"[rollup] rebuild produced {len(mismatches)} mismatches, rolled back: {mismatches[:10]}")
+                sys.exit(1)
+            conn.commit()
+            print(f"[rollup] rebuilt {n} rows, verified consistent")
+        else:
+            mismatches = verify(cur, args.env)
+            for m in mismatches[:50]:
+                print(f"[rollup] mismatch {m}")
+            print(f"[rollup] {len(mismatches)} mismatches")
+            sys.exit(1 if mismatches else 0)
@@ -0,0 +1,295 @@
+# task_queue.py
+# -*- coding: utf-8 -*-
+"""
+Durable local job queue (SQLite) + worker pool for work that should not run in
+the request thread, e.g. task generation after a submission is committed.
+
+- one row per job_key (idempotent): re-enqueuing a pending key merges payloads
+- jobs that are running when re-enqueued are re-run once they finish
+- failures retry with exponential backoff up to TASK_QUEUE_MAX_ATTEMPTS
+- the SQLite file is shared, so several worker processes can drain one queue
+- workers start with the app (start_workers) so jobs left pending by a restart resume
+- done jobs older than TASK_QUEUE_RETENTION_S are purged by the workers
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+import traceback
+from typing import Any, Callable, Dict, Optional
+
+from flask import jsonify
+
+TASK_QUEUE_DB          = os.getenv("TASK_QUEUE_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "task_queue.sqlite3"))
+TASK_QUEUE_WORKERS     = int(os.getenv("TASK_QUEUE_WORKERS", "2"))
+TASK_QUEUE_MAX_ATTEMPTS = int(os.getenv("TASK_QUEUE_MAX_ATTEMPTS", "5"))
+TASK_QUEUE_BACKOFF_S   = float(os.getenv("TASK_QUEUE_BACKOFF_S", "2"))
+TASK_QUEUE_BACKOFF_MAX_S = float(os.getenv("TASK_QUEUE_BACKOFF_MAX_S", "300"))
+TASK_QUEUE_POLL_S      = float(os.getenv("TASK_QUEUE_POLL_S", "1"))
+TASK_QUEUE_LEASE_S     = float(os.getenv("TASK_QUEUE_LEASE_S", "600"))
+TASK_QUEUE_RETENTION_S = float(os.getenv("TASK_QUEUE_RETENTION_S", str(7 * 24 * 3600)))
+TASK_QUEUE_SWEEP_S     = float(os.getenv("TASK_QUEUE_SWEEP_S", "3600"))
+
+# kind -> handler(payload: dict) ; register with register_handler()
+HANDLERS: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+
+_workers: list = []
+_workers_lock = threading.Lock()
+_wakeup = threading.Event()
+_stop = threading.Event()
+_last_sweep = 0.0
+
+# ------------------------------------------------------------------------------
+# Storage
+# ------------------------------------------------------------------------------
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(TASK_QUEUE_DB, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+def init_queue() -> None:
+    with _connect() as conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_key     TEXT PRIMARY KEY,
+                kind        TEXT NOT NULL,
+                payload     TEXT NOT NULL,
+                status      TEXT NOT NULL,          -- queued | running | done | failed
+                attempts    INTEGER NOT NULL DEFAULT 0,
+                rerun       INTEGER NOT NULL DEFAULT 0,
+                next_run_at REAL NOT NULL,
+                last_error  TEXT,
+                created_at  REAL NOT NULL,
+                updated_at  REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status_next ON jobs(status, next_run_at)")
+
+def _dumps(payload: Dict[str, Any]) -> str:
+    return json.dumps(payload, default=str)
+
+# ------------------------------------------------------------------------------
+# Public API
+# ------------------------------------------------------------------------------
+def register_handler(kind: str, fn: Callable[[Dict[str, Any]], None]) -> None:
+    HANDLERS[kind] = fn
+
+def enqueue(kind: str, job_key: str, payload: Dict[str, Any]) -> None:
+    """
+    Insert or coalesce a job. Pending jobs with the same key get the new payload
+    merged over the old one; running jobs are flagged to run again afterwards.
+    """
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT status, payload FROM jobs WHERE job_key = ?", (job_key,)).fetchone()
+        if row is None:
+            conn.execute(
+                "INSERT INTO jobs (job_key, kind, payload, status, attempts, rerun, next_run_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'queued', 0, 0, ?, ?, ?)",
+                (job_key, kind, _dumps(payload), now, now, now),
+            )
+        else:
+            merged = {**json.loads(row["payload"]), **payload}
+            if row["status"] == "running":
+                conn.execute(
+                    "UPDATE jobs SET kind = ?, payload = ?, rerun = 1, updated_at = ? WHERE job_key = ?",
+                    (kind, _dumps(merged), now, job_key),
+                )
+            else:
+                conn.execute(
+                    "UPDATE jobs SET kind = ?, payload = ?, status = 'queued', attempts = 0, "
+                    "next_run_at = ?, last_error = NULL, updated_at = ? WHERE job_key = ?",
+                    (kind, _dumps(merged), now, now, job_key),
+                )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    start_workers()
+    _wakeup.set()
+
+def get_job(job_key: str) -> Optional[Dict[str, Any]]:
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT job_key, kind, status, attempts, rerun, next_run_at, last_error, created_at, updated_at "
+            "FROM jobs WHERE job_key = ?",
+            (job_key,),
+        ).fetchone()
+        return dict(row) if row else None
+
+def queue_stats() -> Dict[str, int]:
+    with _connect() as conn:
+        rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {r["status"]: r["n"] for r in rows}
+
+def purge_done(older_than_s: float = None) -> int:
+    """Delete done jobs not touched for older_than_s seconds; failed jobs are kept for inspection."""
+    retention = TASK_QUEUE_RETENTION_S if older_than_s is None else older_than_s
+    with _connect() as conn:
+        cur = conn.execute(
+            "DELETE FROM jobs WHERE status = 'done' AND updated_at < ?",
+            (time.time() - retention,),
+        )
+        return cur.rowcount
+
+# ------------------------------------------------------------------------------
+# Workers
+# ------------------------------------------------------------------------------
+def _claim() -> Optional[sqlite3.Row]:
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        # recover jobs whose worker died mid-run
+        conn.execute(
+            "UPDATE jobs SET status = 'queued', next_run_at = ? WHERE status = 'running' AND updated_at < ?",
+            (now, now - TASK_QUEUE_LEASE_S),
+        )
+        row = conn.execute(
+            "SELECT * FROM jobs WHERE status = 'queued' AND next_run_at <= ? ORDER BY next_run_at LIMIT 1",
+            (now,),
+        ).fetchone()
+        if row is not None:
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE job_key = ?",
+                (now, row["job_key"]),
+            )
+        conn.execute("COMMIT")
+        return row
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+def _finish(job_key: str, attempts: int, error: Optional[str]) -> None:
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        rerun = conn.execute("SELECT rerun FROM jobs WHERE job_key = ?", (job_key,)).fetchone()["rerun"]
+        if rerun:
+            # payload changed while we were running -> run again with fresh attempts
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = 0, rerun = 0, next_run_at = ?, "
+                "last_error = ?, updated_at = ? WHERE job_key = ?",
+                (now, error, now, job_key),
+            )
+        elif error is None:
+            conn.execute(
+                "UPDATE jobs SET status = 'done', last_error = NULL, updated_at = ? WHERE job_key = ?",
+                (now, job_key),
+            )
+        elif attempts >= TASK_QUEUE_MAX_ATTEMPTS:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', last_error = ?, updated_at = ? WHERE job_key = ?",
+                (error, now, job_key),
+            )
+        else:
+            delay = min(TASK_QUEUE_BACKOFF_MAX_S, TASK_QUEUE_BACKOFF_S * (2 ** (attempts - 1)))
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', next_run_at = ?, last_error = ?, updated_at = ? WHERE job_key = ?",
+                (now + delay, error, now, job_key),
+            )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+def _maybe_sweep() -> None:
+    """Run purge_done at most once per TASK_QUEUE_SWEEP_S per process."""
+    global _last_sweep
+    now = time.time()
+    with _workers_lock:
+        if now - _last_sweep < TASK_QUEUE_SWEEP_S:
+            return
+        _last_sweep = now
+    try:
+        purged = purge_done()
+        if purged:
+            print(f"[task_queue] purged {purged} done job(s)")
+    except Exception as e:
+        print(f"[task_queue] sweep failed: {e}")
+        traceback.print_exc()
+
+def _worker_loop() -> None:
+    while not _stop.is_set():
+        _maybe_sweep()
+        try:
+            job = _claim()
+        except Exception as e:
+            print(f"[task_queue] claim failed: {e}")
+            traceback.print_exc()
+            job = None
+
+        if job is None:
+            _wakeup.wait(TASK_QUEUE_POLL_S)
+            _wakeup.clear()
+            continue
+
+        error = None
+        try:
+            handler = HANDLERS.get(job["kind"])
+            if handler is None:
+                raise RuntimeError(f"no handler registered for kind '{job['kind']}'")
+            handler(json.loads(job["payload"]))
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"[task_queue] job {job['job_key']} attempt {job['attempts'] + 1} failed: {error}")
+            traceback.print_exc()
+
+        try:
+            _finish(job["job_key"], job["attempts"] + 1, error)
+        except Exception as e:
+            print(f"[task_queue] finish failed for {job['job_key']}: {e}")
+            traceback.print_exc()
+
+def start_workers(count: int = TASK_QUEUE_WORKERS) -> None:
+    """
+    Start the worker pool once per process (safe to call repeatedly). Call it at
+    app startup so queued/backed-off jobs from a previous run are picked up.
+    """
+    with _workers_lock:
+        if _workers:
+            return
+        init_queue()
+        for i in range(max(1, count)):
+            t = threading.Thread(target=_worker_loop, name=f"task-queue-{i}", daemon=True)
+            t.start()
+            _workers.append(t)
+
+def stop_workers() -> None:
+    _stop.set()
+    _wakeup.set()
+
+# ------------------------------------------------------------------------------
+# Routes
+# ------------------------------------------------------------------------------
+def register_task_queue_routes(app, auth):
+    """`auth` is the route decorator that authenticates the caller (app.protected_route)."""
+
+    @app.get("/api/jobs/stats")
+    @auth
+    def task_queue_stats():
+        return jsonify(queue_stats()), 200
+
+    @app.get("/api/jobs/<path:job_key>")
+    @auth
+    def task_queue_job(job_key: str):
+        job = get_job(job_key)
+        if not job:
+            return jsonify({"error": "not found"}), 404
+        return jsonify(job), 200
@@ -0,0 +1,76 @@
+import datetime
+import unittest
+from unittest.mock import MagicMock, patch
+
+import archival
+import servertest
+from servertest import TASK_DONE_STATUSES, manage_onboarding_tasks
+
+NOW = datetime.datetime(2024, 6, 1)
+
+
+def _conn(rowcounts=(), columns=("task_id", "Status")):
+    cur = MagicMock()
+    cur.fetchall.return_value = [(c,) for c in columns]
+    cur.fetchone.return_value = (7,)
+    counts = iter(rowcounts)
+    cur.execute.side_effect = lambda *a, **k: setattr(cur, "rowcount", next(counts, 0))
+    conn = MagicMock()
+    conn.cursor.return_value = cur
+    return conn, cur
+
+
+class ArchivalSelectionTests(unittest.TestCase):
+
+    def test_tasks_move_only_done_and_stale_rows_in_batches(self):
+        conn, cur = _conn(rowcounts=(0, 0, 1000, 1000, 3))
+        with patch.object(archival, "ARCHIVE_BATCH_SIZE", 1000):
+            moved = archival.archive_tasks(conn, NOW)
+        self.assertEqual(moved, 2003)
+        sql, params = cur.execute.call_args_list[-1].args
+        self.assertIn("OUTPUT DELETED.[task_id], DELETED.[Status] INTO MR_OnBoardTask_Archive", sql)
+        self.assertIn("Status IN (", sql)
+        self.assertEqual(params[1:-1], tuple(TASK_DONE_STATUSES))
+        self.assertEqual(params[-1], NOW - datetime.timedelta(days=archival.ARCHIVE_TASKS_AFTER_DAYS))
+        self.assertEqual(conn.commit.call_count, 3)   # one short transaction per batch
+
+    def test_profiles_keep_the_latest_row_per_email_and_env(self):
+        conn, cur = _conn(columns=("ROW_ID", "email"))
+        archival.archive_profiles(conn, NOW)
+        sql = cur.execute.call_args_list[-1].args[0]
+        self.assertIn("PARTITION BY email, env", sql)
+        self.assertIn("rn > 1", sql)
+
+    def test_dry_run_counts_without_deleting(self):
+        conn, cur = _conn()
+        self.assertEqual(archival.archive_tasks(conn, NOW, dry_run=True), 7)
+        self.assertTrue(cur.execute.call_args_list[-1].args[0].startswith("SELECT COUNT(*)"))
+        conn.commit.assert_not_called()
+
+
+class ArchivedTaskLookupTests(unittest.TestCase):
+
+    def test_db_find_task_reads_the_archive_too(self):
+        conn, cur = _conn()
+        cur.description = [("task_id",), ("is_archived",)]
+        cur.fetchone.return_value = ("t1", 1)
+        conn.__enter__.return_value = conn
+        with patch.object(servertest, "get_db_connection", return_value=conn):
+            found = servertest.db_find_task("Ada L", "IT", "sid")
+        self.assertIn("MR_OnBoardTask_Archive", cur.execute.call_args.args[0])
+        self.assertEqual(found, {"task_id": "t1", "is_archived": 1})
+
+    def test_archived_task_is_not_recreated_on_submission_update(self):
+        cfg = {"task_type": "IT", "name_prefix": "Laptop for", "short_code": "LAP",
+               "description": "d", "assignedTo": "it@example.com"}
+        data = {"submission_id": "sid", "LegalFirstName": "Ada", "LegalLastName": "L", "NeedsLaptop": "true"}
+        with patch.object(servertest, "db_find_task", return_value={"task_id": "t1", "Status": "Completed", "is_archived": 1}), \
+             patch.object(servertest, "db_insert_task") as insert, \
+             patch.object(servertest, "update_task_in_db_list") as update:
+            self.assertEqual(manage_onboarding_tasks(data, categories={"NeedsLaptop": cfg}), [])
+        insert.assert_not_called()
+        update.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
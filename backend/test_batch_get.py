@@ -0,0 +1,69 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import jwt_utils
+import servertest
+from app import app
+
+TEST_SECRET = "unit-test-secret-0123456789abcdef0123456789"
+TID = "22222222-2222-2222-2222-222222222222"
+
+
+class BatchGetRouteTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.test_client()
+        p = patch.object(jwt_utils, "JWT_SECRET", TEST_SECRET)
+        p.start()
+        self.addCleanup(p.stop)
+        token = jwt_utils.make_access_token("a@example.com", "hr", {"env": "prod"})
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    def test_task_reads_require_auth(self):
+        self.assertEqual(self.client.post("/api/tasks/batch", json={"ids": [TID]}).status_code, 401)
+        self.assertEqual(self.client.get(f"/api/tasks/{TID}").status_code, 401)
+        self.assertEqual(self.client.post("/api/submissions/batch", json={"ids": [TID]}).status_code, 401)
+
+    def test_tasks_batch_reports_missing_ids_in_the_caller_env(self):
+        with patch("app.find_tasks_by_ids", return_value={"t1": {"task_id": "t1"}}) as find:
+            resp = self.client.post("/api/tasks/batch", json={"ids": ["t1", "t2", "t1"]}, headers=self.headers)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.get_json(), {"items": {"t1": {"task_id": "t1"}}, "missing": ["t2"]})
+        self.assertEqual(find.call_args.kwargs["env"], "prod")
+
+    def test_oversized_batch_is_rejected(self):
+        with patch("app.BATCH_GET_MAX", 2):
+            resp = self.client.post("/api/tasks/batch", json={"ids": ["a", "b", "c"]}, headers=self.headers)
+        self.assertEqual(resp.status_code, 413)
+
+
+class BatchQueryTests(unittest.TestCase):
+
+    def _conn(self):
+        cur = MagicMock()
+        cur.fetchall.return_value = []
+        conn = MagicMock()
+        conn.__enter__.return_value = conn
+        conn.cursor.return_value = cur
+        return conn, cur
+
+    def test_profiles_by_emails_compares_the_bare_column(self):
+        conn, cur = self._conn()
+        with patch.object(servertest, "get_read_connection", return_value=conn):
+            servertest.get_profiles_by_emails([" B@X.com", "a@x.com", "b@x.com"])
+        sql, params = cur.execute.call_args.args
+        self.assertNotIn("LOWER(", sql)
+        self.assertIn("WHERE email IN (?, ?)", sql)
+        self.assertEqual(params, ("a@x.com", "b@x.com"))
+
+    def test_ids_are_fetched_in_chunks_on_one_cursor(self):
+        conn, cur = self._conn()
+        with patch.object(servertest, "get_read_connection", return_value=conn), \
+             patch.object(servertest, "BATCH_GET_CHUNK", 2):
+            servertest.find_tasks_by_ids(["t1", "t2", "t3"])
+        self.assertEqual([len(c.args[1]) for c in cur.execute.call_args_list], [2, 1])
+        self.assertEqual(conn.cursor.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
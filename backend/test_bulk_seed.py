@@ -0,0 +1,107 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import servertest
+from servertest import _chunked, _iter_json_records, bulk_seed_roles_from_users_json, bulk_seed_tasks_from_json
+
+
+class SeedTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+    def _file(self, data, name="seed.json"):
+        path = os.path.join(self.tmp, name)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        return path
+
+    def _conn(self, fetched=()):
+        cur = MagicMock()
+        cur.fetchall.return_value = list(fetched)
+        conn = MagicMock()
+        conn.__enter__.return_value = conn
+        conn.cursor.return_value = cur
+        p = patch.object(servertest, "get_db_connection", return_value=conn)
+        p.start()
+        self.addCleanup(p.stop)
+        return conn, cur
+
+
+class JsonRecordTests(SeedTestCase):
+
+    def test_array_and_mapping_files_yield_records(self):
+        array = self._file([{"a": 1}, {"a": 2}], "array.json")
+        mapping = self._file({"x": {"a": 1}, "y": {"a": 2}}, "mapping.json")
+        for ijson in (servertest.ijson, None):
+            with patch.object(servertest, "ijson", ijson):
+                self.assertEqual([r["a"] for r in _iter_json_records(array)], [1, 2])
+                self.assertEqual([r["a"] for r in _iter_json_records(mapping)], [1, 2])
+
+    def test_empty_file_yields_nothing(self):
+        path = os.path.join(self.tmp, "empty.json")
+        open(path, "w").close()
+        self.assertEqual(list(_iter_json_records(path)), [])
+
+    def test_chunked(self):
+        self.assertEqual(list(_chunked(range(5), 2)), [[0, 1], [2, 3], [4]])
+
+
+class BulkSeedRolesTests(SeedTestCase):
+
+    def test_dedupes_against_the_file_and_the_latest_profiles(self):
+        path = self._file({
+            "1": {"email": "Same@x.com", "display_name": "Same", "role": "hr", "status": "active"},
+            "2": {"email": "new@x.com", "display_name": "New", "status": "active",
+                  "role_id": "33333333-3333-3333-3333-333333333333"},
+            "3": {"email": "new@x.com", "display_name": "Again", "status": "active"},
+            "4": {"display_name": "No email", "status": "active"},
+            "5": {"email": "other@x.com", "status": "active"},
+        })
+        conn, cur = self._conn(fetched=[("same@x.com", "Same", "HR")])
+        with patch.object(servertest, "_profile_changed"):
+            summary = bulk_seed_roles_from_users_json(path, env="dev")
+        self.assertEqual((summary["total"], summary["inserted"], summary["skipped"], summary["failed"]), (5, 2, 2, 1))
+
+        sqls = [c.args[0] for c in cur.executemany.call_args_list]
+        self.assertIn("role_id", sqls[0])          # row with a role_id
+        self.assertNotIn("role_id", sqls[1])       # role_id left to the proc
+        cur.execute.assert_called_with("EXEC dbo.MR_UpdateSubmissionIds")
+        conn.commit.assert_called_once_with()
+
+    def test_failed_batch_rolls_back_everything(self):
+        path = self._file([{"email": f"u{i}@x.com", "status": "active"} for i in range(3)])
+        conn, cur = self._conn()
+        cur.executemany.side_effect = [None, RuntimeError("constraint")]
+        summary = bulk_seed_roles_from_users_json(path, env="dev", batch_size=2)
+        self.assertEqual(summary["inserted"], 0)
+        self.assertEqual(summary["failed"], 3)
+        conn.rollback.assert_called_once_with()
+        conn.commit.assert_not_called()
+
+
+class BulkSeedTasksTests(SeedTestCase):
+
+    def test_skips_existing_and_duplicate_ids_and_aliases_id(self):
+        path = self._file([
+            {"id": "t1", "name": "a"},
+            {"task_id": "t2", "name": "b"},
+            {"task_id": "t1", "name": "dup"},
+            {"name": "no id"},
+        ])
+        conn, cur = self._conn(fetched=[("t2",)])
+        with patch.object(servertest, "_tasks_changed"):
+            summary = bulk_seed_tasks_from_json(path)
+        self.assertEqual((summary["inserted"], summary["skipped"], summary["failed"]), (1, 2, 1))
+        rows = cur.executemany.call_args.args[1]
+        self.assertEqual([r[0] for r in rows], ["t1"])
+        self.assertEqual(rows[0][servertest.TASK_INSERT_COLS.index("Status")], "Open")
+
+
+if __name__ == "__main__":
+    unittest.main()
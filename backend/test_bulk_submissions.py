@@ -0,0 +1,94 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import jwt_utils
+import servertest
+from app import app, _parse_bulk_rows
+from servertest import bulk_insert_onboard_requests
+from statement_cache import StatementCache
+from users_rbac import PERMISSIONS
+
+TEST_SECRET = "unit-test-secret-0123456789abcdef0123456789"
+
+
+class ParseBulkRowsTests(unittest.TestCase):
+
+    def test_csv_json_lines_and_array(self):
+        self.assertEqual(_parse_bulk_rows("Type,Manager\nnew,Bob\n", "text/csv", ""), [{"Type": "new", "Manager": "Bob"}])
+        rows = _parse_bulk_rows('{"Type": "new"}\n\nnot json\n', "application/x-ndjson", "")
+        self.assertEqual(rows[0], {"Type": "new"})
+        self.assertIsInstance(rows[1], ValueError)
+        self.assertIn("line 3", str(rows[1]))
+        self.assertEqual(_parse_bulk_rows(' [{"Type": "a"}]', "application/json", ""), [{"Type": "a"}])
+
+
+class BulkInsertTests(unittest.TestCase):
+
+    def test_rows_are_validated_and_inserted_with_cached_statements(self):
+        stmts = StatementCache()
+        cur = MagicMock()
+        conn = MagicMock()
+        conn.__enter__.return_value = conn
+        conn.cursor.return_value = cur
+        inserted = []
+        with patch.object(servertest, "STATEMENTS", stmts), \
+             patch.object(servertest, "get_db_connection", return_value=conn), \
+             patch.object(servertest.submission_rollup, "apply_deltas"), \
+             patch.object(servertest, "_publish_many"):
+            summary = bulk_insert_onboard_requests(
+                [{"Type": "new", "PayRate": "20"}, {"Type": "new", "PayRate": "lots"}, {"Type": "rehire", "PayRate": "21"}],
+                on_inserted=lambda sid, row: inserted.append(row["Type"]),
+            )
+        self.assertEqual((summary["inserted"], summary["failed"]), (2, 1))
+        self.assertIn("PayRate: not a number", summary["results"][1]["error"])
+        self.assertEqual(inserted, ["new", "rehire"])
+
+        sql, params = cur.executemany.call_args.args
+        self.assertEqual(stmts.stats()["misses"], 1)          # both rows share one column set
+        self.assertTrue(sql.startswith("INSERT INTO OnBoardRequestForm ([submission_id], "))
+        self.assertEqual(len(params), 2)
+        self.assertNotIn("20", [str(v) for v in params[0]])  # PayRate is encrypted
+
+
+class ExportTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.test_client()
+        p = patch.object(jwt_utils, "JWT_SECRET", TEST_SECRET)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def _export(self, role, columns="submission_id,PayRate"):
+        token = jwt_utils.make_access_token("a@example.com", role, {"env": "prod"})
+        rows = [{"submission_id": "s1", "PayRate": "25"}]
+
+        def fake_iter(columns, created_by, env):
+            return iter([{c: r[c] for c in columns} for r in rows])
+
+        with patch("app.iter_onboard_requests", side_effect=fake_iter) as it:
+            resp = self.client.get(f"/api/submissions/export?format=jsonl&columns={columns}",
+                                   headers={"Authorization": f"Bearer {token}"})
+            body = resp.get_data(as_text=True)
+        return resp, body, it
+
+    def test_export_needs_read_all(self):
+        resp, _body, it = self._export("fr")
+        self.assertEqual(resp.status_code, 403)
+        it.assert_not_called()
+
+    def test_pay_rate_is_masked_without_pay_read(self):
+        auditor = {PERMISSIONS["READ_ALL"]}
+        with patch.dict("app.ROLE_PERMISSIONS", {"auditor": auditor}):
+            resp, body, it = self._export("auditor")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(it.call_args.kwargs["columns"], ["submission_id"])
+        self.assertEqual(app.json.loads(body.strip()), {"submission_id": "s1", "PayRate": None})
+
+    def test_hr_gets_pay_rate(self):
+        resp, body, _it = self._export("hr")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(app.json.loads(body.strip())["PayRate"], "25")
+
+
+if __name__ == "__main__":
+    unittest.main()
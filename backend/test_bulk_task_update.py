@@ -0,0 +1,61 @@
+import unittest
+from unittest.mock import patch
+
+import jwt_utils
+from app import app
+from servertest import bulk_update_tasks
+
+TEST_SECRET = "unit-test-secret-0123456789abcdef0123456789"
+
+
+class BulkTaskUpdateRouteTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.test_client()
+        p = patch.object(jwt_utils, "JWT_SECRET", TEST_SECRET)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def _headers(self, role):
+        token = jwt_utils.make_access_token("a@example.com", role, {"env": "prod"})
+        return {"Authorization": f"Bearer {token}"}
+
+    def test_requires_auth(self):
+        resp = self.client.post("/api/tasks/bulk-update", json={"task_ids": ["t1"], "fields": {"Status": "Done"}})
+        self.assertEqual(resp.status_code, 401)
+
+    def test_requires_roles_edit(self):
+        with patch("app.bulk_update_tasks") as bulk:
+            resp = self.client.post("/api/tasks/bulk-update", json={"task_ids": ["t1"], "fields": {"Status": "Done"}},
+                                    headers=self._headers("fr"))
+        self.assertEqual(resp.status_code, 403)
+        self.assertEqual(resp.get_json()["need"], "roles:edit")
+        bulk.assert_not_called()
+
+    def test_hr_applies_one_change_to_many_tasks(self):
+        with patch("app.bulk_update_tasks", return_value={"total": 2, "updated": 2}) as bulk:
+            resp = self.client.post("/api/tasks/bulk-update", json={"task_ids": ["t1", "t2"], "fields": {"Status": "Done"}},
+                                    headers=self._headers("hr"))
+        self.assertEqual(resp.status_code, 200)
+        updates = bulk.call_args.args[0]
+        self.assertEqual(updates, [{"Status": "Done", "task_id": "t1"}, {"Status": "Done", "task_id": "t2"}])
+        self.assertEqual(bulk.call_args.kwargs["env"], "prod")
+
+
+class BulkUpdateValidationTests(unittest.TestCase):
+
+    def test_invalid_items_are_reported_without_touching_the_db(self):
+        with patch("servertest.get_db_connection") as connect:
+            summary = bulk_update_tasks([
+                {"task_id": "t1", "env": "prod"},
+                {"Status": "Done"},
+                {"task_id": "t3"},
+            ])
+        connect.assert_not_called()
+        self.assertEqual(summary["invalid"], 3)
+        self.assertEqual([r["error"] for r in summary["results"]],
+                         ["unknown columns: env", "task_id is required", "no fields to update"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+import unittest
+from functools import wraps
+from unittest.mock import patch
+
+from flask import Flask, jsonify, request
+
+import change_events
+from change_events import Subscriber, publish, register_change_event_routes, stream
+from env_context import env_scope, set_env
+
+
+def _fake_auth(f):
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        if not request.headers.get("Authorization"):
+            return jsonify({"message": "Authorization header is missing"}), 401
+        return f(*args, **kwargs)
+    return wrapper
+
+
+class ChangeEventsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        for p in (
+            patch.object(change_events, "CHANGE_EVENTS_DB", os.path.join(tmp, "events.sqlite3")),
+            patch.object(change_events, "_initialized", False),
+            patch.object(change_events, "_ensure_poller", lambda: None),
+            patch.object(change_events, "_subscribers", set()),
+        ):
+            p.start()
+            self.addCleanup(p.stop)
+
+
+class SubscriberTests(ChangeEventsTestCase):
+
+    def test_filters_by_env_kind_submission_and_assignee(self):
+        sub = Subscriber(env="prod", assignee="IT@x.com", submission_id=None, kinds={"task"})
+        self.assertTrue(sub.matches({"kind": "task", "env": "prod", "assignee": "it@x.com"}))
+        self.assertFalse(sub.matches({"kind": "task", "env": "dev", "assignee": "it@x.com"}))
+        self.assertFalse(sub.matches({"kind": "task", "env": "prod", "assignee": "hr@x.com"}))
+        self.assertFalse(sub.matches({"kind": "submission", "env": "prod"}))
+
+    def test_slow_client_gets_a_resync_instead_of_an_unbounded_buffer(self):
+        sub = Subscriber(env=None, assignee=None, submission_id=None, kinds=None, maxlen=2)
+        for i in range(3):
+            sub.offer({"kind": "task", "n": i})
+        self.assertEqual([e["action"] for e in sub.drain(0)], ["resync"])
+        self.assertEqual(sub.drain(0), [])
+
+    def test_publish_logs_and_fans_out_with_the_current_env(self):
+        sub = Subscriber(env="prod", assignee=None, submission_id=None, kinds=None)
+        change_events._subscribers.add(sub)
+        with env_scope("prod"):
+            self.assertEqual(publish("task", "updated", task_id="t1"), 1)
+        with env_scope("dev"):
+            publish("task", "updated", task_id="t2")
+        events = sub.drain(0)
+        self.assertEqual([e["task_id"] for e in events], ["t1"])
+        self.assertEqual([r["id"] for r in change_events._read_since(0)], [1, 2])
+
+    def test_reconnect_replays_missed_events(self):
+        with env_scope("prod"):
+            publish("task", "created", task_id="t1")
+            publish("task", "created", task_id="t2")
+        sub = Subscriber(env="prod", assignee=None, submission_id=None, kinds=None)
+        gen = stream(sub, last_event_id=1)
+        self.assertIn("connected", next(gen))
+        replayed = next(gen)
+        self.assertTrue(replayed.startswith("id: 2\nevent: task\n"))
+        gen.close()
+
+
+class StreamRouteTests(ChangeEventsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        app = Flask(__name__)
+
+        @app.before_request
+        def _env():
+            set_env("prod")
+
+        register_change_event_routes(app, _fake_auth)
+        self.client = app.test_client()
+
+    def test_requires_auth(self):
+        self.assertEqual(self.client.get("/api/events/stream").status_code, 401)
+
+    def test_env_comes_from_the_caller_not_the_query(self):
+        resp = self.client.get("/api/events/stream?env=dev", headers={"Authorization": "Bearer x"}, buffered=False)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([s.env for s in change_events._subscribers], ["prod"])
+        resp.close()
+
+    def test_stream_count_is_bounded(self):
+        with patch.object(change_events, "CHANGE_STREAM_MAX_CLIENTS", 0):
+            resp = self.client.get("/api/events/stream", headers={"Authorization": "Bearer x"})
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(resp.headers["Retry-After"], "10")
+
+
+if __name__ == "__main__":
+    unittest.main()
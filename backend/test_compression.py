@@ -0,0 +1,96 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from flask import Flask, Response
+
+from compression import choose_encoding, init_compression, register_frontend_routes
+
+
+class ChooseEncodingTests(unittest.TestCase):
+
+    def test_gzip_when_accepted(self):
+        self.assertEqual(choose_encoding("gzip, deflate", available=("gzip",)), "gzip")
+
+    def test_q_zero_and_missing_header_disable_compression(self):
+        self.assertIsNone(choose_encoding("gzip;q=0", available=("gzip",)))
+        self.assertIsNone(choose_encoding("", available=("gzip",)))
+
+    def test_wildcard(self):
+        self.assertEqual(choose_encoding("*", available=("gzip",)), "gzip")
+        self.assertIsNone(choose_encoding("*;q=0", available=("gzip",)))
+
+
+class CompressionMiddlewareTests(unittest.TestCase):
+
+    def setUp(self):
+        app = Flask(__name__)
+        init_compression(app, min_bytes=100)
+
+        @app.get("/big")
+        def big():
+            return {"items": ["x" * 50] * 20}
+
+        @app.get("/small")
+        def small():
+            return {"ok": True}
+
+        @app.get("/stream")
+        def stream():
+            return Response((f"line {i}\n" for i in range(50)), mimetype="text/plain")
+
+        self.client = app.test_client()
+        self.gzip = {"Accept-Encoding": "gzip"}
+
+    def test_large_json_is_gzipped(self):
+        resp = self.client.get("/big", headers=self.gzip)
+        self.assertEqual(resp.headers["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", resp.headers["Vary"])
+        self.assertIn(b'"items"', gzip.decompress(resp.data))
+
+    def test_small_or_unaccepted_responses_are_left_alone(self):
+        self.assertNotIn("Content-Encoding", self.client.get("/small", headers=self.gzip).headers)
+        self.assertNotIn("Content-Encoding", self.client.get("/big").headers)
+
+    def test_streamed_body_is_compressed_incrementally(self):
+        resp = self.client.get("/stream", headers=self.gzip)
+        self.assertEqual(resp.headers["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(resp.data).decode().count("line"), 50)
+
+
+class FrontendRoutesTests(unittest.TestCase):
+
+    def setUp(self):
+        self.build = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.build, ignore_errors=True)
+        os.makedirs(os.path.join(self.build, "static", "js"))
+        with open(os.path.join(self.build, "index.html"), "w") as f:
+            f.write("<html></html>")
+        js = os.path.join(self.build, "static", "js", "main.abc123.js")
+        with open(js, "w") as f:
+            f.write("console.log(1)")
+        with open(js + ".gz", "wb") as f:
+            f.write(gzip.compress(b"console.log(1)"))
+        app = Flask(__name__, static_folder=None)   # as in app.py
+        register_frontend_routes(app, self.build)
+        self.client = app.test_client()
+
+    def test_precompressed_hashed_asset_is_immutable(self):
+        resp = self.client.get("/static/js/main.abc123.js", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(resp.headers["Content-Encoding"], "gzip")
+        self.assertIn("immutable", resp.headers["Cache-Control"])
+        self.assertEqual(gzip.decompress(resp.data), b"console.log(1)")
+        resp.close()
+
+    def test_spa_fallback_but_not_for_missing_assets(self):
+        resp = self.client.get("/dashboard/tasks")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.headers["Cache-Control"], "no-cache")
+        resp.close()
+        self.assertEqual(self.client.get("/static/js/gone.js").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
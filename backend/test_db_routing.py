@@ -0,0 +1,110 @@
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pyodbc
+
+import db_routing
+import jwt_utils
+from app import app
+from db_routing import PIN_COOKIE, is_pinned, note_write, pin_key, primary_reads, read_connection
+
+
+class ReadRoutingTests(unittest.TestCase):
+
+    def setUp(self):
+        for name, value in (("REPLICA_SERVER", "replica.example"), ("_state", db_routing._ReplicaState())):
+            p = patch.object(db_routing, name, value)
+            p.start()
+            self.addCleanup(p.stop)
+        self.primary = MagicMock(name="primary")
+        self.primary_connect = MagicMock(return_value=self.primary)
+
+    def _replica(self, lag=None):
+        conn = MagicMock(name="replica")
+        conn.cursor.return_value.execute.return_value.fetchone.return_value = (lag,)
+        return conn
+
+    def test_reads_go_to_the_replica_when_configured(self):
+        replica = self._replica()
+        with patch.object(db_routing.pyodbc, "connect", return_value=replica) as connect:
+            self.assertIs(read_connection(self.primary_connect), replica)
+        self.assertIn("SERVER=replica.example;", connect.call_args.args[0])
+        self.primary_connect.assert_not_called()
+
+    def test_without_a_replica_reads_use_the_primary(self):
+        with patch.object(db_routing, "REPLICA_SERVER", None), patch.object(db_routing, "REPLICA_READ_INTENT", False):
+            self.assertIs(read_connection(self.primary_connect), self.primary)
+
+    def test_forced_primary_block_skips_the_replica(self):
+        with patch.object(db_routing.pyodbc, "connect") as connect, primary_reads():
+            self.assertIs(read_connection(self.primary_connect), self.primary)
+        connect.assert_not_called()
+
+    def test_failing_replica_falls_back_and_backs_off(self):
+        with patch.object(db_routing.pyodbc, "connect", side_effect=pyodbc.Error("down")) as connect:
+            self.assertIs(read_connection(self.primary_connect), self.primary)
+            self.assertIs(read_connection(self.primary_connect), self.primary)
+        self.assertEqual(connect.call_count, 1)   # second read skipped the replica during REPLICA_RETRY_S
+        self.assertEqual(db_routing.routing_stats()["fallbacks"], 1)
+
+    def test_lagging_replica_is_closed_and_the_primary_used(self):
+        replica = self._replica(lag=db_routing.REPLICA_MAX_LAG_S + 5)
+        with patch.object(db_routing.pyodbc, "connect", return_value=replica):
+            self.assertIs(read_connection(self.primary_connect), self.primary)
+        replica.close.assert_called_once()
+
+
+class ReadYourWritesPinTests(unittest.TestCase):
+
+    def setUp(self):
+        p = patch.object(db_routing, "_pins", {})
+        p.start()
+        self.addCleanup(p.stop)
+
+    def test_a_write_pins_the_caller_for_the_window(self):
+        key = pin_key("Bearer abc")
+        self.assertFalse(is_pinned(key))
+        with patch.object(db_routing, "READ_YOUR_WRITES_S", 60):
+            note_write(key)
+        self.assertTrue(is_pinned(key))
+        self.assertFalse(is_pinned(pin_key("Bearer other")))
+
+    def test_the_cookie_carries_the_pin_across_workers(self):
+        self.assertTrue(is_pinned("unknown-here", f"{time.time() + 30:.3f}"))
+        self.assertFalse(is_pinned("unknown-here", f"{time.time() - 1:.3f}"))
+        self.assertFalse(is_pinned("unknown-here", "garbage"))
+
+    def test_pin_key_hashes_the_credential(self):
+        self.assertEqual(pin_key(""), "")
+        self.assertEqual(pin_key("", "10.0.0.1"), pin_key("10.0.0.1"))
+        self.assertNotIn("abc", pin_key("Bearer abc"))
+
+
+class WritePinCookieTests(unittest.TestCase):
+
+    def setUp(self):
+        p = patch.object(jwt_utils, "JWT_SECRET", "unit-test-secret-0123456789abcdef0123456789")
+        p.start()
+        self.addCleanup(p.stop)
+        token = jwt_utils.make_access_token("a@example.com", "hr", {"env": "prod"})
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.client = app.test_client()
+
+    def test_successful_write_sets_the_pin_cookie(self):
+        with patch("app.insert_onboard_request", return_value={"submission_id": "11111111-1111-1111-1111-111111111111"}), \
+             patch("app.enqueue_submission_tasks"):
+            resp = self.client.post("/api/submissions", json={"a": 1}, headers=self.headers)
+        self.assertEqual(resp.status_code, 201)
+        self.assertIn(f"{PIN_COOKIE}=", resp.headers.get("Set-Cookie", ""))
+
+    def test_failed_write_does_not_pin(self):
+        with patch("app.insert_onboard_request", return_value=None), \
+             patch("app.enqueue_submission_tasks"):
+            resp = self.client.post("/api/submissions", json={"a": 1}, headers=self.headers)
+        self.assertGreaterEqual(resp.status_code, 400)
+        self.assertNotIn(PIN_COOKIE, resp.headers.get("Set-Cookie", ""))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+
+from concurrency import run_parallel
+from env_context import DEFAULT_ENV, env_scope, get_env, reset_env, set_env
+
+
+class EnvContextTests(unittest.TestCase):
+
+    def test_env_scope_restores_the_outer_env(self):
+        token = set_env("dev")
+        try:
+            with env_scope("prod"):
+                self.assertEqual(get_env(), "prod")
+            self.assertEqual(get_env(), "dev")
+        finally:
+            reset_env(token)
+
+    def test_set_env_normalizes_and_defaults(self):
+        token = set_env("  PROD ")
+        self.assertEqual(get_env(), "prod")
+        reset_env(token)
+        token = set_env("")
+        self.assertEqual(get_env(), DEFAULT_ENV)
+        reset_env(token)
+
+    def test_run_parallel_carries_the_env_into_pool_threads(self):
+        with env_scope("prod"):
+            self.assertEqual(run_parallel(get_env, get_env, get_env), ["prod", "prod", "prod"])
+        with env_scope("dev"):
+            self.assertEqual(run_parallel(get_env), ["dev"])
+
+
+if __name__ == "__main__":
+    unittest.main()
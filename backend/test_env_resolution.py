@@ -0,0 +1,99 @@
+import unittest
+from unittest.mock import patch
+
+import jwt
+
+import jwt_utils
+from app import app, _caller_env
+from env_context import get_env
+from token_cache import TOKEN_CACHE
+
+TEST_SECRET = "unit-test-secret-0123456789abcdef0123456789"
+
+
+class CallerEnvTests(unittest.TestCase):
+
+    def setUp(self):
+        TOKEN_CACHE.clear()
+        self.addCleanup(TOKEN_CACHE.clear)
+        p = patch.object(jwt_utils, "JWT_SECRET", TEST_SECRET)
+        p.start()
+        self.addCleanup(p.stop)
+
+    @patch("app.get_env_for_caller", return_value="prod")
+    def test_spa_role_id_headers_resolve_from_the_profile(self, lookup):
+        # what DashboardPage / SubmissionsPage / getAuthHeaders send for a prod user
+        for header in ("Bearer :r-123", "Bearer demo:r-123", "Bearer r-123"):
+            self.assertEqual(_caller_env(header), "prod", header)
+        self.assertEqual([c.args[0] for c in lookup.call_args_list], ["r-123"] * 3)
+
+    @patch("app.get_env_for_caller", return_value="prod")
+    def test_user_email_header_resolves_from_the_profile(self, lookup):
+        self.assertEqual(_caller_env("", "a@example.com"), "prod")
+        lookup.assert_called_once_with("a@example.com")
+
+    @patch("app.get_env_for_caller", return_value=None)
+    def test_unknown_or_missing_caller_is_unresolved(self, _lookup):
+        self.assertIsNone(_caller_env("Bearer demo:nobody"))
+        self.assertIsNone(_caller_env(""))
+        self.assertIsNone(_caller_env("Basic abc"))
+
+    @patch("app.get_env_for_caller")
+    def test_session_token_env_comes_from_its_claims(self, lookup):
+        token = jwt_utils.make_access_token("a@example.com", "hr", {"env": "prod"})
+        self.assertEqual(_caller_env(f"Bearer {token}"), "prod")
+        lookup.assert_not_called()
+
+    def test_invalid_session_token_is_unresolved(self):
+        token = jwt_utils.make_access_token("a@example.com", "hr", {"env": "prod"})
+        with patch.object(jwt_utils, "JWT_SECRET", "another-secret-0123456789abcdef0123456789"):
+            self.assertIsNone(_caller_env(f"Bearer {token}"))
+
+    def test_microsoft_token_is_prod_only_once_verified(self):
+        with patch("app.verify_microsoft_id_token", return_value={"oid": "1", "exp": 4102444800}):
+            self.assertEqual(_caller_env("Bearer aaa.bbb.ccc"), "prod")
+        TOKEN_CACHE.clear()
+        with patch("app.verify_microsoft_id_token", side_effect=jwt.InvalidSignatureError("bad")):
+            self.assertIsNone(_caller_env("Bearer aaa.bbb.ccc"))
+
+
+class RequestEnvBindingTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.test_client()
+        p = patch.object(jwt_utils, "JWT_SECRET", TEST_SECRET)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def test_submission_and_task_routes_require_auth(self):
+        sid = "00000000-0000-0000-0000-000000000000"
+        self.assertEqual(self.client.get(f"/api/submissions/{sid}").status_code, 401)
+        self.assertEqual(self.client.get("/api/tasks").status_code, 401)
+        self.assertEqual(self.client.post("/api/submissions", json={"a": 1}).status_code, 401)
+        self.assertEqual(self.client.put("/api/submissions", json={"a": 1}).status_code, 401)
+        self.assertEqual(self.client.post("/api/tasks/update", json={"a": 1}).status_code, 401)
+
+    @patch("app.get_env_for_caller", return_value=None)
+    def test_write_with_unresolvable_env_is_rejected(self, _lookup):
+        with patch("app.insert_onboard_request") as insert:
+            resp = self.client.post("/api/submissions", json={"a": 1}, headers={"Authorization": "Bearer demo:ghost"})
+        self.assertEqual(resp.status_code, 401)
+        insert.assert_not_called()
+
+    def test_session_token_write_lands_in_the_token_env(self):
+        token = jwt_utils.make_access_token("a@example.com", "hr", {"env": "prod"})
+        seen = {}
+
+        def fake_insert(data):
+            seen["env"] = get_env()
+            return {"submission_id": "11111111-1111-1111-1111-111111111111"}
+
+        with patch("app.insert_onboard_request", side_effect=fake_insert), \
+             patch("app.enqueue_submission_tasks"):
+            resp = self.client.post("/api/submissions", json={"a": 1}, headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(seen["env"], "prod")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+import servertest
+from app import app, filter_by_env, select_with_env
+from env_context import env_scope
+
+
+class EnvPredicateTests(unittest.TestCase):
+
+    def test_fragment_and_params(self):
+        self.assertEqual(servertest._env_predicate("prod", first=True), (" WHERE env = ?", ("prod",)))
+        self.assertEqual(servertest._env_predicate(" dev "), (" AND env = ?", ("dev",)))
+        self.assertEqual(servertest._env_predicate(None), ("", ()))
+        self.assertEqual(servertest._env_predicate("  "), ("", ()))
+
+    def test_read_helper_scopes_in_sql(self):
+        cur = MagicMock()
+        cur.fetchone.return_value = None
+        conn = MagicMock()
+        conn.__enter__.return_value = conn
+        conn.cursor.return_value = cur
+        with patch.object(servertest, "get_read_connection", return_value=conn):
+            servertest.get_onboard_request_by_id("sid", env="prod")
+        sql, params = cur.execute.call_args.args
+        self.assertTrue(sql.endswith("WHERE submission_id = ? AND env = ?"))
+        self.assertEqual(params, ("sid", "prod"))
+
+
+class SelectWithEnvTests(unittest.TestCase):
+
+    def test_request_env_is_passed_to_helpers_that_take_it(self):
+        seen = {}
+
+        def helper(x, env=None):
+            seen["env"] = env
+            return [{"env": env, "x": x}]
+
+        with app.app_context(), env_scope("prod"):
+            self.assertEqual(select_with_env(helper)(1), [{"env": "prod", "x": 1}])
+        self.assertEqual(seen["env"], "prod")
+
+    def test_explicit_env_wins_and_helpers_without_env_are_called_plainly(self):
+        with app.app_context(), env_scope("prod"):
+            self.assertEqual(select_with_env(lambda env=None: env)(env="dev"), "dev")
+            self.assertEqual(select_with_env(lambda: 42)(), 42)
+
+    def test_rows_from_another_env_are_dropped(self):
+        with app.app_context(), env_scope("prod"):
+            rows = filter_by_env([{"env": "prod", "id": 1}, {"env": "dev", "id": 2}, {"id": 3}])
+            self.assertEqual([r["id"] for r in rows], [1, 3])
+            df = filter_by_env(pd.DataFrame([{"env": "prod"}, {"env": "dev"}]))
+            self.assertEqual(list(df["env"]), ["prod"])
+            self.assertEqual(filter_by_env({"env": "dev", "id": 1}), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import time
+import unittest
+from unittest.mock import patch
+
+import jwt
+
+import jwt_utils
+from jwt_utils import (
+    bump_user_epoch,
+    decode_token,
+    is_session_token,
+    make_access_token,
+    make_refresh_token,
+    revoke_token,
+    session_tokens_enabled,
+    verify_session_token,
+)
+
+TEST_SECRET = "unit-test-secret-0123456789abcdef0123456789"
+
+
+class SessionTokenTests(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(jwt_utils, "JWT_SECRET", TEST_SECRET)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        jwt_utils._REVOKED_JTI.clear()
+        jwt_utils._USER_NOT_BEFORE.clear()
+
+    def test_access_token_round_trip(self):
+        token = make_access_token("a@example.com", "hr", {"env": "prod", "perms": 7})
+        self.assertTrue(is_session_token(token))
+        claims = verify_session_token(token)
+        self.assertEqual(claims["sub"], "a@example.com")
+        self.assertEqual(claims["role"], "hr")
+        self.assertEqual(claims["env"], "prod")
+        self.assertEqual(claims["typ"], "access")
+
+    def test_refresh_token_is_not_an_access_token(self):
+        refresh = make_refresh_token("a@example.com", {"env": "prod"})
+        with self.assertRaises(jwt.InvalidTokenError):
+            verify_session_token(refresh)
+        self.assertEqual(verify_session_token(refresh, typ="refresh")["env"], "prod")
+
+    def test_tampered_token_is_rejected(self):
+        token = make_access_token("a@example.com", "simple")
+        forged = jwt.encode({**decode_token(token), "role": "admin"}, "some-other-secret", algorithm="HS256")
+        self.assertTrue(is_session_token(forged))   # looks like ours ...
+        with self.assertRaises(jwt.InvalidTokenError):
+            verify_session_token(forged)            # ... but the signature doesn't verify
+
+    def test_foreign_tokens_are_not_session_tokens(self):
+        foreign = jwt.encode({"iss": "https://login.microsoftonline.com/x", "sub": "a"}, "k", algorithm="HS256")
+        self.assertFalse(is_session_token(foreign))
+        self.assertFalse(is_session_token("demo:abc"))
+        self.assertFalse(is_session_token(""))
+
+    def test_revoked_jti_is_rejected(self):
+        token = make_refresh_token("a@example.com")
+        claims = verify_session_token(token, typ="refresh")
+        revoke_token(claims)
+        with self.assertRaises(jwt.InvalidTokenError):
+            verify_session_token(token, typ="refresh")
+
+    def test_user_epoch_kills_earlier_tokens_only(self):
+        before = make_access_token("A@example.com", "admin")
+        bump_user_epoch("a@example.com")
+        with self.assertRaises(jwt.InvalidTokenError):
+            verify_session_token(before)
+        time.sleep(0.002)
+        after = make_access_token("A@example.com", "simple")
+        self.assertEqual(verify_session_token(after)["role"], "simple")
+
+    def test_epoch_in_the_same_second_still_revokes(self):
+        # second-resolution iat used to let a token minted in the bump's second survive
+        with patch.object(jwt_utils.time, "time_ns", return_value=1_700_000_000_100_000_000):
+            token = make_access_token("a@example.com", "admin")
+        with patch.object(jwt_utils.time, "time_ns", return_value=1_700_000_000_900_000_000):
+            bump_user_epoch("a@example.com")
+        with self.assertRaises(jwt.InvalidTokenError):
+            verify_session_token(token)
+
+
+class SecretRequiredTests(unittest.TestCase):
+
+    def test_unset_secret_disables_session_tokens(self):
+        with patch.object(jwt_utils, "JWT_SECRET", ""):
+            self.assertFalse(session_tokens_enabled())
+            with self.assertRaises(RuntimeError):
+                make_access_token("a@example.com", "admin")
+
+    def test_default_secret_is_refused_without_opt_in(self):
+        forged = jwt.encode(
+            {"iss": jwt_utils.JWT_ISSUER, "aud": jwt_utils.JWT_AUDIENCE, "sub": "x@example.com",
+             "iat": int(time.time()), "nbf": int(time.time()), "exp": int(time.time()) + 600,
+             "typ": "access", "role": "admin", "env": "prod"},
+            jwt_utils._DEV_SECRET, algorithm="HS256",
+        )
+        with patch.object(jwt_utils, "JWT_SECRET", jwt_utils._DEV_SECRET), \
+             patch.object(jwt_utils, "JWT_ALLOW_DEV_SECRET", False):
+            self.assertFalse(session_tokens_enabled())
+            with self.assertRaises(jwt.InvalidTokenError):
+                verify_session_token(forged)
+        with patch.object(jwt_utils, "JWT_SECRET", jwt_utils._DEV_SECRET), \
+             patch.object(jwt_utils, "JWT_ALLOW_DEV_SECRET", True):
+            self.assertEqual(verify_session_token(forged)["role"], "admin")
+
+
+if __name__ == "__main__":
+    unittest.main()
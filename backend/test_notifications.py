@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import notifications
+import servertest
+from notifications import coalesce_messages, flush_digests, notify_new_tasks, render_task_messages
+
+
+class CoalesceMessagesTests(unittest.TestCase):
+
+    def _msg(self, channel, to, task_id):
+        return {"channel": channel, "to": to, "subject": f"Task {task_id}", "body": f"do {task_id}", "task_id": task_id}
+
+    def test_one_digest_per_channel_and_recipient(self):
+        out = coalesce_messages([
+            self._msg("email", "A@x.com", "t1"),
+            self._msg("email", "a@x.com", "t2"),
+            self._msg("sms", "5551234", "t3"),
+        ])
+        self.assertEqual(len(out), 2)
+        digest = next(m for m in out if m["channel"] == "email")
+        self.assertEqual(digest["task_id"], ["t1", "t2"])
+        self.assertEqual(digest["subject"], "2 onboarding tasks assigned to you")
+        self.assertIn("do t1", digest["body"])
+        self.assertIn("do t2", digest["body"])
+
+    def test_single_messages_pass_through(self):
+        msg = self._msg("email", "a@x.com", "t1")
+        self.assertEqual(coalesce_messages([msg]), [msg])
+
+
+class CategoryTemplateTests(unittest.TestCase):
+
+    def test_sms_template_is_filled_from_taskcategory_json(self):
+        row = {"event_key": "EmployeeID_Requested_Insert", "env": "dev", "task_type": "Employee ID Issuance",
+               "to_phone": "19045550100", "email_body_template": "from the table"}
+        filled = servertest._fill_category_templates(dict(row), None)
+        self.assertIn("{employee_full_name}", filled["sms_message_template"])
+        self.assertEqual(filled["email_body_template"], "from the table")
+
+        messages = render_task_messages(
+            [{"task_id": "t1", "task_type": "Employee ID Issuance", "employee_full_name": "Ada L"}],
+            {filled["event_key"]: filled},
+        )
+        sms = [m for m in messages if m["channel"] == "sms"]
+        self.assertEqual(len(sms), 1)
+        self.assertIn("Ada L", sms[0]["body"])
+
+
+class DigestBufferTests(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        for p in (
+            patch.object(notifications, "NOTIFY_DIGEST_DB", os.path.join(tmp, "digest.sqlite3")),
+            patch.object(notifications, "NOTIFY_TRANSPORT", "file"),
+            patch.object(notifications, "NOTIFY_DIGEST_WINDOW_S", 30),
+            patch.object(notifications, "_arm_digest_timer", lambda: None),
+        ):
+            p.start()
+            self.addCleanup(p.stop)
+        self.categories = {"k": {"task_type": "IT", "to_email": "it@x.com", "email_body_template": "laptop for {employee_full_name}"}}
+
+    def test_buffered_messages_survive_until_flushed(self):
+        notify_new_tasks([{"task_id": "t1", "task_type": "IT", "employee_full_name": "Ada"}], self.categories)
+        notify_new_tasks([{"task_id": "t2", "task_type": "IT", "employee_full_name": "Bob"}], self.categories)
+
+        with patch.object(notifications, "dispatch", side_effect=len) as dispatch:
+            self.assertEqual(flush_digests(), 1)
+            self.assertEqual(flush_digests(), 0)
+        digest = dispatch.call_args_list[0].args[0][0]
+        self.assertEqual(digest["task_id"], ["t1", "t2"])
+
+    def test_start_digest_flusher_arms_only_with_pending_messages(self):
+        with patch.object(notifications, "_arm_digest_timer") as arm:
+            notifications.start_digest_flusher()
+            arm.assert_not_called()
+            notifications._buffer_messages([{"channel": "email", "to": "a@x.com", "subject": "s", "body": "b", "task_id": "t1"}])
+            notifications.start_digest_flusher()
+            arm.assert_called_once_with()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+from unittest.mock import patch
+
+import servertest
+from servertest import delete_onboard_request, insert_onboard_request, insert_profile_returning
+
+
+class FakeCursor:
+    """Replays a batch: each result is (columns or None for a row count, rows)."""
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.executed = []
+        self._i = 0
+
+    def execute(self, sql, params=()):
+        self.executed.append((sql, tuple(params)))
+        self._i = 0
+        return self
+
+    @property
+    def description(self):
+        if self._i >= len(self.results) or self.results[self._i][0] is None:
+            return None
+        return [(c,) for c in self.results[self._i][0]]
+
+    def fetchall(self):
+        rows = self.results[self._i][1]
+        self.results[self._i] = (self.results[self._i][0], [])
+        return rows
+
+    def fetchone(self):
+        rows = self.fetchall()
+        return rows[0] if rows else None
+
+    def nextset(self):
+        self._i += 1
+        return self._i < len(self.results)
+
+    @property
+    def drained(self):
+        return self._i >= len(self.results) - 1 and not self.results[-1][1]
+
+
+class FakeConn:
+    def __init__(self, cursor):
+        self.cur = cursor
+        self.commits = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return self.cur
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+class OutputReturningTests(unittest.TestCase):
+
+    def _conn(self, results):
+        cur = FakeCursor(results)
+        conn = FakeConn(cur)
+        p = patch.object(servertest, "get_db_connection", return_value=conn)
+        p.start()
+        self.addCleanup(p.stop)
+        return cur
+
+    def test_profile_insert_leaves_nocount_off_and_drains_the_batch(self):
+        cols = list(servertest.PROFILE_RETURN_COLUMNS)
+        row = tuple("x" for _ in cols)
+        cur = self._conn([(None, []), (None, []), (cols, [row]), (None, [])])
+        with patch.object(servertest, "_profile_changed"):
+            got = insert_profile_returning("Ada", "a@example.com", "hr", "me", "2024-01-01", "2024-01-01", "pw", "active")
+        sql = cur.executed[0][0]
+        self.assertNotIn("NOCOUNT", sql.upper())
+        self.assertIn("INTO @ins", sql)
+        self.assertEqual(got, dict(zip(cols, row)))
+        self.assertTrue(cur.drained)
+
+    def test_submission_insert_outputs_into_a_table_variable(self):
+        cur = self._conn([(None, []), (["submission_id", "env", "Createdby", "CreatedAt"], [("sid", "dev", "me", None)])])
+        with patch.object(servertest.submission_rollup, "apply_deltas"), patch.object(servertest, "_publish"):
+            got = insert_onboard_request({"LegalFirstName": "Ada"})
+        sql = cur.executed[0][0]
+        self.assertIn("OUTPUT INSERTED.[submission_id] INTO @ins", sql)
+        self.assertNotIn("INSERTED.*", sql)
+        self.assertEqual(got["submission_id"], "sid")
+
+    def test_submission_delete_outputs_into_a_table_variable(self):
+        cur = self._conn([(None, []), (["env", "Createdby", "CreatedAt"], [("dev", "me", None)])])
+        with patch.object(servertest.submission_rollup, "apply_deltas") as deltas, patch.object(servertest, "_publish"):
+            self.assertTrue(delete_onboard_request("sid"))
+        self.assertIn("INTO @del", cur.executed[0][0])
+        deltas.assert_called_once()
+
+    def test_first_result_row_skips_row_counts(self):
+        cur = FakeCursor([(None, []), (["a"], [(1,), (2,)]), (None, [])])
+        self.assertEqual(servertest._first_result_row(cur), {"a": 1})
+        self.assertTrue(cur.drained)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import servertest
+from env_context import env_scope
+from resilience import CircuitBreaker, CircuitOpenError
+
+
+class CircuitBreakerTests(unittest.TestCase):
+
+    def test_opens_after_failures_then_probes_once(self):
+        breaker = CircuitBreaker("t", failures=2, window_s=60, open_s=30)
+        for _ in range(2):
+            with self.assertRaises(OSError), breaker.guard((OSError,)):
+                raise OSError("down")
+        self.assertEqual(breaker.state, "open")
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+        with patch("resilience.time.time", return_value=breaker._opened_at + 31):
+            self.assertTrue(breaker.before_call())          # the half-open probe
+            with self.assertRaises(CircuitOpenError):
+                breaker.before_call()                       # everyone else still waits
+            breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+
+    def test_application_errors_do_not_count_as_outages(self):
+        breaker = CircuitBreaker("t", failures=1)
+        with self.assertRaises(ValueError), breaker.guard((OSError,)):
+            raise ValueError("bad input")
+        self.assertEqual(breaker.state, "closed")
+
+
+class HelperFailureTests(unittest.TestCase):
+
+    def test_open_circuit_reaches_the_route_as_503_not_name_error(self):
+        with patch.object(servertest, "get_read_connection", side_effect=CircuitOpenError("db", 5)):
+            with self.assertRaises(CircuitOpenError):
+                servertest.list_all_tasks_simple()
+
+    def test_other_errors_return_the_default_outside_dev(self):
+        with env_scope("prod"), patch.object(servertest, "get_read_connection", side_effect=RuntimeError("boom")):
+            self.assertEqual(servertest.list_all_tasks_simple(), [])
+
+    def _conn(self, timeout=30):
+        conn = MagicMock()
+        conn.__enter__.return_value = conn
+        conn.timeout = timeout
+        cur = conn.cursor.return_value
+        cur.fetchall.return_value = [("Ada",)]
+        cur.description = [("name",)]
+        return conn, cur
+
+    def test_emp_search_restores_the_connection_timeout(self):
+        conn, _cur = self._conn()
+        with patch.object(servertest, "get_read_connection", return_value=conn):
+            df = servertest._run_emp_detail_search("ada")
+        self.assertEqual(list(df["name"]), ["Ada"])
+        self.assertEqual(conn.timeout, 30)
+
+    def test_emp_search_restores_the_timeout_on_a_unit_of_work_connection(self):
+        conn, _cur = self._conn()
+        with patch.object(servertest, "get_db_connection", return_value=conn):
+            with servertest.unit_of_work():
+                servertest._run_emp_detail_search("ada")
+                self.assertEqual(conn.timeout, 30)   # later helpers keep the normal timeout
+        conn.commit.assert_called_once_with()
+
+    def test_emp_search_restores_the_timeout_when_the_proc_fails(self):
+        conn, cur = self._conn()
+        cur.execute.side_effect = RuntimeError("proc failed")
+        with patch.object(servertest, "get_read_connection", return_value=conn):
+            self.assertIsNone(servertest._run_emp_detail_search("ada"))
+        self.assertEqual(conn.timeout, 30)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import jwt_utils
+import shared_cache
+from app import app
+from shared_cache import TieredCache
+
+TEST_SECRET = "unit-test-secret-0123456789abcdef0123456789"
+
+
+class SharedCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        for p in (
+            patch.object(shared_cache, "SHARED_CACHE_DB", os.path.join(self.tmp, "cache.sqlite3")),
+            patch.object(shared_cache, "_ensure_poller", lambda: None),   # tests drop locally instead
+        ):
+            p.start()
+            self.addCleanup(p.stop)
+        shared_cache._initialized = False
+        self.addCleanup(setattr, shared_cache, "_initialized", False)
+
+    def _cache(self, name, shared=True):
+        cache = TieredCache(f"test-{name}-{id(self)}", ttl=60, shared=shared)
+        self.addCleanup(shared_cache.CACHES.pop, cache.namespace, None)
+        return cache
+
+
+class SharedCacheTests(SharedCacheTestCase):
+
+    def test_load_that_raced_an_invalidation_is_not_stored(self):
+        cache = self._cache("race")
+
+        def stale_loader():
+            cache.invalidate("k")    # a write commits while we are still loading
+            return "stale"
+
+        self.assertEqual(cache.get_or_load("k", stale_loader), "stale")
+        self.assertEqual(cache.get_or_load("k", lambda: "fresh"), "fresh")
+
+    def test_shared_tier_serves_other_instances_and_honours_invalidation(self):
+        writer, reader = self._cache("w"), self._cache("r")
+        reader.namespace = writer.namespace     # two workers, one namespace
+        writer.get_or_load("k", lambda: "v1")
+        self.assertEqual(reader.get_or_load("k", lambda: "unused"), "v1")
+        self.assertEqual(reader.stats()["shared_hits"], 1)
+
+        writer.invalidate("k")
+        reader._drop_local("k", False)          # what the poller does in the other worker
+        self.assertEqual(reader.get_or_load("k", lambda: "v2"), "v2")
+
+    def test_prefix_invalidation(self):
+        cache = self._cache("prefix", shared=False)
+        cache.get_or_load("a@x|dev", lambda: 1)
+        cache.get_or_load("a@x|prod", lambda: 2)
+        cache.get_or_load("b@x|dev", lambda: 3)
+        cache.invalidate("a@x|", prefix=True)
+        self.assertEqual(cache.stats()["size"], 1)
+
+
+class InvalidateRouteTests(SharedCacheTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = app.test_client()
+        p = patch.object(jwt_utils, "JWT_SECRET", TEST_SECRET)
+        p.start()
+        self.addCleanup(p.stop)
+        self.cache = self._cache("route", shared=False)
+        self.cache.get_or_load("k", lambda: 1)
+
+    def _post(self, role, body):
+        token = jwt_utils.make_access_token("a@example.com", role, {"env": "prod"})
+        return self.client.post("/api/cache/invalidate", json=body, headers={"Authorization": f"Bearer {token}"})
+
+    def test_requires_auth(self):
+        self.assertEqual(self.client.post("/api/cache/invalidate", json={"cache": self.cache.namespace}).status_code, 401)
+
+    def test_callers_without_roles_edit_are_forbidden(self):
+        for role in ("simple", "manager"):
+            resp = self._post(role, {"cache": self.cache.namespace})
+            self.assertEqual(resp.status_code, 403, role)
+        self.assertEqual(self.cache.stats()["size"], 1)
+
+    def test_admin_drops_the_named_cache(self):
+        resp = self._post("admin", {"cache": self.cache.namespace})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+    def test_unknown_cache_is_a_400(self):
+        resp = self._post("hr", {"cache": "no-such-cache"})
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn(self.cache.namespace, resp.get_json()["allowed"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import jwt_utils
+import servertest
+from app import app
+from servertest import TASK_LIST_COLUMNS, list_all_tasks_simple, resolve_fields
+
+TEST_SECRET = "unit-test-secret-0123456789abcdef0123456789"
+
+
+class ResolveFieldsTests(unittest.TestCase):
+
+    def test_missing_or_blank_means_all_columns(self):
+        self.assertIsNone(resolve_fields(None, TASK_LIST_COLUMNS))
+        self.assertIsNone(resolve_fields("  ", TASK_LIST_COLUMNS))
+
+    def test_key_columns_come_first_and_duplicates_collapse(self):
+        out = resolve_fields(" Status,name,task_id,Status ", TASK_LIST_COLUMNS, always=("task_id",))
+        self.assertEqual(out, ["task_id", "Status", "name"])
+
+    def test_names_outside_the_whitelist_are_rejected(self):
+        for raw in ("name,password", "name]; DROP TABLE x; --", "status"):
+            with self.assertRaises(ValueError, msg=raw):
+                resolve_fields(raw, TASK_LIST_COLUMNS)
+
+    def test_only_whitelisted_names_reach_the_select_list(self):
+        cur = MagicMock()
+        cur.description = [("task_id",), ("Status",)]
+        cur.fetchall.return_value = [("t-1", "Open")]
+        conn = MagicMock()
+        conn.__enter__.return_value = conn
+        conn.cursor.return_value = cur
+        with patch.object(servertest, "db_session", return_value=conn):
+            rows = list_all_tasks_simple(env="prod", columns=["task_id", "Status"])
+        self.assertEqual(rows, [{"task_id": "t-1", "Status": "Open"}])
+        self.assertIn("SELECT [task_id], [Status]", cur.execute.call_args.args[0])
+
+
+class TaskListFieldsRouteTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.test_client()
+        p = patch.object(jwt_utils, "JWT_SECRET", TEST_SECRET)
+        p.start()
+        self.addCleanup(p.stop)
+        token = jwt_utils.make_access_token("a@example.com", "hr", {"env": "prod"})
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    def test_unknown_field_is_a_400_listing_the_allowed_ones(self):
+        with patch("app.list_all_tasks_simple") as lister:
+            resp = self.client.get("/api/tasks?fields=name,secret", headers=self.headers)
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("secret", resp.get_json()["error"])
+        self.assertEqual(resp.get_json()["allowed"], TASK_LIST_COLUMNS)
+        lister.assert_not_called()
+
+    def test_fields_are_passed_through_with_the_key_column(self):
+        with patch("app.list_all_tasks_simple", return_value=[]) as lister:
+            resp = self.client.get("/api/tasks?fields=Status", headers=self.headers)
+        self.assertEqual(resp.status_code, 200)
+        lister.assert_called_once_with(columns=["task_id", "Status"], include_archived=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
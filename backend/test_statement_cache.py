@@ -0,0 +1,54 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import servertest
+from statement_cache import StatementCache, canonical_columns
+
+
+class StatementCacheTests(unittest.TestCase):
+
+    def test_column_order_does_not_change_the_statement(self):
+        stmts = StatementCache()
+        a = stmts.insert_sql("T", canonical_columns(["b", "A", "c"]))
+        b = stmts.insert_sql("T", canonical_columns(["c", "b", "A", "b"]))
+        self.assertIs(a, b)
+        self.assertEqual(stmts.stats()["misses"], 1)
+
+    def test_whitelist_order_wins_and_drops_unknown_columns(self):
+        self.assertEqual(canonical_columns(["z", "b", "a"], order=["a", "b", "c"]), ("a", "b"))
+        self.assertEqual(canonical_columns(["b", "B", "a"]), ("a", "B", "b"))
+
+
+class TaskUpdateColumnsTests(unittest.TestCase):
+
+    def _update(self, fields, stmts=None):
+        stmts = stmts or StatementCache()
+        cur = MagicMock()
+        cur.fetchall.return_value = []
+        conn = MagicMock()
+        conn.__enter__.return_value = conn
+        conn.cursor.return_value = cur
+        with patch.object(servertest, "STATEMENTS", stmts), \
+             patch.object(servertest, "get_db_connection", return_value=conn), \
+             patch.object(servertest, "_tasks_changed"):
+            servertest.update_task_in_db_list("t1", fields)
+        return stmts, cur
+
+    def test_request_json_cannot_set_protected_columns(self):
+        _stmts, cur = self._update({"task_id": "t1", "Status": "Done", "env": "prod",
+                                    "Row_ID": 1, "related_onboarding_id": "x", "bogus]": 1})
+        sql, params = cur.execute.call_args.args
+        set_clause = sql.split(" SET ")[1].split(" OUTPUT ")[0]
+        self.assertEqual(set_clause, "[Status] = ?, [updated_at] = ?")
+        self.assertEqual(params[0], "Done")
+        self.assertEqual(params[-1], "t1")
+
+    def test_arbitrary_keys_do_not_grow_the_statement_cache(self):
+        stmts, _cur = self._update({"Status": "Open", "junk1": 1})
+        self._update({"Status": "Done", "junk2": 1}, stmts)
+        self.assertEqual(stmts.stats()["misses"], 1)
+        _stmts, cur = self._update({"junk3": 1}, stmts)
+        cur.execute.assert_not_called()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import datetime
+import unittest
+from unittest.mock import MagicMock, patch
+
+import submission_rollup
+from submission_rollup import ALL_CREATORS, ALL_TIME, apply_deltas, deltas_for, read_counts, rollup_key
+
+
+class RollupKeyTests(unittest.TestCase):
+
+    def test_creator_is_normalized_and_timestamp_truncated_to_the_day(self):
+        key = rollup_key("prod", "  A@Example.com ", datetime.datetime(2024, 3, 5, 17, 30))
+        self.assertEqual(key, ("prod", "a@example.com", datetime.date(2024, 3, 5)))
+
+    def test_iso_strings_and_missing_values(self):
+        self.assertEqual(rollup_key(None, None, "2024-03-05T08:00:00"), ("", "", datetime.date(2024, 3, 5)))
+        self.assertIsNone(rollup_key("prod", "a", None))
+        self.assertIsNone(rollup_key("prod", "a", "not a date"))
+
+    def test_deltas_cancel_when_a_row_stays_in_its_bucket(self):
+        day = datetime.date(2024, 3, 5)
+        old = deltas_for([("prod", "a", day)], -1)
+        for k, n in deltas_for([("prod", "a", day), None]).items():
+            old[k] = old.get(k, 0) + n
+        self.assertEqual(old, {("prod", "a", day): 0})
+        self.assertEqual(submission_rollup._expand(old), [])
+
+
+class ApplyDeltasTests(unittest.TestCase):
+
+    def setUp(self):
+        p = patch.object(submission_rollup, "_table_seen", False)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def test_each_delta_feeds_day_month_and_all_time_for_creator_and_everyone(self):
+        cur = MagicMock()
+        with patch.object(submission_rollup, "SUBMISSION_ROLLUP", "on"):
+            apply_deltas(cur, {("prod", "a", datetime.date(2024, 3, 5)): 2})
+        rows = sorted(cur.executemany.call_args.args[1])
+        self.assertEqual(rows, sorted([
+            ("prod", w, g, b, 2)
+            for w in ("a", ALL_CREATORS)
+            for g, b in (("D", datetime.date(2024, 3, 5)), ("M", datetime.date(2024, 3, 1)), ("A", ALL_TIME))
+        ]))
+        self.assertTrue(cur.fast_executemany)
+
+    def test_auto_mode_skips_writes_until_the_table_exists(self):
+        cur = MagicMock()
+        cur.fetchone.return_value = (None,)
+        deltas = {("prod", "a", datetime.date(2024, 3, 5)): 1}
+        with patch.object(submission_rollup, "SUBMISSION_ROLLUP", "auto"):
+            apply_deltas(cur, deltas)
+            cur.executemany.assert_not_called()
+            cur.fetchone.return_value = (1234,)
+            apply_deltas(cur, deltas)
+        cur.executemany.assert_called_once()
+
+    def test_off_never_writes(self):
+        cur = MagicMock()
+        with patch.object(submission_rollup, "SUBMISSION_ROLLUP", "off"):
+            apply_deltas(cur, {("prod", "a", datetime.date(2024, 3, 5)): 1})
+        cur.execute.assert_not_called()
+        cur.executemany.assert_not_called()
+
+
+class ReadCountsTests(unittest.TestCase):
+
+    def test_rows_map_to_total_today_and_monthly(self):
+        cur = MagicMock()
+        cur.fetchall.return_value = [
+            ("A", ALL_TIME, 42),
+            ("D", datetime.date(2024, 3, 5), 3),
+            ("M", datetime.date(2024, 1, 1), 10),
+            ("M", datetime.date(2024, 3, 1), 7),
+        ]
+        with patch.object(submission_rollup, "SUBMISSION_ROLLUP", "on"):
+            out = read_counts(cur, "prod", None, datetime.date(2024, 3, 5))
+        self.assertEqual(out["count"], 42)
+        self.assertEqual(out["today"], 3)
+        self.assertEqual(out["monthly"][:3], [10, 0, 7])
+        self.assertEqual(cur.execute.call_args.args[1][:2], ("prod", ALL_CREATORS))
+
+    def test_unavailable_rollup_raises_so_the_route_can_fall_back(self):
+        with patch.object(submission_rollup, "SUBMISSION_ROLLUP", "off"):
+            with self.assertRaises(RuntimeError):
+                read_counts(MagicMock(), "prod", "a", datetime.date(2024, 3, 5))
+
+
+if __name__ == "__main__":
+    unittest.main()
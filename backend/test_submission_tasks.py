@@ -0,0 +1,94 @@
+import unittest
+from unittest.mock import patch
+
+import jwt_utils
+import servertest
+from app import app, _submission_tasks_changed
+from servertest import manage_onboarding_tasks
+
+TEST_SECRET = "unit-test-secret-0123456789abcdef0123456789"
+CATEGORIES = {
+    "NeedsLaptop": {"task_type": "IT", "name_prefix": "Laptop for", "short_code": "LAP", "description": "Set up laptop",
+                    "assignedTo": "it@example.com"},
+}
+SID = "11111111-1111-1111-1111-111111111111"
+
+
+class SubmissionTasksChangedTests(unittest.TestCase):
+
+    def test_unchanged_flags_and_names_do_not_requeue(self):
+        before = {"NeedsLaptop": True, "LegalFirstName": "Ada", "Manager": "Bob"}
+        self.assertFalse(_submission_tasks_changed(before, {"NeedsLaptop": "true", "Notes": "x"}, CATEGORIES))
+        self.assertFalse(_submission_tasks_changed(before, {"LegalFirstName": "Ada"}, CATEGORIES))
+
+    def test_flag_or_task_field_change_requeues(self):
+        before = {"NeedsLaptop": False, "Manager": "Bob"}
+        self.assertTrue(_submission_tasks_changed(before, {"NeedsLaptop": "yes"}, CATEGORIES))
+        self.assertTrue(_submission_tasks_changed(before, {"Manager": "Eve"}, CATEGORIES))
+        self.assertTrue(_submission_tasks_changed(None, {"NeedsLaptop": True}, CATEGORIES))
+
+
+class UpdateSubmissionRouteTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.test_client()
+        p = patch.object(jwt_utils, "JWT_SECRET", TEST_SECRET)
+        p.start()
+        self.addCleanup(p.stop)
+        token = jwt_utils.make_access_token("a@example.com", "hr", {"env": "prod"})
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    def _put(self, body, before):
+        with patch("app.get_onboard_request_by_id", return_value=before), \
+             patch("app.update_onboard_request", return_value=True), \
+             patch("app._get_category_map", return_value=CATEGORIES), \
+             patch("app.enqueue_submission_tasks") as enqueue:
+            resp = self.client.put("/api/submissions", json=body, headers=self.headers)
+        self.assertEqual(resp.status_code, 200)
+        return enqueue
+
+    def test_put_without_task_changes_does_not_enqueue(self):
+        enqueue = self._put({"submission_id": SID, "Notes": "typo fix"}, {"NeedsLaptop": True})
+        enqueue.assert_not_called()
+
+    def test_put_changing_a_flag_enqueues(self):
+        enqueue = self._put({"submission_id": SID, "NeedsLaptop": True}, {"NeedsLaptop": False})
+        enqueue.assert_called_once()
+
+    def test_job_routes_require_auth(self):
+        self.assertEqual(self.client.get("/api/jobs/stats").status_code, 401)
+        self.assertEqual(self.client.get(f"/api/jobs/submission-tasks:{SID}").status_code, 401)
+
+
+class ManageOnboardingTasksTests(unittest.TestCase):
+
+    def _run(self, existing):
+        data = {"submission_id": SID, "LegalFirstName": "Ada", "LegalLastName": "L",
+                "Manager": "Eve", "NeedsLaptop": "true"}
+        with patch.object(servertest, "db_find_task", return_value=existing), \
+             patch.object(servertest, "db_insert_task", return_value=True) as insert, \
+             patch.object(servertest, "update_task_in_db_list") as update:
+            created = manage_onboarding_tasks(data, categories=CATEGORIES)
+        return created, insert, update
+
+    def test_completed_task_is_not_reopened(self):
+        created, insert, update = self._run({"task_id": "t1", "Status": "Completed", "description": "d"})
+        self.assertEqual(created, [])
+        insert.assert_not_called()
+        update.assert_called_once_with("t1", {"manager": "Eve"})
+
+    def test_task_dropped_as_na_is_reopened(self):
+        _created, _insert, update = self._run({"task_id": "t1", "Status": "N/A", "description": "d (No longer required)"})
+        fields = update.call_args.args[1]
+        self.assertEqual(fields["Status"], "Open")
+        self.assertNotIn("No longer required", fields["description"])
+
+    def test_missing_task_is_created(self):
+        created, insert, update = self._run(None)
+        self.assertEqual(len(created), 1)
+        insert.assert_called_once()
+        update.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
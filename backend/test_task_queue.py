@@ -0,0 +1,107 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import task_queue
+from task_queue import enqueue, get_job
+
+
+class TaskQueueTests(unittest.TestCase):
+    """Drives _claim/_finish directly; enqueue's worker start-up is patched out."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        for p in (
+            patch.object(task_queue, "TASK_QUEUE_DB", os.path.join(self.tmp, "queue.sqlite3")),
+            patch.object(task_queue, "start_workers", lambda *a, **k: None),
+        ):
+            p.start()
+            self.addCleanup(p.stop)
+        task_queue.init_queue()
+
+    def _payload(self, key):
+        with task_queue._connect() as conn:
+            return json.loads(conn.execute("SELECT payload FROM jobs WHERE job_key = ?", (key,)).fetchone()[0])
+
+    def test_enqueue_is_idempotent_and_merges_pending_payloads(self):
+        enqueue("kind", "k1", {"a": 1, "b": 1})
+        enqueue("kind", "k1", {"b": 2})
+        self.assertEqual(task_queue.queue_stats(), {"queued": 1})
+        self.assertEqual(self._payload("k1"), {"a": 1, "b": 2})
+
+    def test_claim_marks_running_and_success_marks_done(self):
+        enqueue("kind", "k1", {"a": 1})
+        job = task_queue._claim()
+        self.assertEqual(job["job_key"], "k1")
+        self.assertEqual(get_job("k1")["status"], "running")
+        self.assertIsNone(task_queue._claim())      # nothing else is due
+        task_queue._finish("k1", job["attempts"] + 1, None)
+        self.assertEqual(get_job("k1")["status"], "done")
+
+    def test_reenqueue_while_running_reruns_with_the_new_payload(self):
+        enqueue("kind", "k1", {"a": 1})
+        job = task_queue._claim()
+        enqueue("kind", "k1", {"a": 2})
+        self.assertEqual(get_job("k1")["rerun"], 1)
+        task_queue._finish("k1", job["attempts"] + 1, None)
+        again = task_queue._claim()
+        self.assertIsNotNone(again)
+        self.assertEqual(json.loads(again["payload"]), {"a": 2})
+
+    def test_failures_back_off_then_fail(self):
+        with patch.object(task_queue, "TASK_QUEUE_MAX_ATTEMPTS", 2), \
+             patch.object(task_queue, "TASK_QUEUE_BACKOFF_S", 60):
+            enqueue("kind", "k1", {})
+            job = task_queue._claim()
+            task_queue._finish("k1", job["attempts"] + 1, "boom")
+            first = get_job("k1")
+            self.assertEqual(first["status"], "queued")
+            self.assertGreaterEqual(first["next_run_at"], time.time() + 59)
+            self.assertIsNone(task_queue._claim())   # not due yet
+
+            with task_queue._connect() as conn:
+                conn.execute("UPDATE jobs SET next_run_at = 0 WHERE job_key = 'k1'")
+            job = task_queue._claim()
+            task_queue._finish("k1", job["attempts"] + 1, "boom again")
+            final = get_job("k1")
+            self.assertEqual(final["status"], "failed")
+            self.assertEqual(final["last_error"], "boom again")
+
+    def test_expired_lease_is_reclaimed(self):
+        enqueue("kind", "k1", {})
+        task_queue._claim()
+        with task_queue._connect() as conn:
+            conn.execute("UPDATE jobs SET updated_at = ? WHERE job_key = 'k1'",
+                         (time.time() - task_queue.TASK_QUEUE_LEASE_S - 1,))
+        job = task_queue._claim()
+        self.assertIsNotNone(job)
+        self.assertEqual(get_job("k1")["attempts"], 2)
+
+    def test_purge_done_drops_only_old_done_jobs(self):
+        for key in ("old", "fresh", "failed"):
+            enqueue("kind", key, {})
+        old_ts = time.time() - task_queue.TASK_QUEUE_RETENTION_S - 1
+        with task_queue._connect() as conn:
+            conn.execute("UPDATE jobs SET status = 'done', updated_at = ? WHERE job_key = 'old'", (old_ts,))
+            conn.execute("UPDATE jobs SET status = 'done' WHERE job_key = 'fresh'")
+            conn.execute("UPDATE jobs SET status = 'failed', updated_at = ? WHERE job_key = 'failed'", (old_ts,))
+        self.assertEqual(task_queue.purge_done(), 1)
+        self.assertIsNone(get_job("old"))
+        self.assertEqual(get_job("fresh")["status"], "done")
+        self.assertEqual(get_job("failed")["status"], "failed")
+
+    def test_sweep_runs_at_most_once_per_interval(self):
+        with patch.object(task_queue, "_last_sweep", 0.0), \
+             patch.object(task_queue, "purge_done", return_value=0) as purge:
+            task_queue._maybe_sweep()
+            task_queue._maybe_sweep()
+        purge.assert_called_once_with()
+
+
+if __name__ == "__main__":
+    unittest.main()
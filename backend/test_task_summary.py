@@ -0,0 +1,82 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import jwt_utils
+import servertest
+from app import app
+from servertest import get_task_summary
+
+TEST_SECRET = "unit-test-secret-0123456789abcdef0123456789"
+
+
+def _session_for(cursor):
+    conn = MagicMock()
+    conn.__enter__.return_value = conn
+    conn.cursor.return_value = cursor
+    return patch.object(servertest, "db_session", return_value=conn)
+
+
+class TaskSummaryQueryTests(unittest.TestCase):
+
+    def test_grouping_sets_fill_status_assignee_and_type_buckets(self):
+        cur = MagicMock()
+        cur.fetchall.side_effect = [
+            [
+                # st, assignee, task_type, g_assignee, g_type, n
+                ("Open", None, None, 1, 1, 3),
+                ("Completed", None, None, 1, 1, 2),
+                ("Open", "it@example.com", None, 0, 1, 2),
+                ("Completed", "it@example.com", None, 0, 1, 1),
+                ("Open", None, "IT", 1, 0, 3),
+            ],
+            [("sub-1", "Ada Lovelace", 4, 3), ("sub-2", "Alan Turing", 1, None)],
+        ]
+        with _session_for(cur):
+            out = get_task_summary(env="prod")
+        self.assertEqual(out["total"], 5)
+        self.assertEqual(out["by_status"], {"Open": 3, "Completed": 2})
+        self.assertEqual(out["by_assignee"]["it@example.com"], {"total": 3, "Open": 2, "Completed": 1})
+        self.assertEqual(out["by_task_type"]["IT"], {"total": 3, "Open": 3})
+        self.assertEqual([s["percent_complete"] for s in out["submissions"]], [75.0, 0.0])
+        sql, params = cur.execute.call_args.args
+        self.assertIn("GROUPING SETS", sql)
+        self.assertEqual(params[:2], ("prod", "prod"))
+        self.assertEqual(list(params[2:]), servertest.TASK_DONE_STATUSES)
+
+
+class TaskSummaryRouteTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.test_client()
+        p = patch.object(jwt_utils, "JWT_SECRET", TEST_SECRET)
+        p.start()
+        self.addCleanup(p.stop)
+        token = jwt_utils.make_access_token("a@example.com", "hr", {"env": "prod"})
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    def test_requires_auth(self):
+        with patch("app.get_task_summary") as summary:
+            self.assertEqual(self.client.get("/api/tasks/summary").status_code, 401)
+        summary.assert_not_called()
+
+    def test_live_mode_queries_the_caller_env(self):
+        with patch("app.get_task_summary", return_value={"total": 1}) as summary:
+            resp = self.client.get("/api/tasks/summary", headers=self.headers)
+        self.assertEqual(resp.status_code, 200)
+        summary.assert_called_once_with(env="prod")
+        self.assertEqual(resp.get_json()["total"], 1)
+        self.assertFalse(resp.get_json()["cached"])
+
+    def test_cached_mode_serves_the_snapshot(self):
+        cache = MagicMock()
+        cache.get_or_load.return_value = {"total": 7, "as_of": "2024-01-01T00:00:00Z"}
+        with patch("app.TASK_SUMMARY_CACHE", cache), patch("app.get_task_summary") as summary:
+            resp = self.client.get("/api/tasks/summary?mode=cached", headers=self.headers)
+        self.assertEqual(resp.get_json()["total"], 7)
+        self.assertTrue(resp.get_json()["cached"])
+        self.assertEqual(cache.get_or_load.call_args.args[0], "prod")
+        summary.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
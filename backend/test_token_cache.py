@@ -0,0 +1,70 @@
+import time
+import unittest
+from unittest.mock import patch
+
+import jwt
+
+from app import app
+from token_cache import API_TOKEN_CACHE, TOKEN_CACHE, VerifiedTokenCache
+
+
+class TokenCacheTests(unittest.TestCase):
+
+    def test_claims_are_cached_until_the_token_expires(self):
+        cache = VerifiedTokenCache()
+        calls = []
+        verify = lambda t: calls.append(t) or {"sub": "a", "exp": time.time() + 60}
+        cache.get_or_verify("tok", verify)
+        cache.get_or_verify("tok", verify)
+        self.assertEqual(len(calls), 1)
+
+        with patch("token_cache.time.time", return_value=time.time() + 120):
+            self.assertIsNone(cache.get("tok"))
+
+    def test_failed_and_expired_verifications_are_not_cached(self):
+        cache = VerifiedTokenCache()
+        self.assertIsNone(cache.get_or_verify("bad", lambda t: None))
+        cache.get_or_verify("old", lambda t: {"sub": "a", "exp": time.time() - 1})
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_lru_bound(self):
+        cache = VerifiedTokenCache(max_entries=2)
+        for t in ("a", "b", "c"):
+            cache.put(t, {"exp": time.time() + 60})
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_each_verifier_has_its_own_cache(self):
+        self.assertIsNot(TOKEN_CACHE, API_TOKEN_CACHE)
+        TOKEN_CACHE.put("aaa.bbb.ccc", {"aud": "id-token-audience", "exp": time.time() + 60})
+        self.addCleanup(TOKEN_CACHE.clear)
+        calls = []
+        API_TOKEN_CACHE.get_or_verify("aaa.bbb.ccc", lambda t: calls.append(t))
+        self.assertEqual(calls, ["aaa.bbb.ccc"])   # the stricter verifier still runs
+
+
+class MicrosoftTokenRouteTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.test_client()
+        TOKEN_CACHE.clear()
+        self.addCleanup(TOKEN_CACHE.clear)
+
+    def test_verification_failure_is_401_and_not_cached(self):
+        with patch("app.verify_microsoft_id_token", side_effect=jwt.ExpiredSignatureError("expired")):
+            resp = self.client.get("/api/jobs/stats", headers={"Authorization": "Bearer aaa.bbb.ccc"})
+        self.assertEqual(resp.status_code, 401)
+        self.assertEqual(TOKEN_CACHE.stats()["size"], 0)
+
+    def test_verified_token_is_checked_once(self):
+        claims = {"oid": "1", "preferred_username": "a@example.com", "exp": time.time() + 60}
+        with patch("app.verify_microsoft_id_token", return_value=claims) as verify:
+            for _ in range(2):
+                resp = self.client.get("/api/auth/token-cache/stats", headers={"Authorization": "Bearer aaa.bbb.ccc"})
+                self.assertEqual(resp.status_code, 200)
+        self.assertEqual(verify.call_count, 1)
+        self.assertEqual(set(resp.get_json()), {"id_token", "api_token"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import servertest
+from servertest import UnitOfWorkRolledBack, _commit, _on_commit, db_session, unit_of_work
+
+
+def _write_step(fail=False):
+    """Shaped like the servertest helpers: own db_session, commit, errors swallowed."""
+    try:
+        with db_session() as conn:
+            conn.cursor().execute("UPDATE t SET x = 1")
+            if fail:
+                raise RuntimeError("constraint violated")
+            _commit(conn)
+            return True
+    except RuntimeError:
+        return False
+
+
+class UnitOfWorkTests(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = MagicMock()
+        self.events = []
+        self.conn.commit.side_effect = lambda: self.events.append("commit")
+        self.conn.rollback.side_effect = lambda: self.events.append("rollback")
+        p = patch.object(servertest, "get_db_connection", return_value=self.conn)
+        self.connect = p.start()
+        self.addCleanup(p.stop)
+
+    def test_steps_share_one_connection_and_commit_once(self):
+        with unit_of_work():
+            self.assertTrue(_write_step())
+            _on_commit(lambda: self.events.append("callback"))
+            self.assertTrue(_write_step())
+            self.assertEqual(self.events, [])   # helper commits are deferred
+        self.assertEqual(self.connect.call_count, 1)
+        self.assertEqual(self.events, ["commit", "callback"])
+        self.conn.close.assert_called_once()
+
+    def test_swallowed_failure_rolls_everything_back(self):
+        with self.assertRaises(UnitOfWorkRolledBack):
+            with unit_of_work():
+                self.assertTrue(_write_step())
+                _on_commit(lambda: self.events.append("callback"))
+                self.assertFalse(_write_step(fail=True))
+        self.assertNotIn("commit", self.events)
+        self.assertNotIn("callback", self.events)
+        self.assertIn("rollback", self.events)
+        self.conn.close.assert_called_once()
+
+    def test_exception_in_the_block_rolls_back_and_propagates(self):
+        with self.assertRaises(KeyError):
+            with unit_of_work():
+                _write_step()
+                raise KeyError("boom")
+        self.assertEqual(self.events, ["rollback"])
+
+    def test_nested_unit_joins_the_outer_one(self):
+        with unit_of_work() as outer:
+            with unit_of_work() as inner:
+                self.assertIs(inner, outer)
+                _write_step()
+            self.assertEqual(self.events, [])
+        self.assertEqual(self.connect.call_count, 1)
+        self.assertEqual(self.events, ["commit"])
+
+    def test_outside_a_unit_callbacks_run_immediately(self):
+        _on_commit(lambda: self.events.append("callback"))
+        self.assertEqual(self.events, ["callback"])
+
+
+if __name__ == "__main__":
+    unittest.main()
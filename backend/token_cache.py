@@ -0,0 +1,104 @@
+# token_cache.py
+# -*- coding: utf-8 -*-
+"""
+Bounded cache of verified bearer-token claims, keyed by SHA-256 of the token.
+
+Signature verification (RS256) is the expensive part of auth and the SPA sends
+the same token on every call, so once a token verifies we keep its claims until
+the token's own `exp`. Failed verifications are never cached.
+
+A cache holds claims accepted by one verifier only: a token that passes a
+looser check (other audience/issuer rules) must not be served from the cache
+of a stricter one, so each verifier gets its own instance.
+"""
+
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+TOKEN_CACHE_MAX     = int(os.getenv("TOKEN_CACHE_MAX", "10000"))
+TOKEN_CACHE_NO_EXP_TTL = float(os.getenv("TOKEN_CACHE_NO_EXP_TTL", "300"))  # tokens without exp
+
+
+class VerifiedTokenCache:
+    def __init__(self, max_entries: int = TOKEN_CACHE_MAX, no_exp_ttl: float = TOKEN_CACHE_NO_EXP_TTL):
+        self.max_entries = max_entries
+        self.no_exp_ttl = no_exp_ttl
+        self._data: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = self._digest(token)
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            claims, expires_at = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return dict(claims)
+
+    def put(self, token: str, claims: Dict[str, Any]) -> None:
+        try:
+            expires_at = float(claims["exp"]) if claims.get("exp") is not None else time.time() + self.no_exp_ttl
+        except (TypeError, ValueError):
+            return
+        if expires_at <= time.time():
+            return
+        key = self._digest(token)
+        with self._lock:
+            self._data[key] = (dict(claims), expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_verify(self, token: str, verify: Callable[[str], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """Return cached claims or run `verify(token)`; only truthy dict results are cached."""
+        claims = self.get(token)
+        if claims is not None:
+            return claims
+        claims = verify(token)
+        if isinstance(claims, dict) and claims:
+            self.put(token, claims)
+        return claims
+
+    def invalidate(self, token: str) -> None:
+        with self._lock:
+            self._data.pop(self._digest(token), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+# one cache per verifier
+TOKEN_CACHE = VerifiedTokenCache()          # app.verify_microsoft_id_token (protected_route)
+API_TOKEN_CACHE = VerifiedTokenCache()      # auth_ms._decode_ms_token (require_auth)
@@ -3,13 +3,28 @@ from __future__ import annotations
 
 from flask import jsonify, request
 from typing import Dict, Any, Optional
+import os
 import datetime
 import traceback
 
 from servertest import (
     get_profile_by_email,
-    insert_profile,   # <-- audit INSERT
+    get_profiles_by_emails,
+    insert_profile_returning,   # <-- audit INSERT, returns the stored row
+    unit_of_work,
+    UnitOfWorkRolledBack,
 )
+from jwt_utils import (
+    ACCESS_TTL_MIN,
+    bump_user_epoch,
+    is_session_token,
+    make_access_token,
+    make_refresh_token,
+    session_tokens_enabled,
+    verify_session_token,
+)
+
+USERS_BATCH_MAX = int(os.getenv("BATCH_GET_MAX", "500"))
 
 # ----------------------------------------------------------------------
 # Permissions / Roles
@@ -24,6 +39,7 @@ PERMISSIONS = {
     "TASK_VIEW":        "task:view",
     "TASK_EDIT_STATUS": "task:edit:status",
     "TASK_EDIT":        "task:edit",
+    "PAY_READ":         "pay:read",
 }
 
 ROLE_PERMISSIONS = {
@@ -33,7 +49,8 @@ ROLE_PERMISSIONS = {
     "hr":      {
         PERMISSIONS["READ_SELF"], PERMISSIONS["READ_ALL"],
         PERMISSIONS["TASK_VIEW"], PERMISSIONS["TASK_EDIT_STATUS"], PERMISSIONS["TASK_EDIT"],
-        PERMISSIONS["USER_CREATE"], PERMISSIONS["USER_EDIT"], PERMISSIONS["ROLE_EDIT"]
+        PERMISSIONS["USER_CREATE"], PERMISSIONS["USER_EDIT"], PERMISSIONS["ROLE_EDIT"],
+        PERMISSIONS["PAY_READ"],
     },
     "admin":   set(PERMISSIONS.values()),
 }
@@ -41,11 +58,56 @@ ROLE_PERMISSIONS = {
 def _perms_for_role(role: Optional[str]) -> set:
     return ROLE_PERMISSIONS.get((role or "simple").lower(), ROLE_PERMISSIONS["simple"])
 
+# Bitmask form carried inside session tokens (order of PERMISSIONS; append only!)
+PERMISSION_BITS = {perm: 1 << i for i, perm in enumerate(PERMISSIONS.values())}
+
+def perms_to_mask(perms) -> int:
+    mask = 0
+    for p in perms:
+        mask |= PERMISSION_BITS.get(p, 0)
+    return mask
+
+def mask_to_perms(mask: int) -> list:
+    return [p for p, bit in PERMISSION_BITS.items() if int(mask or 0) & bit]
+
+def issue_session_tokens(user: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Access + refresh tokens for a login response; access embeds role, env and permission mask.
+    Empty when session tokens are disabled (no JWT_SECRET): the login still succeeds.
+    """
+    if not session_tokens_enabled():
+        return {}
+    email = (user.get("email") or "").strip().lower()
+    role = (user.get("role") or "simple").strip().lower()
+    claims = {
+        "env": user.get("env") or "dev",
+        "perms": perms_to_mask(_perms_for_role(role)),
+        "name": user.get("display_name") or email.split("@")[0],
+    }
+    return {
+        "access_token": make_access_token(email, role, claims),
+        "refresh_token": make_refresh_token(email, {"env": claims["env"]}),
+        "token_type": "Bearer",
+        "expires_in": ACCESS_TTL_MIN * 60,
+    }
+
+def user_from_session_claims(claims: Dict[str, Any]) -> Dict[str, Any]:
+    email = str(claims.get("sub") or "").lower()
+    return {
+        "email": email,
+        "display_name": claims.get("name") or email.split("@")[0],
+        "role": claims.get("role") or "simple",
+        "permissions": mask_to_perms(claims.get("perms")),
+        "env": claims.get("env") or "dev",
+    }
+
 # ----------------------------------------------------------------------
 # Helpers
 # ----------------------------------------------------------------------
-def _effective_profile(email: str) -> Dict[str, Any]:
-    prof = get_profile_by_email(email) or {}
+def _effective_profile(email: str, prof: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Public view of a profile; pass `prof` (e.g. a just-inserted row) to skip the lookup."""
+    if prof is None:
+        prof = get_profile_by_email(email) or {}
     role = (prof.get("role") or "simple").strip().lower()
     display = prof.get("display_name") or email.split("@")[0]
     return {
@@ -59,6 +121,17 @@ def _effective_profile(email: str) -> Dict[str, Any]:
     }
 
 def current_user_from_request() -> Optional[Dict[str, Any]]:
+    # Session token: authorize purely from the verified claims, no DB lookup
+    auth = request.headers.get("Authorization", "")
+    if auth.lower().startswith("bearer "):
+        token = auth.split(" ", 1)[1].strip()
+        if is_session_token(token):
+            try:
+                return user_from_session_claims(verify_session_token(token))
+            except Exception as e:
+                print("[current_user_from_request] invalid session token:", e)
+                return None
+
     email = (request.headers.get("X-User-Email") or "").strip().lower()
     if not email:
         auth = request.headers.get("Authorization", "")
@@ -112,6 +185,26 @@ def register_user_routes(app):
             return jsonify({"error": "not found"}), 404
         return jsonify(prof)
 
+    @app.post("/api/users/batch")
+    def users_batch():
+        """Body: {"emails": [...]} -> {"items": {email: profile}, "missing": [...]}."""
+        user, err = require_login()
+        if err: return err
+
+        data = request.get_json(silent=True) or {}
+        emails = data.get("emails") or data.get("ids")
+        if not isinstance(emails, list) or not emails:
+            return jsonify({"error": "emails must be a non-empty list"}), 400
+        if len(emails) > USERS_BATCH_MAX:
+            return jsonify({"error": f"too many emails ({len(emails)} > {USERS_BATCH_MAX})"}), 413
+
+        wanted = list(dict.fromkeys(str(e).strip().lower() for e in emails if str(e or "").strip()))
+        if any(e != user["email"] for e in wanted) and not can(user, PERMISSIONS["READ_ALL"]):
+            return jsonify({"error": "forbidden"}), 403
+
+        found = get_profiles_by_emails(wanted)
+        return jsonify({"items": found, "missing": [e for e in wanted if e not in found]})
+
     @app.post("/api/users")
     def users_create():
         user, err = require_login()
@@ -133,21 +226,22 @@ def register_user_routes(app):
             role = "simple"
 
         now_iso = datetime.datetime.utcnow().isoformat()
-        ok = insert_profile(
+        created = insert_profile_returning(
             display_name=display,
             email=email,
             role=role,
             edited_by=(user.get("display_name") or user.get("email") or email),
-            created_time=data.get("createdTime") or now_iso,
+            createdTime=data.get("createdTime") or now_iso,
             edit_time=data.get("editTime") or now_iso,
             password=data.get("password") or "",
             status=("stable").strip().lower(),
             role_id=data.get("role_id"),
             env=env,
         )
-        if not ok:
+        if not created:
             return jsonify({"error": "failed to persist profile"}), 500
-        return jsonify(_effective_profile(email)), 201
+        bump_user_epoch(email)
+        return jsonify(_effective_profile(email, created)), 201
 
     @app.delete("/api/users/<path:email>")
     def users_delete(email: str):
@@ -161,20 +255,26 @@ def register_user_routes(app):
         if not target_email:
             return jsonify({"error": "invalid email"}), 400
 
-        current = _effective_profile(target_email)
-        now_iso = datetime.datetime.utcnow().isoformat()
-        ok = insert_profile(
-            display_name=current["display_name"],
-            email=target_email,
-            role="simple",
-            edited_by=(user.get("display_name") or user.get("email") or target_email),
-            created_time=now_iso,
-            edit_time=now_iso,
-            password="",
-            status="stable",
-            role_id=None,
-            env=current.get("env") or "dev",
-        )
+        # read the current row and insert the audit row on one connection, one commit
+        try:
+            with unit_of_work():
+                current = _effective_profile(target_email)
+                now_iso = datetime.datetime.utcnow().isoformat()
+                ok = insert_profile_returning(
+                    display_name=current["display_name"],
+                    email=target_email,
+                    role="simple",
+                    edited_by=(user.get("display_name") or user.get("email") or target_email),
+                    createdTime=now_iso,
+                    edit_time=now_iso,
+                    password="",
+                    status="stable",
+                    role_id=None,
+                    env=current.get("env") or "dev",
+                )
+        except UnitOfWorkRolledBack:
+            ok = None
         if not ok:
             return jsonify({"error": "failed to persist deactivation"}), 500
+        bump_user_epoch(target_email)
         return jsonify({"ok": True, "email": target_email, "role": "simple", "status": "inactive"})
\ No newline at end of file
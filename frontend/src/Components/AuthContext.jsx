@@ -2,6 +2,7 @@
 import React, { createContext, useContext, useEffect, useMemo, useState } from "react";
 import { useMsal } from "@azure/msal-react";
 import { InteractionStatus, EventType } from "@azure/msal-browser";
+import { clearSessionTokens } from "./config";
 
 const AuthContext = createContext({
   isAuthenticated: false,
@@ -26,6 +27,7 @@ export function AuthProvider({ children }) {
       sessionStorage.setItem("currentUser", JSON.stringify(user));
     } else {
       sessionStorage.removeItem("currentUser");
+      clearSessionTokens();
     }
   }, [user]);
 
@@ -3,7 +3,7 @@ import React, { useRef, useCallback, useState } from "react";
 import "./LoginForm.css";
 import { FaUser, FaLock } from "react-icons/fa";
 import { useNavigate } from "react-router-dom";
-import api from "../config";
+import api, { saveSessionTokens } from "../config";
 import { useAuth } from "../AuthContext";
 
 import { useMsal } from "@azure/msal-react";
@@ -42,6 +42,7 @@ export const LoginForm = () => {
       const resp = await api.post("/api/auth/local-login", { username, password }, { validateStatus: () => true });
       if (resp.status !== 200 || !resp?.data?.user) throw new Error(resp?.data?.error || "No user");
       const u = resp.data.user;
+      saveSessionTokens(resp.data);
       sessionStorage.setItem("currentUser", JSON.stringify(u));
       setUser(u);
       console.log("✅ Logged in user data:", u);
@@ -118,6 +119,7 @@ export const LoginForm = () => {
       const resp = await api.post("/api/auth/msal-login", { idToken: tokenRes.idToken }, { validateStatus: () => true });
       if (resp.status !== 200 || !resp?.data?.user) throw new Error(resp?.data?.error || "Server login failed");
       const savedUser = resp.data.user;
+      saveSessionTokens(resp.data);
   
       // IMPORTANT: persist + redirect
       sessionStorage.setItem("currentUser", JSON.stringify(savedUser));
@@ -24,18 +24,49 @@ const api = axios.create({
   // xsrfHeaderName: 'X-CSRFToken',
 });
 
-// 3) Attach bearer token if you use JWTs
+// 3) Session tokens from /api/auth/*-login: the backend resolves the caller's
+//    role and env from them, so every call must carry one once logged in
+export function saveSessionTokens(data) {
+  if (data?.access_token) localStorage.setItem('access_token', data.access_token);
+  if (data?.refresh_token) localStorage.setItem('refresh_token', data.refresh_token);
+}
+
+export function clearSessionTokens() {
+  localStorage.removeItem('access_token');
+  localStorage.removeItem('refresh_token');
+}
+
+// Attach the access token (wins over per-call demo:<role_id> headers)
 api.interceptors.request.use((config) => {
-  const token = localStorage.getItem('access_token'); // or wherever you store it
+  const token = localStorage.getItem('access_token');
   if (token) config.headers.Authorization = `Bearer ${token}`;
   return config;
 });
 
-// 4) Helpful console for 401/403 to see the server message
+// 4) On 401, rotate the tokens once via /api/auth/refresh and retry the call
+let refreshInFlight = null;
+
 api.interceptors.response.use(
   (res) => res,
-  (err) => {
+  async (err) => {
     const status = err?.response?.status;
+    const original = err?.config;
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (status === 401 && refreshToken && original && !original._retried
+        && !String(original.url || '').includes('/api/auth/')) {
+      original._retried = true;
+      try {
+        refreshInFlight = refreshInFlight
+          || api.post('/api/auth/refresh', { refresh_token: refreshToken })
+               .finally(() => { refreshInFlight = null; });
+        const { data } = await refreshInFlight;
+        saveSessionTokens(data);
+        return api(original);
+      } catch (refreshErr) {
+        clearSessionTokens();
+      }
+    }
+    // Helpful console for 401/403 to see the server message
     if (status === 401 || status === 403) {
       console.warn('Auth/Permission error:', {
         status,